@@ -5,7 +5,6 @@ import tempfile
 import yaml
 import json
 from collections import defaultdict
-import csv
 
 from botocore.exceptions import EndpointConnectionError
 import boto3
@@ -15,18 +14,36 @@ from rich.table import Table
 from rich.panel import Panel
 import typer
 
-from .resources import (
-    NamespacedResources,
-    Resources,
+from .harden import SEVERITIES
+from .harden import console as harden_console
+from .costs import CostModel
+from .scan import Scan
+from . import (
+    baseline as baselines,
+    columnar,
+    findings,
+    html_report,
+    memory,
+    metrics,
+    pipeline,
+    profiling,
+    report,
+    security_hub,
+    throttle,
+    tracing,
 )
-from .harden import harden
 from hardeneks import helpers
+from .bench import app as bench_app
+from .history import _store_callback, app as history_app
+from .store import Store
 
-import datetime
-import hashlib
+import threading
+import time
 
 app = typer.Typer()
-console = Console(record=True)
+app.add_typer(bench_app, name="bench")
+app.add_typer(history_app, name="history")
+console = Console()
 
 
 def _config_callback(value: str):
@@ -47,10 +64,46 @@ def _config_callback(value: str):
     return value
 
 
-def _get_current_context(context):
+def _trace_format_callback(value: str):
+    if value not in tracing.FORMATS:
+        raise typer.BadParameter(
+            f"{value} is not one of {', '.join(tracing.FORMATS)}"
+        )
+    return value
+
+
+def _severity_callback(value: str):
+    if value.upper() not in SEVERITIES:
+        raise typer.BadParameter(
+            f"{value} is not one of {', '.join(SEVERITIES)}"
+        )
+    return value.upper()
+
+
+def _columnar_callback(value: str):
+    # Checked before the scan rather than once it is done.
+    if value is not None:
+        try:
+            columnar.require()
+        except ImportError as exc:
+            raise typer.BadParameter(str(exc))
+    return value
+
+
+def _fails_at(rule, severity):
+    # A check that timed out or was skipped may hide a failure, it fails
+    # the gate too.
+    return rule.result.status is not True and SEVERITIES.index(
+        rule.severity
+    ) >= SEVERITIES.index(severity)
+
+
+def _get_current_context(context, kubeconfig=None):
     if context:
         return context
-    _, active_context = kubernetes.config.list_kube_config_contexts()
+    _, active_context = kubernetes.config.list_kube_config_contexts(
+        config_file=kubeconfig
+    )
     return active_context["name"]
 
 
@@ -83,11 +136,11 @@ def _add_tls_verify():
     with open(tmp_config, "w") as fd:
         yaml.dump(kubeconfig, fd, default_flow_style=False)
 
-    kubernetes.config.load_kube_config(tmp_config)
+    kubernetes.config.load_kube_config(config_file=tmp_config)
     os.remove(tmp_config)
 
 
-def _export_json(rules: list, json_path=str):
+def _export_json(rules: list, json_path=str, profile=None):
     def ndd():
         return defaultdict(ndd)
 
@@ -101,170 +154,149 @@ def _export_json(rules: list, json_path=str):
             "namespace": rule.result.namespace,
             "resolution": rule.url,
         }
+        if rule.result.incomplete:
+            result["reason"] = rule.result.reason
         json_blob[rule._type][rule.pillar][rule.section][rule.message] = result
+    if profile is not None:
+        json_blob["profile"] = profile
     with open(json_path, "w", encoding="utf-8") as f:
         json.dump(json_blob, f, ensure_ascii=False, indent=4)
 
-def _export_csv(rules: list, csv_path=str):
-    csv_data = []
 
-    for rule in rules:
-        csv_row = {
-           "Type": rule._type,
-            "Pillar": rule.pillar,
-            "Section": rule.section,
-            "Message": rule.message,
-            "Status": rule.result.status,
-            "Resources": ', '.join(rule.result.resources) if rule.result.resources else '',
-            "Resource Type": rule.result.resource_type,
-            "Namespace": rule.result.namespace,
-            "Resolution": rule.url,
-        }
-        csv_data.append(csv_row)
+def _export_csv(rules: list, csv_path=str):
+    with pipeline.CSVSink(csv_path) as sink:
+        for rule in rules:
+            sink.write(rule)
 
-    with open(csv_path, "w", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=csv_data[0].keys())
-        writer.writeheader()
-        writer.writerows(csv_data)
 
-def _export_security_hub(rules: list,region,context):
+def _security_hub_sync(region, state=None, concurrency=None, aggregate=False):
     """
-    Export failed checks to AWS Security Hub as custom findings
+    Connect to AWS Security Hub
+
+    Returns:
+        SecurityHubSync: None when Security Hub can't be reached
     """
     try:
-        security_hub = boto3.client('securityhub', region_name=region)
-        account_id = boto3.client('sts').get_caller_identity()['Account']
-        
-        findings = []
-        current_time = datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')
-        
-        for rule in rules:
-            if not rule.result.status:  # Only process failed checks
-                # Process each failed resource as a separate finding
-                resources = rule.result.resources if rule.result.resources else ['NoSpecificResource']
-                
-                for resource in resources:
-                    finding = {
-                        'SchemaVersion': '2018-10-08',
-                        'Id': f"hardeneks/{rule.pillar}/{rule.section}/{hashlib.md5(resource.encode()).hexdigest()}",
-                        'ProductArn': f"arn:aws:securityhub:{region}:{account_id}:product/{account_id}/default",
-                        'GeneratorId': f"hardeneks/{rule.pillar}/{rule.section}",
-                        'AwsAccountId': account_id,
-                        'Types': [
-                            'Software and Configuration Checks/AWS Security Best Practices'
-                        ],
-                        'CreatedAt': current_time,
-                        'UpdatedAt': current_time,
-                        'Severity': {
-                            'Label': 'HIGH'
-                        },
-                        'Title': rule.message,
-                        'Description': f"HardenEKS check failed: {rule.message}",
-                        'Resources': [{
-                            'Type': f'EKS {rule.result.resource_type}',
-                            'Id': context,
-                            'Partition': 'aws',
-                            'Region': region
-                        }],
-                        'Compliance': {
-                            'Status': 'FAILED'
-                        },
-                        'RecordState': 'ACTIVE',
-                        'Workflow': {
-                            'Status': 'NEW'
-                        },
-                        'ProductFields': {
-                            'Provider': 'HardenEKS',
-                            'Pillar': rule.pillar,
-                            'Section': rule.section
-                        }
-                    }
-                    
-                    # Add namespace information if available
-                    if rule.result.namespace:
-                        finding['ProductFields']['Namespace'] = rule.result.namespace
-                        
-                    # Add remediation URL if available
-                    if rule.url:
-                        finding['Remediation'] = {
-                            'Recommendation': {
-                                'Text': 'For remediation steps, see the Amazon EKS Best Practices documentation',
-                                'Url': rule.url
-                            }
-                        }
-                        
-                    findings.append(finding)
-                    
-                    # Security Hub has a batch limit of 100 findings
-                    if len(findings) >= 100:
-                        try:
-                            response = security_hub.batch_import_findings(Findings=findings)
-                            _process_security_hub_response(response)
-                            findings = []
-                        except Exception as e:
-                            console.print(f"[red]Error sending batch to Security Hub: {str(e)}[/red]")
-        
-        # Send any remaining findings
-        if findings:
-            try:
-                response = security_hub.batch_import_findings(Findings=findings)
-                _process_security_hub_response(response)
-            except Exception as e:
-                console.print(f"[red]Error sending final batch to Security Hub: {str(e)}[/red]")
-                
-        console.print("[green]Successfully exported failed checks to Security Hub[/green]")
-        
+        client = throttle.install_boto3(
+            boto3.client("securityhub", region_name=region)
+        )
+        account_id = boto3.client("sts").get_caller_identity()["Account"]
     except Exception as e:
         console.print(f"[red]Error connecting to Security Hub: {str(e)}[/red]")
-
-def _process_security_hub_response(response):
+        return None
+    return security_hub.SecurityHubSync(
+        client, account_id, state, concurrency, aggregate
+    )
+
+
+def _print_security_hub(counts):
+    for _id, code, message in counts["failed"]:
+        console.print(
+            f"[yellow]Warning: Failed to import finding: {_id}, "
+            f"Error: {code} - {message}[/yellow]"
+        )
+    console.print(
+        f"[green]Security Hub: {counts['imported']} findings imported, "
+        f"{counts['archived']} archived, {counts['unchanged']} unchanged"
+        "[/green]"
+    )
+
+
+def _export_security_hub(rules: list, region, context, cluster=None):
     """
-    Process the response from Security Hub batch import
+    Export failed checks to AWS Security Hub as custom findings
     """
-    if response['FailedCount'] > 0:
-        for failure in response['FailedFindings']:
-            console.print(
-                f"[yellow]Warning: Failed to import finding: {failure['Id']}, "
-                f"Error: {failure['ErrorCode']} - {failure['ErrorMessage']}[/yellow]"
+    sync = _security_hub_sync(region)
+    if sync is None:
+        return
+    try:
+        counts = sync.sync(rules, region, context, cluster)
+    except Exception as e:
+        console.print(f"[red]Error exporting to Security Hub: {str(e)}[/red]")
+        return
+    _print_security_hub(counts)
+
+
+def _close_exports(exports, complete=True):
+    if exports is None or exports.closed:
+        return
+    for name, exc in exports.close(complete).items():
+        console.print(f"[red]Error in the {name} export: {exc}[/red]")
+    hub = exports.sinks.get("security_hub")
+    if hub is not None and hub.counts is not None:
+        _print_security_hub(hub.counts)
+
+
+def print_consolidated_results(rules: list, output=None):
+    report.print_results(output or report.Report(console), rules)
+
+
+def print_profile(profile: dict):
+    table = Table()
+    table.add_column("Step")
+    for column in [
+        "Calls",
+        "Wall (s)",
+        "CPU (s)",
+        "K8s calls",
+        "AWS calls",
+        "KiB received",
+        "Objects",
+    ]:
+        table.add_column(column, justify="right")
+    for name, step in profile.items():
+        table.add_row(
+            name,
+            str(step["calls"]),
+            f"{step['wall_seconds']:.3f}",
+            f"{step['cpu_seconds']:.3f}",
+            str(step["kubernetes_calls"]),
+            str(step["aws_calls"]),
+            f"{step['bytes_received'] / 1024:.1f}",
+            str(step["objects_deserialized"]),
+        )
+    console.print(Panel(table, title="[cyan][bold]Profile"))
+
+
+def print_memory_profile(phases: dict):
+    table = Table()
+    table.add_column("Phase")
+    for column in ["Traced (MiB)", "Traced peak (MiB)", "Peak RSS (MiB)"]:
+        table.add_column(column, justify="right")
+    sites = Table()
+    sites.add_column("Phase")
+    sites.add_column("Allocation site")
+    sites.add_column("KiB", justify="right")
+    sites.add_column("Blocks", justify="right")
+    for name, phase in phases.items():
+        table.add_row(
+            name,
+            f"{phase['traced_kib'] / 1024:.1f}",
+            f"{phase['traced_peak_kib'] / 1024:.1f}",
+            f"{phase['peak_rss_kib'] / 1024:.1f}",
+        )
+        for site in phase["top"]:
+            sites.add_row(
+                name,
+                site["site"],
+                f"{site['size_kib']:+.1f}",
+                f"{site['blocks']:+d}",
             )
+    console.print(Panel(table, title="[cyan][bold]Memory"))
+    console.print(Panel(sites, title="[cyan][bold]Top allocations"))
 
 
-def print_consolidated_results(rules: list):
-
-    pillars = set([i.pillar for i in rules])
-
-    for pillar in pillars:
-        table = Table()
-        table.add_column("Section")
-        table.add_column("Namespace")
-        table.add_column("Rule")
-        table.add_column("Resource")
-        table.add_column("Resource Type")
-        table.add_column("Resolution")
-        filtered_rules = [i for i in rules if i.pillar == pillar]
-        for rule in filtered_rules:
-            color = "red"
-            namespace = "Cluster Wide"
-            if rule.result.status:
-                color = "green"
-            if rule.result.namespace:
-                namespace = rule.result.namespace
-            for resource in rule.result.resources:
-                table.add_row(
-                    rule.section,
-                    namespace,
-                    rule.message,
-                    resource,
-                    rule.result.resource_type,
-                    f"[link={rule.url}]Link[/link]",
-                    style=color,
-                )
-        console.print(Panel(table, title=f"[cyan][bold]{pillar} rules"))
-        console.print()
+def print_throttle_summary():
+    for path, (throttles, backoff) in throttle.summary().items():
+        console.print(
+            f"{path}: {throttles} throttled requests, "
+            f"{backoff:.1f}s spent backing off"
+        )
 
 
-@app.command()
+@app.callback(invoke_without_command=True)
 def run_hardeneks(
+    ctx: typer.Context,
     region: str = typer.Option(
         default=None, help="AWS region of the cluster. Ex: us-east-1"
     ),
@@ -297,15 +329,172 @@ def run_hardeneks(
     export_json: str = typer.Option(
         default=None, help="Export the report in json format"
     ),
+    export_ndjson: str = typer.Option(
+        default=None,
+        help="Stream one JSON object per finding to this file as rules "
+        "finish, - for stdout.",
+    ),
+    export_parquet: str = typer.Option(
+        default=None,
+        callback=_columnar_callback,
+        help="Export the findings as a Parquet table (requires pyarrow).",
+    ),
+    export_arrow: str = typer.Option(
+        default=None,
+        callback=_columnar_callback,
+        help="Export the findings as an Arrow IPC file (requires pyarrow).",
+    ),
+    export_html_report: str = typer.Option(
+        default=None,
+        help="Export the findings as a standalone HTML page with filters, "
+        "for large scans.",
+    ),
+    export_openmetrics: str = typer.Option(
+        default=None,
+        help="Export findings and scan metrics in OpenMetrics text format, "
+        "for the node exporter textfile collector",
+    ),
+    baseline: str = typer.Option(
+        default=None,
+        help="NDJSON export of a previous run: only new and resolved "
+        "failures are printed. Exports, Security Hub included, still get "
+        "every result, see --security-hub-state.",
+    ),
+    store: str = typer.Option(
+        default=None,
+        callback=_store_callback,
+        help="Record every run's findings in this SQLite database, "
+        "sqlite:///path, queried with `hardeneks history`.",
+    ),
     export_security_hub: bool = typer.Option(
         False,
         "--export-security-hub",
         help="Export failed checks to AWS Security Hub (Security Hub must be enabled and have securityhub:GetFindings, securityhub:BatchImportFindings IAM permission)",
     ),
+    security_hub_state: str = typer.Option(
+        default=None,
+        help="JSON file of the findings already in Security Hub: only new "
+        "or changed findings are imported and passing ones archived.",
+    ),
+    security_hub_aggregate: bool = typer.Option(
+        False,
+        "--security-hub-aggregate",
+        help="Import one finding per rule and namespace listing its "
+        "failing resources, instead of one per resource.",
+    ),
+    security_hub_concurrency: int = typer.Option(
+        default=security_hub.CONCURRENCY,
+        min=1,
+        help="Security Hub import calls in flight.",
+    ),
     insecure_skip_tls_verify: bool = typer.Option(
         False,
         "--insecure-skip-tls-verify",
     ),
+    kubeconfig: str = typer.Option(
+        default=None,
+        help="Path to the kubeconfig. Default is ~/.kube/config.",
+    ),
+    workers: int = typer.Option(
+        default=1,
+        min=1,
+        help="Number of processes evaluating namespace based rules.",
+    ),
+    async_collection: bool = typer.Option(
+        False,
+        "--async-collection",
+        help="Collect resources concurrently with kubernetes_asyncio.",
+    ),
+    concurrency: int = typer.Option(
+        default=100,
+        min=1,
+        help="Maximum in-flight requests with --async-collection.",
+    ),
+    qps: float = typer.Option(
+        default=50.0,
+        min=1.0,
+        help="Initial Kubernetes API request rate, adapted on throttling.",
+    ),
+    request_timeout: float = typer.Option(
+        default=60.0,
+        min=1.0,
+        help="Timeout of each Kubernetes and AWS request, in seconds.",
+    ),
+    rule_timeout: float = typer.Option(
+        default=None,
+        min=1.0,
+        help="Time budget of each rule, in seconds.",
+    ),
+    scan_timeout: float = typer.Option(
+        default=None,
+        min=1.0,
+        help="Time budget of the whole scan, in seconds.",
+    ),
+    rule_workers: int = typer.Option(
+        default=1,
+        min=1,
+        help="Number of rules checked concurrently.",
+    ),
+    cost_model: str = typer.Option(
+        default=None,
+        help="JSON file of rule costs learned from previous runs.",
+    ),
+    fail_fast: bool = typer.Option(
+        False,
+        "--fail-fast",
+        help="Stop at the first failure or incomplete check at or above "
+        "--fail-severity, skip the report and exit with code 1.",
+    ),
+    fail_severity: str = typer.Option(
+        default="LOW",
+        callback=_severity_callback,
+        help="Lowest failing severity for --fail-fast: "
+        f"{', '.join(SEVERITIES)}",
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Print time, API calls, bytes and objects per rule and "
+        "collection step, and add them to the JSON export.",
+    ),
+    memory_profile: bool = typer.Option(
+        False,
+        "--memory-profile",
+        help="Print traced memory, peak RSS and the top allocation sites "
+        "of each phase.",
+    ),
+    trace: str = typer.Option(
+        default=None,
+        help="Write a timeline of the scan to this file, viewable in "
+        "Perfetto or chrome://tracing.",
+    ),
+    trace_format: str = typer.Option(
+        default="chrome",
+        callback=_trace_format_callback,
+        help="Format of --trace: chrome (trace events) or otlp (OTLP/JSON).",
+    ),
+    interval: float = typer.Option(
+        default=None,
+        min=1,
+        help="Run as a daemon, scanning every INTERVAL seconds.",
+    ),
+    metrics_port: int = typer.Option(
+        default=None,
+        help="Serve the metrics of the last scan on /metrics at this port "
+        "(requires --interval).",
+    ),
+    summary: bool = typer.Option(
+        False,
+        "--summary",
+        help="Print counts per pillar, section, rule and namespace instead "
+        "of one row per resource, which only goes to the txt/html exports.",
+    ),
+    top: int = typer.Option(
+        default=None,
+        min=1,
+        help=f"Rules and namespaces in the summary (implies --summary, "
+        f"default {report.TOP}).",
+    ),
     width: int = typer.Option(
         default=None, help="Width of the console (defaults to terminal width)"
     ),
@@ -327,8 +516,37 @@ def run_hardeneks(
         export-csv (str): Export the report in csv format
         export-html (str): Export the report in html format
         export-json (str): Export the report in json format
+        export-ndjson (str): Stream findings as newline delimited JSON
+        export-parquet (str): Export the findings in Parquet format
+        export-arrow (str): Export the findings in Arrow IPC format
+        export-openmetrics (str): Export metrics in OpenMetrics format
+        baseline (str): NDJSON export of a previous run to diff with
+        store (str): sqlite:///path of the findings history
         export-security-hub (str): Export the report to AWS Security Hub
+        security-hub-state (str): Path of the Security Hub sync state
+        security-hub-aggregate (bool): One finding per rule and namespace
+        security-hub-concurrency (int): Security Hub calls in flight
         insecure-skip-tls-verify (str): Skip tls verification
+        kubeconfig (str): Path to the kubeconfig
+        workers (int): Number of processes for namespace based rules
+        async-collection (bool): Collect resources with asyncio
+        concurrency (int): Maximum in-flight requests of async collection
+        qps (float): Initial Kubernetes API request rate
+        request-timeout (float): Timeout of each API request
+        rule-timeout (float): Time budget of each rule
+        scan-timeout (float): Time budget of the whole scan
+        rule-workers (int): Number of rules checked concurrently
+        cost-model (str): Path to the learned rule cost model
+        fail-fast (bool): Exit 1 at the first qualifying failure
+        fail-severity (str): Lowest severity that fails --fail-fast
+        profile (bool): Report per step instrumentation
+        memory-profile (bool): Report memory per phase
+        trace (str): Path of the scan timeline
+        trace-format (str): chrome or otlp
+        interval (float): Seconds between scans in daemon mode
+        metrics-port (int): Port of the /metrics endpoint
+        summary (bool): Print aggregates instead of every resource
+        top (int): Rules and namespaces in the summary
         width (int): Output width
         height (int): Output height
 
@@ -336,18 +554,34 @@ def run_hardeneks(
         None
 
     """
+    if ctx.invoked_subcommand is not None:
+        return
+    if fail_fast and interval:
+        raise typer.BadParameter("--fail-fast can't be used with --interval")
+    if metrics_port is not None and not interval:
+        raise typer.BadParameter("--metrics-port requires --interval")
+
+    helpers.kube_config_path = kubeconfig
     if insecure_skip_tls_verify:
         _add_tls_verify()
     else:
-        # should pass in config file
-        kubernetes.config.load_kube_config(context=context)
+        kubernetes.config.load_kube_config(
+            config_file=kubeconfig, context=context
+        )
+
+    throttle.install_kubernetes(request_timeout)
+    throttle.kubernetes_limiter.configure(qps)
 
+    if export_ndjson == "-":
+        # Findings own stdout.
+        console.stderr = True
+        harden_console.stderr = True
     if width:
         console.width = width
     if height:
         console.height = height
 
-    context = _get_current_context(context)
+    context = _get_current_context(context, kubeconfig)
 
     if not cluster:
         cluster = _get_cluster_name(context, region)
@@ -365,38 +599,231 @@ def run_hardeneks(
     with open(config, "r") as f:
         config = yaml.safe_load(f)
 
-    if not namespace:
-        namespaces = _get_namespaces(config["ignore-namespaces"])
-    else:
-        namespaces = [namespace]
-
     rules = config["rules"]
 
-    resources = Resources(region, context, cluster, namespaces)
-    resources.set_resources()
-
-    results = []
-
-    if "cluster_wide" in rules:
-        cluster_wide_results = harden(resources, rules, "cluster_wide")
-        results = results + cluster_wide_results
-
-    if "namespace_based" in rules:
-        for ns in namespaces:
-            resources = NamespacedResources(region, context, cluster, ns)
-            resources.set_resources()
-            namespace_based_results = harden(resources, rules, "namespace_based")
-            results = results + namespace_based_results
-
-    print_consolidated_results(results)
-
-    if export_txt:
-        console.save_text(export_txt)
-    if export_csv:
-        _export_csv(results, export_csv)
-    if export_html:
-        console.save_html(export_html)
-    if export_json:
-        _export_json(results, export_json)
-    if export_security_hub:
-        _export_security_hub(results,region,context)
+    costs = None
+    if cost_model:
+        costs = CostModel(cost_model)
+
+    tracing.tracer.enabled = bool(trace)
+    if memory_profile:
+        memory.tracker.start()
+
+    if store:
+        store = Store(store)
+
+    hub = None
+    server = None
+    if metrics_port is not None:
+        server = metrics.MetricsServer(metrics_port)
+        console.print(f"Serving metrics on :{server.port}/metrics")
+
+    while True:
+        started = time.monotonic()
+        started_at = time.time()
+        # Drop what the previous cycle recorded in daemon mode.
+        profiling.profile.drain()
+        tracing.tracer.drain()
+        memory.tracker.drain()
+
+        deadline = None
+        if scan_timeout:
+            deadline = started + scan_timeout
+
+        if not namespace:
+            namespaces = _get_namespaces(config["ignore-namespaces"])
+        else:
+            namespaces = [namespace]
+
+        stop = threading.Event() if fail_fast else None
+        failures = []
+
+        # Loaded every cycle, before --export-ndjson may overwrite it, so
+        # that the daemon mode can diff each scan with the previous one.
+        index = None
+        if baseline:
+            if os.path.exists(baseline):
+                index = baselines.load(baseline)
+            else:
+                console.print(
+                    f"[yellow]{baseline} doesn't exist, "
+                    "every failure is new"
+                )
+                index = set()
+
+        # Streamed exports run in their own threads as the results come.
+        sinks = {}
+        if export_ndjson:
+            sinks["ndjson"] = findings.NDJSONWriter(export_ndjson, cluster)
+        if export_csv:
+            sinks["csv"] = pipeline.CSVSink(export_csv)
+        if store:
+            sinks["store"] = pipeline.StoreSink(store, cluster, started_at)
+        if export_security_hub:
+            if hub is None:
+                hub = _security_hub_sync(
+                    region,
+                    security_hub_state,
+                    security_hub_concurrency,
+                    security_hub_aggregate,
+                )
+            if hub is not None:
+                sinks["security_hub"] = pipeline.SecurityHubSink(
+                    hub, region, context, cluster
+                )
+        exports = pipeline.Pipeline(sinks) if sinks else None
+
+        def on_result(rule):
+            if exports is not None:
+                exports.put(rule)
+            if fail_fast and _fails_at(rule, fail_severity):
+                failures.append(rule)
+                stop.set()
+
+        scan = Scan(
+            region,
+            context,
+            cluster,
+            namespaces,
+            rules,
+            workers=workers,
+            rule_workers=rule_workers,
+            async_collection=async_collection,
+            concurrency=concurrency,
+            rule_timeout=rule_timeout,
+            deadline=deadline,
+            costs=costs,
+            expensive_first=not fail_fast,
+            on_result=on_result if fail_fast or exports else None,
+            stop=stop,
+        )
+        complete = False
+        try:
+            results = scan.run()
+
+            if costs is not None:
+                costs.save()
+
+            if failures:
+                rule = failures[0]
+                what = "failure"
+                where = rule.result.namespace or "Cluster Wide"
+                if rule.result.incomplete:
+                    what = "check incomplete"
+                    where = f"{where}, {rule.result.reason}"
+                console.print(
+                    f"[bold red]{rule.severity} {what} in {rule.pillar}/"
+                    f"{rule.section}: {rule.message} ({where})"
+                )
+                _close_exports(exports, complete=False)
+                if trace:
+                    tracing.tracer.save(trace, trace_format)
+                raise typer.Exit(code=1)
+            # The streamed exports got every result, they are closed as a
+            # complete run even if the report or other exports fail.
+            complete = True
+
+            aggregates = metrics.Aggregates(results)
+            # With a baseline, the report only gets the new failures, the
+            # exports still get every result.
+            changes = None
+            shown = results
+            if index is not None:
+                changes = baselines.diff(index, results, cluster)
+                shown = changes.new
+            # The txt and html exports are written as the report is
+            # printed.
+            if summary or top:
+                with tracing.span("report", "export"):
+                    output = report.Report(console)
+                    if changes is not None:
+                        report.print_changes(output, changes)
+                        aggregates_shown = metrics.Aggregates(shown)
+                    else:
+                        aggregates_shown = aggregates
+                    report.print_summary(
+                        output, aggregates_shown, top or report.TOP
+                    )
+                    if export_txt or export_html:
+                        with report.Report(
+                            text=export_txt,
+                            html=export_html,
+                            width=console.width,
+                        ) as output:
+                            print_consolidated_results(shown, output)
+            else:
+                with tracing.span("report", "export"), report.Report(
+                    console, export_txt, export_html
+                ) as output:
+                    if fail_fast:
+                        output.print(
+                            "[green]No failures at or above "
+                            f"{fail_severity} severity"
+                        )
+                    else:
+                        if changes is not None:
+                            report.print_changes(output, changes)
+                        print_consolidated_results(shown, output)
+            memory.checkpoint("render")
+
+            if export_json:
+                with tracing.span("json", "export"):
+                    _export_json(
+                        results,
+                        export_json,
+                        profiling.profile.to_dict() if profile else None,
+                    )
+            if export_parquet or export_arrow:
+                with tracing.span("columnar", "export"):
+                    findings_table = columnar.table(results, cluster)
+                    if export_parquet:
+                        columnar.write(
+                            findings_table, export_parquet, "parquet"
+                        )
+                    if export_arrow:
+                        columnar.write(
+                            findings_table, export_arrow, "arrow"
+                        )
+            if export_html_report:
+                with tracing.span("html_report", "export"):
+                    html_report.write(
+                        export_html_report, results, cluster, aggregates
+                    )
+        finally:
+            # Waits for the streamed exports, busy since the first result.
+            # A scan that failed or stopped early is not recorded as a
+            # complete run.
+            _close_exports(exports, complete)
+        memory.checkpoint("export")
+        if trace:
+            tracing.tracer.save(trace, trace_format)
+
+        if profile:
+            print_profile(profiling.profile.to_dict())
+        if memory_profile:
+            print_memory_profile(memory.tracker.to_dict())
+        print_throttle_summary()
+
+        incomplete = len([i for i in results if i.result.incomplete])
+        if incomplete:
+            console.print(
+                f"[yellow]{incomplete} rule checks timed out or were skipped"
+            )
+
+        if export_openmetrics or server is not None:
+            text = metrics.openmetrics(
+                aggregates,
+                cluster,
+                time.monotonic() - started,
+                profiling.profile.to_dict(),
+                throttle.summary(),
+                time.time(),
+            )
+            if export_openmetrics:
+                metrics.write_textfile(export_openmetrics, text)
+            if server is not None:
+                server.update(text)
+
+        if not interval:
+            break
+        time.sleep(max(0.0, started + interval - time.monotonic()))
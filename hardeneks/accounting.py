@@ -0,0 +1,78 @@
+from contextlib import contextmanager
+import contextvars
+import time
+
+
+class Usage:
+    """
+    Resources used by one unit of work, such as a rule check or the
+    collection of one kind of Kubernetes resource.
+    """
+
+    def __init__(self):
+        self.kubernetes_calls = 0
+        self.aws_calls = 0
+        self.bytes_received = 0
+        self.objects_deserialized = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+
+    @property
+    def api_calls(self):
+        return self.kubernetes_calls + self.aws_calls
+
+
+_usage = contextvars.ContextVar("hardeneks_usage", default=None)
+
+
+@contextmanager
+def track(cpu=True):
+    """
+    Attribute API calls made in this context (and threads started with a
+    copy of it) to a fresh Usage.
+
+    CPU time is the time of the calling thread. Threads started with a
+    copy of the context add theirs with `record_cpu`. Coroutines sharing
+    a thread can't be told apart, they are tracked with `cpu=False`.
+    """
+    usage = Usage()
+    token = _usage.set(usage)
+    start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield usage
+    finally:
+        usage.wall_seconds += time.perf_counter() - start
+        if cpu:
+            usage.cpu_seconds += time.thread_time() - cpu_start
+        _usage.reset(token)
+
+
+def record_kubernetes_call():
+    usage = _usage.get()
+    if usage is not None:
+        usage.kubernetes_calls += 1
+
+
+def record_aws_call():
+    usage = _usage.get()
+    if usage is not None:
+        usage.aws_calls += 1
+
+
+def record_bytes(count):
+    usage = _usage.get()
+    if usage is not None:
+        usage.bytes_received += count
+
+
+def record_objects(count):
+    usage = _usage.get()
+    if usage is not None:
+        usage.objects_deserialized += count
+
+
+def record_cpu(seconds):
+    usage = _usage.get()
+    if usage is not None:
+        usage.cpu_seconds += seconds
@@ -0,0 +1,161 @@
+import asyncio
+
+import kubernetes
+from kubernetes.client.exceptions import ApiException
+
+from . import accounting, profiling, throttle
+from .resources import (
+    CLUSTER_RESOURCES,
+    NAMESPACED_RESOURCES,
+    NamespacedResources,
+)
+
+try:
+    from kubernetes_asyncio import client as aio_client
+except ImportError:  # pragma: no cover
+    aio_client = None
+
+
+def _get_configuration(concurrency):
+    # Reuse whatever the synchronous client already loaded from the
+    # kubeconfig (exec credentials, certificates, tls verification) so
+    # both engines talk to the cluster with the same identity.
+    sync = kubernetes.client.Configuration.get_default_copy()
+    configuration = aio_client.Configuration(host=sync.host)
+    configuration.api_key = dict(sync.api_key)
+    configuration.api_key_prefix = dict(sync.api_key_prefix)
+    configuration.ssl_ca_cert = sync.ssl_ca_cert
+    configuration.cert_file = sync.cert_file
+    configuration.key_file = sync.key_file
+    configuration.verify_ssl = sync.verify_ssl
+    configuration.proxy = sync.proxy
+    configuration.connection_pool_maxsize = concurrency
+    return configuration
+
+
+async def _request(semaphore, api_client, api, method, *args):
+    async with semaphore:
+        await asyncio.sleep(throttle.kubernetes_limiter.reserve())
+        accounting.record_kubernetes_call()
+        response = await getattr(getattr(aio_client, api)(api_client), method)(
+            *args,
+            _preload_content=False,
+            _request_timeout=throttle.request_timeout,
+        )
+        data = await response.read()
+    accounting.record_bytes(len(data))
+    if not 200 <= response.status <= 299:
+        exc = ApiException(status=response.status, reason=response.reason)
+        exc.headers = response.headers
+        raise exc
+    return data.decode("utf-8")
+
+
+async def _list(semaphore, api_client, api, method, *args):
+    attempt = 0
+    while True:
+        try:
+            data = await _request(semaphore, api_client, api, method, *args)
+        except ApiException as exc:
+            hint = throttle.retry_after(exc)
+            attempt += 1
+            if hint is None or attempt >= throttle.MAX_ATTEMPTS:
+                raise
+            delay = throttle.backoff(attempt, hint or None)
+            throttle.kubernetes_limiter.on_throttle(delay)
+            await asyncio.sleep(delay)
+            continue
+        throttle.kubernetes_limiter.on_success()
+        return data
+
+
+async def _profiled_list(name, semaphore, api_client, api, method, *args):
+    # Each coroutine runs in a task of its own, so the tracked usage is
+    # not shared. The thread is, which makes CPU time meaningless here.
+    attributes = {"namespace": args[0]} if args else {}
+    with profiling.step(name, coroutine=True, **attributes):
+        return await _list(semaphore, api_client, api, method, *args)
+
+
+async def _collect_specs(semaphore, api_client, _type, specs, *args):
+    attrs = list(specs)
+    bodies = await asyncio.gather(
+        *[
+            _profiled_list(
+                profiling.collect_step(_type, attr),
+                semaphore,
+                api_client,
+                specs[attr][0],
+                specs[attr][1],
+                *args,
+            )
+            for attr in attrs
+        ]
+    )
+    return dict(zip(attrs, bodies))
+
+
+async def _collect(namespaces, concurrency, cluster_wide):
+    semaphore = asyncio.Semaphore(concurrency)
+    async with aio_client.ApiClient(
+        _get_configuration(concurrency)
+    ) as api_client:
+        tasks = [
+            _collect_specs(
+                semaphore,
+                api_client,
+                "namespace_based",
+                NAMESPACED_RESOURCES,
+                ns,
+            )
+            for ns in namespaces
+        ]
+        if cluster_wide:
+            tasks.append(
+                _collect_specs(
+                    semaphore, api_client, "cluster_wide", CLUSTER_RESOURCES
+                )
+            )
+        raw = await asyncio.gather(*tasks)
+
+    namespaced = dict(zip(namespaces, raw))
+    return (raw[-1] if cluster_wide else None), namespaced
+
+
+def collect_raw(namespaces, concurrency, cluster_wide=True):
+    """
+    Issue every LIST call of a scan concurrently on an asyncio loop.
+
+    Requires the optional `kubernetes_asyncio` package. The kube config
+    has to be loaded into the synchronous client beforehand.
+
+    Args:
+        namespaces (list): Namespaces to collect
+        concurrency (int): Maximum number of in-flight requests
+        cluster_wide (bool): Also collect cluster wide resources
+
+    Returns:
+        tuple: raw cluster wide resources (or None) and a dict of
+            namespace -> raw namespaced resources
+
+    """
+    if aio_client is None:
+        raise ImportError(
+            "The async engine requires kubernetes_asyncio. "
+            "Install it with `pip install hardeneks[async]`."
+        )
+    return asyncio.run(_collect(namespaces, concurrency, cluster_wide))
+
+
+def namespaced_resources(region, context, cluster, namespaced_raw):
+    """
+    Build NamespacedResources from the output of `collect_raw`.
+
+    Yields:
+        NamespacedResources: one per namespace
+
+    """
+    for ns, raw in namespaced_raw.items():
+        resources = NamespacedResources(region, context, cluster, ns)
+        resources.set_raw_resources(raw)
+        yield resources
@@ -0,0 +1,230 @@
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+import threading
+
+import boto3
+from botocore.config import Config
+
+from . import profiling, throttle
+
+# AWS datasets read by each cluster wide rule. Used to prefetch
+# everything the enabled rules need before they are evaluated.
+RULE_DATASETS = {
+    "check_endpoint_public_access": ["cluster"],
+    "check_aws_node_daemonset_service_account": ["pod_identity_associations"],
+    "check_access_to_instance_profile": ["instances"],
+    "check_logs_are_enabled": ["cluster"],
+    "check_vpc_flow_logs": ["cluster", "flow_logs"],
+    "deploy_workers_onto_private_subnets": ["instances"],
+    "make_sure_inspector_is_enabled": ["inspector_status"],
+    "use_immutable_tags_with_ecr": ["repositories"],
+    "ensure_cluster_autoscaler_and_cluster_versions_match": ["cluster"],
+    "use_separate_iam_role_for_cluster_autoscaler": [
+        "pod_identity_associations"
+    ],
+    "employ_least_privileged_access_cluster_autoscaler_role": [
+        "pod_identity_associations"
+    ],
+    "check_EKS_version": ["cluster", "cluster_versions"],
+}
+
+
+def datasets_for(rules):
+    """
+    List the AWS datasets needed by the enabled cluster wide rules.
+
+    Args:
+        rules (dict): `cluster_wide` section of the hardeneks config
+
+    Returns:
+        list: dataset names, without duplicates
+
+    """
+    datasets = []
+    for pillar in rules.values():
+        for section in pillar.values():
+            for rule in section:
+                for dataset in RULE_DATASETS.get(rule, []):
+                    if dataset not in datasets:
+                        datasets.append(dataset)
+    return datasets
+
+
+class AWSData:
+    """
+    AWS lookups of a scan.
+
+    Rules read datasets through `get`. Datasets loaded by `prefetch` are
+    served from memory, anything else is fetched on demand.
+    """
+
+    def __init__(self, region, cluster):
+        self.region = region
+        self.cluster = cluster
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._prefetched = {}
+
+    def client(self, service):
+        # boto3's default session is not safe to initialise from several
+        # threads at once, clients themselves are.
+        with self._lock:
+            if service not in self._clients:
+                self._clients[service] = throttle.install_boto3(
+                    boto3.client(
+                        service,
+                        region_name=self.region,
+                        config=Config(
+                            connect_timeout=throttle.request_timeout or 60,
+                            read_timeout=throttle.request_timeout or 60,
+                        ),
+                    )
+                )
+            return self._clients[service]
+
+    def get(self, dataset, *args):
+        future = self._prefetched.get((dataset,) + args)
+        if future is not None:
+            return future.result()
+        return getattr(self, f"_load_{dataset}")(*args)
+
+    def prefetch(self, datasets, max_workers=8):
+        """
+        Load datasets in parallel and keep them for later `get` calls.
+
+        Errors are kept as well and raised by `get`, so they surface in
+        the rule that needs the dataset.
+
+        Args:
+            datasets (list): dataset names
+            max_workers (int): Maximum number of concurrent lookups
+
+        Returns:
+            None
+
+        """
+        if not datasets:
+            return
+        for dataset in datasets:
+            self._prefetched[(dataset,)] = Future()
+        # Datasets derived from others (flow logs need the cluster's VPC)
+        # are listed after them, so they never wait on an unstarted load.
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            wait(
+                [
+                    executor.submit(
+                        self._fill, self._prefetched[(dataset,)], dataset
+                    )
+                    for dataset in datasets
+                ]
+            )
+
+    def _fill(self, future, dataset):
+        try:
+            with profiling.step(profiling.collect_step("aws", dataset)):
+                future.set_result(getattr(self, f"_load_{dataset}")())
+        except Exception as exc:
+            future.set_exception(exc)
+
+    def _load_cluster(self):
+        return self.client("eks").describe_cluster(name=self.cluster)[
+            "cluster"
+        ]
+
+    def _load_cluster_versions(self):
+        return (
+            self.client("eks")
+            .describe_cluster_versions()
+            .get("clusterVersions", [])
+        )
+
+    def _load_pod_identity_associations(self):
+        return (
+            self.client("eks")
+            .list_pod_identity_associations(clusterName=self.cluster)
+            .get("associations", [])
+        )
+
+    def _load_pod_identity_association(self, association_id):
+        return (
+            self.client("eks")
+            .describe_pod_identity_association(
+                clusterName=self.cluster, associationId=association_id
+            )
+            .get("association", {})
+        )
+
+    def _load_flow_logs(self):
+        vpc_id = self.get("cluster")["resourcesVpcConfig"]["vpcId"]
+        return self.client("ec2").describe_flow_logs(
+            Filters=[{"Name": "resource-id", "Values": [vpc_id]}]
+        )["FlowLogs"]
+
+    def _load_instances(self):
+        paginator = self.client("ec2").get_paginator("describe_instances")
+        page_iterator = paginator.paginate(
+            PaginationConfig={"PageSize": 1000},
+            Filters=[
+                {
+                    "Name": "tag:aws:eks:cluster-name",
+                    "Values": [
+                        self.cluster,
+                    ],
+                },
+            ],
+        )
+        reservations = []
+        for page in page_iterator:
+            reservations.extend(page["Reservations"])
+        return reservations
+
+    def _load_repositories(self):
+        paginator = self.client("ecr").get_paginator("describe_repositories")
+        repositories = []
+        for page in paginator.paginate(PaginationConfig={"PageSize": 1000}):
+            repositories.extend(page["repositories"])
+        return repositories
+
+    def _load_account_id(self):
+        return self.client("sts").get_caller_identity()["Account"]
+
+    def _load_inspector_status(self):
+        response = self.client("inspector2").batch_get_account_status(
+            accountIds=[
+                self.get("account_id"),
+            ]
+        )
+        return response["accounts"][0]["resourceState"]
+
+    def _load_role_actions(self, role_name):
+        iam_client = self.client("iam")
+        attached_policies = iam_client.list_attached_role_policies(
+            RoleName=role_name
+        )["AttachedPolicies"]
+        inline_policies = iam_client.list_role_policies(RoleName=role_name)[
+            "PolicyNames"
+        ]
+        statements = []
+        for policy_arn in [x["PolicyArn"] for x in attached_policies]:
+            version_id = iam_client.get_policy(PolicyArn=policy_arn)["Policy"][
+                "DefaultVersionId"
+            ]
+            statements.extend(
+                iam_client.get_policy_version(
+                    PolicyArn=policy_arn, VersionId=version_id
+                )["PolicyVersion"]["Document"]["Statement"]
+            )
+        for policy_name in inline_policies:
+            statements.extend(
+                iam_client.get_role_policy(
+                    RoleName=role_name, PolicyName=policy_name
+                )["PolicyDocument"]["Statement"]
+            )
+        actions = []
+        for statement in statements:
+            if statement.get("Effect") == "Allow":
+                action = statement.get("Action")
+                if isinstance(action, str):
+                    actions.append(action)
+                elif isinstance(action, list):
+                    actions.extend(action)
+        return actions
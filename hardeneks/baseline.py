@@ -0,0 +1,110 @@
+import copy
+import json
+
+from .findings import findings
+
+
+def key(finding):
+    return (
+        finding["cluster"],
+        finding["rule"],
+        finding["namespace"],
+        finding["resource"],
+    )
+
+
+def load(path):
+    """
+    Index the failing findings of a previous `--export-ndjson` export.
+
+    Args:
+        path (str): NDJSON file
+
+    Returns:
+        set: (cluster, rule, namespace, resource) of failing findings
+
+    """
+    index = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            finding = json.loads(line)
+            if finding["status"] == "failed":
+                index.add(key(finding))
+    return index
+
+
+class Changes:
+    """
+    Failures of a scan compared with a baseline.
+
+    Attributes:
+        new (list): Failing rule results, restricted to the resources
+            the baseline did not have failing
+        resolved (list): (rule, namespace, resource) failing in the
+            baseline, checked and no longer failing
+        unchanged (int): Failing resources already in the baseline
+        unchecked (int): Baseline failures whose rule and namespace
+            were not checked by this scan, neither new nor resolved
+    """
+
+    def __init__(self, new, resolved, unchanged, unchecked):
+        self.new = new
+        self.resolved = resolved
+        self.unchanged = unchanged
+        self.unchecked = unchecked
+
+    @property
+    def new_count(self):
+        return sum(len(rule.result.resources) for rule in self.new)
+
+
+def diff(index, rules, cluster):
+    """
+    Compare the results of a scan with a baseline index.
+
+    Args:
+        index (set): Output of `load`
+        rules (list): Rule results of the scan
+        cluster (str): Cluster of the scan, other clusters of the
+            baseline are ignored
+
+    Returns:
+        Changes: New, resolved and unchanged failures
+
+    """
+    failing = set()
+    checked = set()
+    new = []
+    unchanged = 0
+    for rule in rules:
+        if rule.result.incomplete:
+            continue
+        checked.add((type(rule).__name__, rule.result.namespace))
+        if rule.result.status:
+            continue
+        resources = []
+        for finding in findings(rule, cluster):
+            failing.add(key(finding))
+            if key(finding) in index:
+                unchanged += 1
+            else:
+                resources.append(finding["resource"])
+        if resources:
+            changed = copy.copy(rule)
+            changed.result = copy.copy(rule.result)
+            changed.result.resources = resources
+            new.append(changed)
+    resolved = []
+    unchecked = 0
+    for _cluster, rule, namespace, resource in sorted(
+        index, key=lambda i: tuple(j or "" for j in i)
+    ):
+        if _cluster != cluster:
+            continue
+        if (rule, namespace) not in checked:
+            unchecked += 1
+        elif (_cluster, rule, namespace, resource) not in failing:
+            resolved.append((rule, namespace, resource))
+    return Changes(new, resolved, unchanged, unchecked)
@@ -0,0 +1,369 @@
+import json
+import os
+import threading
+from typing import List
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from .regression import TOLERANCES, best_of, compare as compare_results
+from .synthetic import SCENARIOS, SyntheticCluster
+
+app = typer.Typer(help="Benchmarks of hardeneks on synthetic clusters.")
+console = Console()
+
+
+def _scenario_callback(value: str):
+    if value not in SCENARIOS:
+        raise typer.BadParameter(
+            f"{value} is not one of {', '.join(SCENARIOS)}"
+        )
+    return value
+
+
+def print_results(results: dict):
+    for scenario, result in results.items():
+        table = Table(
+            title=f"{scenario}: {result['namespaces']} namespaces, "
+            f"{result['pods']} pods, {result['rule_checks']} rule checks"
+        )
+        table.add_column("Phase")
+        table.add_column("Wall (s)", justify="right")
+        table.add_column("CPU (s)", justify="right")
+        table.add_column("API calls", justify="right")
+        table.add_column("Peak RSS (MiB)", justify="right")
+        for name, phase in result["phases"].items():
+            table.add_row(
+                name,
+                f"{phase['seconds']:.3f}",
+                f"{phase['cpu_seconds']:.3f}",
+                str(phase["api_calls"]),
+                f"{phase['peak_rss_kib'] / 1024:.0f}",
+            )
+        console.print(table)
+
+
+METRICS = {
+    "seconds": "Wall (s)",
+    "api_calls": "API calls",
+    "peak_rss_kib": "Peak RSS",
+}
+
+
+def _format(metric, value):
+    if metric == "seconds":
+        return f"{value:.3f}"
+    if metric == "peak_rss_kib":
+        return f"{value / 1024:.0f} MiB"
+    return str(value)
+
+
+def print_comparison(deltas: list):
+    table = Table(title="Benchmark comparison")
+    table.add_column("Scenario")
+    table.add_column("Phase")
+    table.add_column("Metric")
+    table.add_column("Baseline", justify="right")
+    table.add_column("Current", justify="right")
+    table.add_column("Change", justify="right")
+    table.add_column("Status")
+    for delta in deltas:
+        if delta.baseline:
+            change = f"{(delta.current / delta.baseline - 1) * 100:+.1f}%"
+        else:
+            change = "" if delta.current == delta.baseline else "new"
+        table.add_row(
+            delta.scenario,
+            delta.phase or "-",
+            METRICS[delta.metric],
+            _format(delta.metric, delta.baseline),
+            _format(delta.metric, delta.current),
+            change,
+            "[red]REGRESSION" if delta.regression else "[green]ok",
+        )
+    console.print(table)
+
+
+@app.command()
+def generate(
+    directory: str = typer.Argument(..., help="Output directory."),
+    scenario: str = typer.Option(
+        default="small",
+        callback=_scenario_callback,
+        help=f"Scale of the cluster: {', '.join(SCENARIOS)}",
+    ),
+    namespaces: int = typer.Option(
+        default=None, min=1, help="Override the scenario's namespaces."
+    ),
+    pods: int = typer.Option(
+        default=None, min=0, help="Override the scenario's pods."
+    ),
+    seed: int = typer.Option(default=0, help="Seed of the generator."),
+):
+    """
+    Record a synthetic cluster as *_api_response.json files.
+    """
+    scale = dict(SCENARIOS[scenario])
+    if namespaces:
+        scale["namespaces"] = namespaces
+    if pods is not None:
+        scale["pods"] = pods
+    path = SyntheticCluster(seed=seed, **scale).write(directory)
+    console.print(f"Wrote {path}")
+
+
+@app.command()
+def run(
+    scenario: List[str] = typer.Option(
+        ["small"],
+        help=f"Scenarios to run, repeatable: {', '.join(SCENARIOS)}",
+    ),
+    seed: int = typer.Option(default=0, help="Seed of the generator."),
+    data: str = typer.Option(
+        default=None,
+        help="Keep recorded scenarios in this directory between runs.",
+    ),
+    output: str = typer.Option(
+        default=None, help="Write the results as JSON to this file."
+    ),
+    server: bool = typer.Option(
+        False,
+        "--server",
+        help="Collect through the Kubernetes client from a local fake API "
+        "server instead of reading the recording back.",
+    ),
+    latency: float = typer.Option(
+        default=0.0, min=0, help="Seconds added to every --server request."
+    ),
+    throttle_rate: float = typer.Option(
+        default=0.0,
+        min=0,
+        max=1,
+        help="Share of --server requests answered with 429.",
+    ),
+    async_collection: bool = typer.Option(
+        False,
+        "--async-collection",
+        help="Collect from --server with the asyncio engine.",
+    ),
+    concurrency: int = typer.Option(
+        default=100, min=1, help="In-flight requests of --async-collection."
+    ),
+    aws: bool = typer.Option(
+        False,
+        "--aws",
+        help="Also run the AWS rules and the Security Hub export against "
+        "a local AWS stand-in.",
+    ),
+    aws_latency: float = typer.Option(
+        default=0.0, min=0, help="Seconds added to every --aws request."
+    ),
+    aws_throttle_rate: float = typer.Option(
+        default=0.0,
+        min=0,
+        max=1,
+        help="Share of --aws requests answered with a throttling error.",
+    ),
+    instances: int = typer.Option(
+        default=2000, min=0, help="EC2 instances of the --aws cluster."
+    ),
+    repositories: int = typer.Option(
+        default=2000, min=0, help="ECR repositories of the --aws account."
+    ),
+    policies: int = typer.Option(
+        default=20,
+        min=0,
+        help="IAM policies attached to the --aws cluster autoscaler role.",
+    ),
+):
+    """
+    Time collection, deserialization, rules and exporters on synthetic
+    clusters.
+    """
+    # Imported here, the suite needs the exporters of the hardeneks
+    # package, which imports this module.
+    from . import suite
+
+    for name in scenario:
+        _scenario_callback(name)
+    if data:
+        os.makedirs(data, exist_ok=True)
+    kwargs = {}
+    if server:
+        kwargs = {
+            "server": {"latency": latency, "throttle_rate": throttle_rate},
+            "async_collection": async_collection,
+            "concurrency": concurrency,
+        }
+    if aws:
+        kwargs["aws"] = {
+            "latency": aws_latency,
+            "throttle_rate": aws_throttle_rate,
+            "instances": instances,
+            "repositories": repositories,
+            "policies": policies,
+        }
+    results = suite.run_scenarios(scenario, seed, data, **kwargs)
+    print_results(results)
+    if output:
+        suite.save(results, output)
+
+
+@app.command()
+def compare(
+    baseline: str = typer.Argument(
+        ..., help="Results of `bench run --output` to compare with."
+    ),
+    results: str = typer.Option(
+        default=None,
+        help="Compare these results instead of running the scenarios.",
+    ),
+    repeat: int = typer.Option(
+        default=3,
+        min=1,
+        help="Run the scenarios this many times and keep the best times.",
+    ),
+    data: str = typer.Option(
+        default=None,
+        help="Keep recorded scenarios in this directory between runs.",
+    ),
+    time_tolerance: float = typer.Option(
+        default=TOLERANCES["seconds"],
+        min=0,
+        help="Tolerated relative increase of a phase's wall time.",
+    ),
+    rss_tolerance: float = typer.Option(
+        default=TOLERANCES["peak_rss_kib"],
+        min=0,
+        help="Tolerated relative increase of the peak RSS.",
+    ),
+    api_calls_tolerance: float = typer.Option(
+        default=TOLERANCES["api_calls"],
+        min=0,
+        help="Tolerated relative increase of a phase's API calls.",
+    ),
+    output: str = typer.Option(
+        default=None, help="Write the current results as JSON to this file."
+    ),
+):
+    """
+    Run the scenarios of a baseline again and fail on regressions.
+    """
+    from . import suite
+
+    with open(baseline, encoding="utf-8") as f:
+        reference = json.load(f)
+    if results:
+        with open(results, encoding="utf-8") as f:
+            current = json.load(f)
+    else:
+        if data:
+            os.makedirs(data, exist_ok=True)
+        current = best_of(
+            [
+                {
+                    # Same options as the baseline, such as the fake API
+                    # server, so that API calls compare.
+                    name: suite.run_scenarios(
+                        [name],
+                        result["seed"],
+                        data,
+                        **result.get("options", {}),
+                    )[name]
+                    for name, result in reference.items()
+                }
+                for _ in range(repeat)
+            ]
+        )
+    if output:
+        suite.save(current, output)
+
+    deltas = compare_results(
+        reference,
+        current,
+        {
+            "seconds": time_tolerance,
+            "peak_rss_kib": rss_tolerance,
+            "api_calls": api_calls_tolerance,
+        },
+    )
+    print_comparison(deltas)
+    regressions = len([i for i in deltas if i.regression])
+    if regressions:
+        console.print(f"[red]{regressions} regressions")
+        raise typer.Exit(1)
+    console.print("[green]No regressions")
+
+
+@app.command()
+def serve(
+    scenario: str = typer.Option(
+        default="small",
+        callback=_scenario_callback,
+        help=f"Scale of the cluster served: {', '.join(SCENARIOS)}",
+    ),
+    seed: int = typer.Option(default=0, help="Seed of the generator."),
+    data: str = typer.Option(
+        default=None,
+        help="Serve a directory written by `generate` instead.",
+    ),
+    host: str = typer.Option(default="127.0.0.1", help="Listen address."),
+    port: int = typer.Option(
+        default=0, min=0, help="Listen port, a free one by default."
+    ),
+    latency: float = typer.Option(
+        default=0.0, min=0, help="Seconds added to every request."
+    ),
+    throttle_rate: float = typer.Option(
+        default=0.0,
+        min=0,
+        max=1,
+        help="Share of requests answered with 429 Too Many Requests.",
+    ),
+    retry_after: int = typer.Option(
+        default=1, min=0, help="Retry-After of throttled responses."
+    ),
+    certfile: str = typer.Option(
+        default=None, help="Serve HTTPS with this certificate."
+    ),
+    keyfile: str = typer.Option(default=None, help="Key of --certfile."),
+    kubeconfig: str = typer.Option(
+        default="fake-kubeconfig",
+        help="Write a kubeconfig pointing at the server to this file.",
+    ),
+):
+    """
+    Serve a synthetic cluster from a local fake Kubernetes API server.
+    """
+    from .fake_kube import FakeKubeServer, ItemStore
+
+    if data:
+        store = ItemStore.from_recording(data)
+    else:
+        store = ItemStore.from_synthetic(
+            SyntheticCluster.scenario(scenario, seed)
+        )
+    server = FakeKubeServer(
+        store,
+        latency=latency,
+        throttle_rate=throttle_rate,
+        retry_after=retry_after,
+        certfile=certfile,
+        keyfile=keyfile,
+        host=host,
+        port=port,
+        seed=seed,
+    )
+    server.write_kubeconfig(kubeconfig)
+    console.print(f"Serving on {server.url}, kubeconfig in {kubeconfig}")
+    console.print(
+        f"Run `hardeneks --kubeconfig {kubeconfig} --cluster fake "
+        "--region us-east-1`, Ctrl-C to stop."
+    )
+    with server:
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+    console.print(f"{server.requests} requests, {server.throttled} throttled")
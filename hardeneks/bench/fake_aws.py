@@ -0,0 +1,493 @@
+import base64
+from collections import Counter
+import datetime
+import json
+import random
+import threading
+import time
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+import boto3
+from botocore.awsrequest import AWSResponse
+
+ACCOUNT_ID = "123456789012"
+
+# Error code and HTTP status of throttled requests, by protocol.
+_THROTTLES = {
+    "query": ("Throttling", 400),
+    "ec2": ("RequestLimitExceeded", 503),
+    "json": ("ThrottlingException", 400),
+    "rest-json": ("TooManyRequestsException", 429),
+}
+
+# Actions the cluster autoscaler role is granted besides the ones it
+# needs, so `employ_least_privileged_access_cluster_autoscaler_role`
+# has something to report.
+_EXTRA_ACTIONS = ["ec2:*", "iam:PassRole", "s3:GetObject"]
+
+
+class _Body:
+    def __init__(self, data):
+        self.data = data
+
+    def stream(self, **kwargs):
+        yield self.data
+
+
+def _xml(shape, value, name):
+    """
+    Render `value` as the XML of the query and ec2 protocols, following
+    the member and list item names of the output shape.
+    """
+    if shape.type_name == "structure":
+        inner = "".join(
+            _xml(member, value[key], member.serialization.get("name", key))
+            for key, member in shape.members.items()
+            if value.get(key) is not None
+        )
+    elif shape.type_name == "list":
+        item = shape.member.serialization.get("name", "member")
+        if shape.serialization.get("flattened"):
+            return "".join(_xml(shape.member, i, name) for i in value)
+        inner = "".join(_xml(shape.member, i, item) for i in value)
+    elif shape.type_name == "map":
+        inner = "".join(
+            "<entry>"
+            + _xml(shape.key, key, "key")
+            + _xml(shape.value, item, "value")
+            + "</entry>"
+            for key, item in value.items()
+        )
+    elif shape.type_name == "timestamp":
+        inner = value.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    elif shape.type_name == "boolean":
+        inner = "true" if value else "false"
+    elif shape.type_name == "blob":
+        inner = base64.b64encode(value).decode()
+    else:
+        inner = escape(str(value))
+    return f"<{name}>{inner}</{name}>"
+
+
+def _json_default(value):
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def render(operation, output, protocol):
+    """
+    Serialize the output of an operation the way AWS puts it on the wire.
+
+    Args:
+        operation (OperationModel): Operation answered
+        output (dict): Output of the operation, as boto3 returns it
+        protocol (str): query, ec2, json or rest-json
+
+    Returns:
+        bytes: Response body
+
+    """
+    if protocol in ("json", "rest-json"):
+        return json.dumps(output, default=_json_default).encode()
+    shape = operation.output_shape
+    name = operation.name
+    body = "".join(
+        _xml(member, output[key], member.serialization.get("name", key))
+        for key, member in (shape.members.items() if shape else [])
+        if output.get(key) is not None
+    )
+    if protocol == "query":
+        body = (
+            f"<{name}Result>{body}</{name}Result>"
+            "<ResponseMetadata><RequestId>fake</RequestId>"
+            "</ResponseMetadata>"
+        )
+    else:
+        body = f"<requestId>fake</requestId>{body}"
+    return f"<{name}Response>{body}</{name}Response>".encode()
+
+
+def render_error(code, message, protocol):
+    if protocol == "query":
+        body = (
+            "<ErrorResponse><Error><Type>Sender</Type>"
+            f"<Code>{code}</Code><Message>{escape(message)}</Message>"
+            "</Error><RequestId>fake</RequestId></ErrorResponse>"
+        )
+    elif protocol == "ec2":
+        body = (
+            f"<Response><Errors><Error><Code>{code}</Code>"
+            f"<Message>{escape(message)}</Message></Error></Errors>"
+            "<RequestID>fake</RequestID></Response>"
+        )
+    else:
+        body = json.dumps({"__type": code, "message": message})
+    return body.encode()
+
+
+def _page(items, token, size):
+    start = int(token) if token else 0
+    end = start + size
+    return items[start:end], (str(end) if end < len(items) else None)
+
+
+class FakeAWS:
+    """
+    Local stand-in for the AWS APIs read by hardeneks.
+
+    Installs itself on boto3's default session and answers every request
+    of the clients created afterwards from seeded in-memory data, before
+    anything leaves the process. Responses are serialized in the service's
+    wire protocol, so parsing, retries and `throttle`'s limiter and
+    accounting run as they do against AWS.
+
+    Args:
+        cluster (str): EKS cluster name
+        region (str): AWS region
+        instances (int): EC2 instances of the cluster, a tenth more
+            belong to other clusters
+        repositories (int): ECR repositories
+        policies (int): Managed policies attached to the cluster
+            autoscaler's role, IAM allows up to 20
+        latency (float): Seconds added to every request
+        throttle_rate (float): Share of requests answered with the
+            service's throttling error
+        seed (int): Seed of the data and of the throttling decisions
+    """
+
+    def __init__(
+        self,
+        cluster="bench",
+        region="us-east-1",
+        instances=2000,
+        repositories=2000,
+        policies=20,
+        latency=0.0,
+        throttle_rate=0.0,
+        seed=0,
+    ):
+        self.cluster = cluster
+        self.region = region
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.calls = Counter()
+        self.throttled = 0
+        self.findings = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._session = None
+
+        data = random.Random(seed)
+        self.reservations = [
+            self._reservation(data, index, cluster)
+            for index in range(instances)
+        ] + [
+            self._reservation(data, index, f"{cluster}-other")
+            for index in range(instances, instances + instances // 10)
+        ]
+        self.repositories = [
+            {
+                "repositoryArn": f"arn:aws:ecr:{region}:{ACCOUNT_ID}:"
+                f"repository/repo-{index:05d}",
+                "registryId": ACCOUNT_ID,
+                "repositoryName": f"repo-{index:05d}",
+                "repositoryUri": f"{ACCOUNT_ID}.dkr.ecr.{region}."
+                f"amazonaws.com/repo-{index:05d}",
+                "imageTagMutability": data.choice(["MUTABLE", "IMMUTABLE"]),
+            }
+            for index in range(repositories)
+        ]
+        self.autoscaler_role = f"{cluster}-cluster-autoscaler"
+        self.policies = {
+            f"arn:aws:iam::{ACCOUNT_ID}:policy/autoscaler-{index:05d}": [
+                {
+                    "Effect": "Allow",
+                    "Action": (
+                        _EXTRA_ACTIONS[index % len(_EXTRA_ACTIONS)]
+                        if index % 5 == 0
+                        else "autoscaling:SetDesiredCapacity"
+                    ),
+                    "Resource": "*",
+                }
+            ]
+            for index in range(policies)
+        }
+        self.associations = [
+            {
+                "clusterName": cluster,
+                "namespace": "kube-system",
+                "serviceAccount": "cluster-autoscaler",
+                "associationArn": f"arn:aws:eks:{region}:{ACCOUNT_ID}:"
+                f"podidentityassociation/{cluster}/a-autoscaler",
+                "associationId": "a-autoscaler",
+            }
+        ]
+
+    @staticmethod
+    def _reservation(data, index, cluster):
+        public = data.random() < 0.1
+        return {
+            "ReservationId": f"r-{index:017x}",
+            "OwnerId": ACCOUNT_ID,
+            "Instances": [
+                {
+                    "InstanceId": f"i-{index:017x}",
+                    "InstanceType": data.choice(
+                        ["m5.large", "m5.xlarge", "c5.2xlarge"]
+                    ),
+                    "PrivateDnsName": f"ip-10-0-{index // 250}-"
+                    f"{index % 250}.ec2.internal",
+                    "PublicDnsName": (
+                        f"ec2-{index}.compute-1.amazonaws.com"
+                        if public
+                        else ""
+                    ),
+                    "MetadataOptions": {
+                        "HttpTokens": data.choice(["required", "optional"]),
+                        "HttpPutResponseHopLimit": data.choice([1, 2]),
+                    },
+                    "Tags": [
+                        {"Key": "aws:eks:cluster-name", "Value": cluster}
+                    ],
+                }
+            ],
+        }
+
+    def install(self):
+        """
+        Answer the requests of boto3 clients created from now on.
+
+        Returns:
+            FakeAWS: self
+
+        """
+        self._session = boto3.DEFAULT_SESSION
+        boto3.setup_default_session(
+            aws_access_key_id="fake",
+            aws_secret_access_key="fake",
+            region_name=self.region,
+        )
+        events = boto3.DEFAULT_SESSION.events
+        events.register("before-parameter-build", self._remember)
+        events.register("before-send", self._send)
+        return self
+
+    def uninstall(self):
+        boto3.DEFAULT_SESSION = self._session
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *args):
+        self.uninstall()
+
+    def _remember(self, params, model, **kwargs):
+        # before-send only sees the signed HTTP request, the operation
+        # and its parameters are kept for it per thread.
+        self._local.call = (model, dict(params))
+
+    def _throttle(self, name):
+        with self._lock:
+            self.calls[name] += 1
+            if self._random.random() < self.throttle_rate:
+                self.throttled += 1
+                return True
+        return False
+
+    def _send(self, request, **kwargs):
+        operation, params = self._local.call
+        service = operation.service_model
+        protocol = service.protocol
+        name = f"{service.service_name}.{operation.name}"
+        handler = getattr(
+            self, f"_{service.service_name}_{operation.name}", None
+        )
+        if handler is None:
+            raise NotImplementedError(f"FakeAWS does not serve {name}")
+        if self.latency:
+            time.sleep(self.latency)
+        if self._throttle(name):
+            code, status = _THROTTLES[protocol]
+            return AWSResponse(
+                request.url,
+                status,
+                {"x-amzn-ErrorType": code},
+                _Body(render_error(code, "Rate exceeded", protocol)),
+            )
+        return AWSResponse(
+            request.url,
+            200,
+            {},
+            _Body(render(operation, handler(**params), protocol)),
+        )
+
+    def _sts_GetCallerIdentity(self):
+        return {
+            "UserId": "AIDAFAKE",
+            "Account": ACCOUNT_ID,
+            "Arn": f"arn:aws:iam::{ACCOUNT_ID}:user/hardeneks",
+        }
+
+    def _eks_DescribeCluster(self, name):
+        return {
+            "cluster": {
+                "name": name,
+                "arn": f"arn:aws:eks:{self.region}:{ACCOUNT_ID}:"
+                f"cluster/{name}",
+                "createdAt": datetime.datetime(
+                    2024, 1, 1, tzinfo=datetime.timezone.utc
+                ),
+                "version": "1.30",
+                "status": "ACTIVE",
+                "resourcesVpcConfig": {
+                    "vpcId": "vpc-fake",
+                    "subnetIds": ["subnet-a", "subnet-b"],
+                    "endpointPublicAccess": True,
+                    "endpointPrivateAccess": True,
+                },
+                "logging": {
+                    "clusterLogging": [
+                        {"types": ["api", "audit"], "enabled": False}
+                    ]
+                },
+            }
+        }
+
+    def _eks_DescribeClusterVersions(self, **kwargs):
+        return {
+            "clusterVersions": [
+                {"clusterVersion": version, "versionStatus": status}
+                for version, status in [
+                    ("1.33", "STANDARD_SUPPORT"),
+                    ("1.32", "STANDARD_SUPPORT"),
+                    ("1.31", "STANDARD_SUPPORT"),
+                    ("1.30", "EXTENDED_SUPPORT"),
+                ]
+            ]
+        }
+
+    def _eks_ListPodIdentityAssociations(self, clusterName, **kwargs):
+        return {
+            "associations": [
+                i for i in self.associations if i["clusterName"] == clusterName
+            ]
+        }
+
+    def _eks_DescribePodIdentityAssociation(self, clusterName, associationId):
+        for association in self.associations:
+            if association["associationId"] == associationId:
+                return {
+                    "association": dict(
+                        association,
+                        roleArn=f"arn:aws:iam::{ACCOUNT_ID}:"
+                        f"role/{self.autoscaler_role}",
+                    )
+                }
+        return {}
+
+    def _ec2_DescribeInstances(
+        self, Filters=(), MaxResults=1000, NextToken=None
+    ):
+        reservations = self.reservations
+        for _filter in Filters:
+            if _filter["Name"].startswith("tag:"):
+                key = _filter["Name"][len("tag:") :]
+                reservations = [
+                    r
+                    for r in reservations
+                    if any(
+                        tag["Key"] == key and tag["Value"] in _filter["Values"]
+                        for tag in r["Instances"][0]["Tags"]
+                    )
+                ]
+        page, token = _page(reservations, NextToken, MaxResults)
+        return {"Reservations": page, "NextToken": token}
+
+    def _ec2_DescribeFlowLogs(self, **kwargs):
+        return {"FlowLogs": []}
+
+    def _ecr_DescribeRepositories(self, maxResults=1000, nextToken=None):
+        page, token = _page(self.repositories, nextToken, maxResults)
+        return {"repositories": page, "nextToken": token}
+
+    def _inspector2_BatchGetAccountStatus(self, accountIds):
+        return {
+            "accounts": [
+                {
+                    "accountId": account,
+                    "state": {"status": "ENABLED"},
+                    "resourceState": {
+                        "ec2": {"status": "ENABLED"},
+                        "ecr": {"status": "DISABLED"},
+                    },
+                }
+                for account in accountIds
+            ],
+            "failedAccounts": [],
+        }
+
+    def _iam_ListAttachedRolePolicies(self, RoleName, **kwargs):
+        policies = self.policies if RoleName == self.autoscaler_role else {}
+        return {
+            "AttachedPolicies": [
+                {"PolicyName": arn.rsplit("/", 1)[-1], "PolicyArn": arn}
+                for arn in policies
+            ],
+            "IsTruncated": False,
+        }
+
+    def _iam_ListRolePolicies(self, RoleName, **kwargs):
+        return {"PolicyNames": ["inline"], "IsTruncated": False}
+
+    def _iam_GetPolicy(self, PolicyArn):
+        return {
+            "Policy": {
+                "PolicyName": PolicyArn.rsplit("/", 1)[-1],
+                "Arn": PolicyArn,
+                "DefaultVersionId": "v1",
+            }
+        }
+
+    def _iam_GetPolicyVersion(self, PolicyArn, VersionId):
+        # IAM returns policy documents URL encoded, botocore decodes them.
+        document = {
+            "Version": "2012-10-17",
+            "Statement": self.policies[PolicyArn],
+        }
+        return {
+            "PolicyVersion": {
+                "Document": quote(json.dumps(document)),
+                "VersionId": VersionId,
+                "IsDefaultVersion": True,
+            }
+        }
+
+    def _iam_GetRolePolicy(self, RoleName, PolicyName):
+        document = {
+            "Version": "2012-10-17",
+            "Statement": [
+                {
+                    "Effect": "Allow",
+                    "Action": ["autoscaling:DescribeAutoScalingGroups"],
+                    "Resource": "*",
+                }
+            ],
+        }
+        return {
+            "RoleName": RoleName,
+            "PolicyName": PolicyName,
+            "PolicyDocument": quote(json.dumps(document)),
+        }
+
+    def _securityhub_BatchImportFindings(self, Findings):
+        with self._lock:
+            for finding in Findings:
+                self.findings[finding["Id"]] = finding
+        return {
+            "FailedCount": 0,
+            "SuccessCount": len(Findings),
+            "FailedFindings": [],
+        }
@@ -0,0 +1,339 @@
+import base64
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import ssl
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import yaml
+
+from .synthetic import CLUSTER_LISTS, list_response, response_file
+from ..resources import NAMESPACED_RESOURCES
+
+# attribute -> (API group path, resource plural)
+ROUTES = {
+    "cluster_roles": ("/apis/rbac.authorization.k8s.io/v1", "clusterroles"),
+    "cluster_role_bindings": (
+        "/apis/rbac.authorization.k8s.io/v1",
+        "clusterrolebindings",
+    ),
+    "resource_quotas": ("/api/v1", "resourcequotas"),
+    "network_policies": ("/apis/networking.k8s.io/v1", "networkpolicies"),
+    "storage_classes": ("/apis/storage.k8s.io/v1", "storageclasses"),
+    "persistent_volumes": ("/api/v1", "persistentvolumes"),
+    "namespaces": ("/api/v1", "namespaces"),
+    "nodes": ("/api/v1", "nodes"),
+    "roles": ("/apis/rbac.authorization.k8s.io/v1", "roles"),
+    "role_bindings": ("/apis/rbac.authorization.k8s.io/v1", "rolebindings"),
+    "pods": ("/api/v1", "pods"),
+    "services": ("/api/v1", "services"),
+    "service_accounts": ("/api/v1", "serviceaccounts"),
+    "deployments": ("/apis/apps/v1", "deployments"),
+    "daemon_sets": ("/apis/apps/v1", "daemonsets"),
+    "stateful_sets": ("/apis/apps/v1", "statefulsets"),
+    "hpas": ("/apis/autoscaling/v1", "horizontalpodautoscalers"),
+}
+
+_PATHS = {path: attr for attr, path in ROUTES.items()}
+
+
+class ItemStore:
+    """
+    LIST items of a cluster indexed by resource and namespace, kept as
+    JSON strings so serving a page is a join.
+    """
+
+    def __init__(self):
+        self.items = {attr: {} for attr in ROUTES}
+        self.names = {}
+
+    def add(self, attr, item):
+        metadata = item["metadata"]
+        namespace = metadata.get("namespace")
+        raw = json.dumps(item)
+        self.items[attr].setdefault(namespace, []).append(raw)
+        self.names[(attr, namespace, metadata["name"])] = raw
+
+    @classmethod
+    def from_synthetic(cls, synthetic):
+        store = cls()
+        for attr, items in synthetic.cluster_items().items():
+            for item in items:
+                store.add(attr, item)
+        for index in range(len(synthetic.namespaces)):
+            for attr, items in synthetic.namespace_items(index).items():
+                for item in items:
+                    store.add(attr, item)
+        return store
+
+    @classmethod
+    def from_recording(cls, directory):
+        store = cls()
+        path = os.path.join(directory, "cluster")
+        for attr in CLUSTER_LISTS + list(NAMESPACED_RESOURCES):
+            with open(os.path.join(path, response_file(attr))) as f:
+                for item in json.load(f)["items"]:
+                    store.add(attr, item)
+        return store
+
+    def list(self, attr, namespace=None):
+        if namespace is None:
+            return [i for items in self.items[attr].values() for i in items]
+        return self.items[attr].get(namespace, [])
+
+    def get(self, attr, namespace, name):
+        return self.names.get((attr, namespace, name))
+
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog of 5 drops the connections of concurrent
+    # clients, which then wait seconds to retry their SYN.
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def _status(code, reason, message):
+    return json.dumps(
+        {
+            "kind": "Status",
+            "apiVersion": "v1",
+            "metadata": {},
+            "status": "Failure",
+            "message": message,
+            "reason": reason,
+            "code": code,
+        }
+    )
+
+
+def _continue_token(offset):
+    return base64.urlsafe_b64encode(str(offset).encode()).decode()
+
+
+def _offset(token):
+    return int(base64.urlsafe_b64decode(token.encode()).decode())
+
+
+class FakeKubeServer:
+    """
+    Local stand-in for the Kubernetes API server.
+
+    Serves LIST, GET and WATCH of the resources hardeneks reads, with
+    `limit`/`continue` pagination. Every request can be slowed down by
+    `latency` and a share of them answered with 429 Too Many Requests.
+
+    Args:
+        store (ItemStore): Objects served
+        latency (float): Seconds added to every request
+        throttle_rate (float): Share of requests answered with a 429
+        retry_after (int): `Retry-After` of throttled responses
+        watch_timeout (float): Seconds a watch stays open after its
+            initial events, unless the client asks for less
+        certfile (str): Certificate to serve HTTPS with, HTTP if unset
+        keyfile (str): Key of `certfile`
+        host (str): Address to listen on
+        port (int): Port to listen on, 0 picks a free one
+        seed (int): Seed of the throttling decisions
+    """
+
+    def __init__(
+        self,
+        store,
+        latency=0.0,
+        throttle_rate=0.0,
+        retry_after=1,
+        watch_timeout=1.0,
+        certfile=None,
+        keyfile=None,
+        host="127.0.0.1",
+        port=0,
+        seed=0,
+    ):
+        self.store = store
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.watch_timeout = watch_timeout
+        self.requests = 0
+        self.throttled = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+        handler = self._handler()
+        self.httpd = _Server((host, port), handler)
+        self.scheme = "http"
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            self.httpd.socket = context.wrap_socket(
+                self.httpd.socket, server_side=True
+            )
+            self.scheme = "https"
+        host, port = self.httpd.server_address[:2]
+        self.url = f"{self.scheme}://{host}:{port}"
+        self.thread = None
+
+    def _throttle(self):
+        with self._lock:
+            self.requests += 1
+            if self._random.random() < self.throttle_rate:
+                self.throttled += 1
+                return True
+        return False
+
+    def _route(self, path):
+        # -> (attr, namespace, name), None when nothing is served there
+        for (group, plural), attr in _PATHS.items():
+            if not path.startswith(group + "/"):
+                continue
+            parts = path[len(group) + 1 :].strip("/").split("/")
+            if parts[0] == "namespaces" and 3 <= len(parts) <= 4:
+                if parts[2] == plural:
+                    name = parts[3] if len(parts) == 4 else None
+                    return attr, parts[1], name
+            elif parts[0] == plural and len(parts) <= 2:
+                name = parts[1] if len(parts) == 2 else None
+                return attr, None, name
+        return None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, code, body, headers=None):
+                data = body.encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _chunk(self, data):
+                data = data.encode("utf-8")
+                self.wfile.write(
+                    f"{len(data):x}\r\n".encode() + data + b"\r\n"
+                )
+                self.wfile.flush()
+
+            def _watch(self, items, timeout):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for item in items:
+                    self._chunk(f'{{"type": "ADDED", "object": {item}}}\n')
+                server._stopped.wait(timeout)
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                if server._throttle():
+                    self._send(
+                        429,
+                        _status(429, "TooManyRequests", "throttled"),
+                        {"Retry-After": str(server.retry_after)},
+                    )
+                    return
+                url = urlsplit(self.path)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                route = server._route(url.path)
+                if route is None:
+                    self._send(
+                        404, _status(404, "NotFound", f"{url.path} not found")
+                    )
+                    return
+                attr, namespace, name = route
+                if name is not None:
+                    item = server.store.get(attr, namespace, name)
+                    if item is None:
+                        self._send(
+                            404,
+                            _status(404, "NotFound", f"{name} not found"),
+                        )
+                        return
+                    self._send(200, item)
+                    return
+
+                items = server.store.list(attr, namespace)
+                if query.get("watch") in ("1", "true"):
+                    timeout = server.watch_timeout
+                    if "timeoutSeconds" in query:
+                        timeout = min(timeout, float(query["timeoutSeconds"]))
+                    self._watch(items, timeout)
+                    return
+
+                start = (
+                    _offset(query["continue"]) if "continue" in query else 0
+                )
+                _continue = None
+                limit = int(query.get("limit") or 0)
+                if limit:
+                    if start + limit < len(items):
+                        _continue = _continue_token(start + limit)
+                    items = items[start : start + limit]
+                self._send(
+                    200,
+                    list_response(attr, items, _continue=_continue),
+                )
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def write_kubeconfig(self, path, name="fake"):
+        """
+        Write a kubeconfig whose current context points at the server.
+
+        Args:
+            path (str): Kubeconfig to write
+            name (str): Name of the cluster, user and context
+
+        Returns:
+            str: `path`
+
+        """
+        cluster = {"server": self.url}
+        if self.scheme == "https":
+            cluster["insecure-skip-tls-verify"] = True
+        kubeconfig = {
+            "apiVersion": "v1",
+            "kind": "Config",
+            "clusters": [{"name": name, "cluster": cluster}],
+            "users": [{"name": name, "user": {"token": "fake"}}],
+            "contexts": [
+                {"name": name, "context": {"cluster": name, "user": name}}
+            ],
+            "current-context": name,
+        }
+        with open(path, "w") as f:
+            yaml.dump(kubeconfig, f, default_flow_style=False)
+        return path
@@ -0,0 +1,110 @@
+from collections import namedtuple
+
+# Relative increase over the baseline tolerated for each metric.
+TOLERANCES = {"seconds": 0.25, "peak_rss_kib": 0.15, "api_calls": 0.0}
+
+# Phases that got slower by less than this are timer and scheduling
+# noise, however large the relative increase of a short phase.
+MIN_SECONDS = 0.1
+
+Delta = namedtuple(
+    "Delta",
+    ["scenario", "phase", "metric", "baseline", "current", "regression"],
+)
+
+
+def best_of(runs):
+    """
+    Merge repeated runs of the same scenarios, keeping the fastest time
+    and the lowest peak RSS of every phase.
+
+    Args:
+        runs (list): Outputs of `suite.run_scenarios`
+
+    Returns:
+        dict: scenario name -> results
+
+    """
+    merged = {}
+    for run in runs:
+        for scenario, result in run.items():
+            if scenario not in merged:
+                merged[scenario] = dict(
+                    result,
+                    phases={k: dict(v) for k, v in result["phases"].items()},
+                )
+                continue
+            best = merged[scenario]
+            best["peak_rss_kib"] = min(
+                best["peak_rss_kib"], result["peak_rss_kib"]
+            )
+            for name, phase in result["phases"].items():
+                if name not in best["phases"]:
+                    best["phases"][name] = dict(phase)
+                    continue
+                for metric in ("seconds", "cpu_seconds"):
+                    best["phases"][name][metric] = min(
+                        best["phases"][name][metric], phase[metric]
+                    )
+    return merged
+
+
+def _regressed(metric, baseline, current, tolerances):
+    if metric == "seconds" and current - baseline < MIN_SECONDS:
+        return False
+    return current > baseline * (1 + tolerances[metric])
+
+
+def compare(baseline, current, tolerances=None):
+    """
+    Compare benchmark results with a baseline.
+
+    Phases are compared on wall time and API calls, scenarios on peak
+    RSS. Phases or scenarios missing from either side are skipped.
+
+    Args:
+        baseline (dict): scenario name -> results, as saved by
+            `bench run --output`
+        current (dict): scenario name -> results
+        tolerances (dict): metric -> tolerated relative increase,
+            `TOLERANCES` by default
+
+    Returns:
+        list: Delta per compared metric
+
+    """
+    tolerances = dict(TOLERANCES, **(tolerances or {}))
+    deltas = []
+    for scenario, result in current.items():
+        if scenario not in baseline:
+            continue
+        reference = baseline[scenario]
+        for name, phase in result["phases"].items():
+            if name not in reference["phases"]:
+                continue
+            for metric in ("seconds", "api_calls"):
+                before = reference["phases"][name][metric]
+                after = phase[metric]
+                deltas.append(
+                    Delta(
+                        scenario,
+                        name,
+                        metric,
+                        before,
+                        after,
+                        _regressed(metric, before, after, tolerances),
+                    )
+                )
+        before = reference["peak_rss_kib"]
+        after = result["peak_rss_kib"]
+        deltas.append(
+            Delta(
+                scenario,
+                "",
+                "peak_rss_kib",
+                before,
+                after,
+                _regressed("peak_rss_kib", before, after, tolerances),
+            )
+        )
+    return deltas
@@ -0,0 +1,431 @@
+from contextlib import contextmanager
+import copy
+import functools
+import json
+import os
+import platform
+import tempfile
+import time
+
+import kubernetes
+from pkg_resources import resource_filename
+import yaml
+
+import hardeneks
+from .. import (
+    accounting,
+    aio,
+    columnar,
+    html_report,
+    metrics,
+    profiling,
+    throttle,
+)
+from ..aws import datasets_for
+from ..findings import NDJSONWriter
+from ..harden import harden
+from ..memory import peak_rss_kib
+from ..report import Report
+from ..resources import NamespacedResources, Resources
+from ..store import Store
+from .fake_aws import FakeAWS
+from .fake_kube import FakeKubeServer, ItemStore
+from .synthetic import SyntheticCluster, load
+
+# Cluster wide rules evaluated from collected resources alone. The others
+# call the Kubernetes or AWS APIs from their check and need a cluster.
+OFFLINE_CLUSTER_WIDE = [
+    "disable_anonymous_access_for_cluster_roles",
+    "restrict_wildcard_for_cluster_roles",
+    "ensure_namespace_quotas_exist",
+    "check_default_deny_policy_exists",
+    "use_encryption_with_ebs",
+    "use_encryption_with_efs",
+    "use_efs_access_points",
+]
+
+# Cluster wide rules evaluated from AWS data alone, run against FakeAWS.
+AWS_CLUSTER_WIDE = [
+    "check_endpoint_public_access",
+    "check_access_to_instance_profile",
+    "check_logs_are_enabled",
+    "check_vpc_flow_logs",
+    "deploy_workers_onto_private_subnets",
+    "make_sure_inspector_is_enabled",
+    "use_immutable_tags_with_ecr",
+    "check_EKS_version",
+]
+
+
+# Exporters timed by default, the columnar ones when pyarrow is installed.
+EXPORTERS = (
+    "json",
+    "ndjson",
+    "csv",
+    "txt",
+    "html",
+    "openmetrics",
+    "html_report",
+    "store",
+) + (("parquet", "arrow") if columnar.pyarrow is not None else ())
+
+# Files written by exporters, others write report.<exporter>.
+FILES = {"html_report": "findings.html", "store": "history.db"}
+
+
+def _version():
+    try:
+        from importlib.metadata import version
+
+        return version("hardeneks")
+    except Exception:
+        return "unknown"
+
+
+def offline_rules(config, aws=False):
+    """
+    Restrict the `rules` section of a config to the rules a benchmark
+    can evaluate without a cluster, and without AWS unless `aws`.
+    """
+    allowed = OFFLINE_CLUSTER_WIDE + (AWS_CLUSTER_WIDE if aws else [])
+    rules = copy.deepcopy(config)
+    for pillar in rules.get("cluster_wide", {}).values():
+        for section in pillar:
+            pillar[section] = [i for i in pillar[section] if i in allowed]
+    return rules
+
+
+class Phases:
+    """
+    Time, API calls and peak RSS of the phases of a benchmark.
+
+    A phase entered several times, such as deserialization once per
+    namespace, adds up.
+    """
+
+    def __init__(self):
+        self.phases = {}
+
+    @staticmethod
+    def _profiled_calls():
+        # Calls made inside profiled steps are tracked by the step, not
+        # by the enclosing phase.
+        return sum(
+            step["kubernetes_calls"] + step["aws_calls"]
+            for step in profiling.profile.to_dict().values()
+        )
+
+    @contextmanager
+    def phase(self, name):
+        profiled = self._profiled_calls()
+        with accounting.track() as usage:
+            yield
+        profiled = self._profiled_calls() - profiled
+        phase = self.phases.setdefault(
+            name,
+            {
+                "seconds": 0.0,
+                "cpu_seconds": 0.0,
+                "api_calls": 0,
+                "peak_rss_kib": 0,
+            },
+        )
+        phase["seconds"] += usage.wall_seconds
+        phase["cpu_seconds"] += usage.cpu_seconds
+        phase["api_calls"] += usage.api_calls + profiled
+        phase["peak_rss_kib"] = peak_rss_kib()
+
+
+@contextmanager
+def _quiet(console):
+    output = console.file
+    with open(os.devnull, "w") as devnull:
+        console.file = devnull
+        try:
+            yield
+        finally:
+            console.file = output
+
+
+def _load_config():
+    with open(resource_filename("hardeneks", "config.yaml")) as f:
+        return yaml.safe_load(f)
+
+
+def collect_from_api(async_collection=False, concurrency=100):
+    """
+    Collect every resource of a scan through the Kubernetes client, the
+    way `hardeneks` does against a real cluster. The kube config has to
+    be loaded beforehand.
+
+    Args:
+        async_collection (bool): Collect with the asyncio engine
+        concurrency (int): Maximum in-flight requests of the asyncio
+            engine
+
+    Returns:
+        tuple: raw cluster wide resources and a dict of namespace -> raw
+            namespaced resources
+
+    """
+    v1 = kubernetes.client.CoreV1Api()
+    namespaces = [i.metadata.name for i in v1.list_namespace().items]
+    if async_collection:
+        return aio.collect_raw(namespaces, concurrency)
+    cluster_raw = Resources(
+        "us-east-1", "bench", "bench", namespaces
+    ).get_raw_resources()
+    namespaced_raw = {
+        ns: NamespacedResources(
+            "us-east-1", "bench", "bench", ns
+        ).get_raw_resources()
+        for ns in namespaces
+    }
+    return cluster_raw, namespaced_raw
+
+
+def run(
+    synthetic,
+    directory,
+    rules=None,
+    collect=None,
+    exporters=EXPORTERS,
+    server=None,
+    async_collection=False,
+    concurrency=100,
+    aws=None,
+):
+    """
+    Benchmark a scan of a synthetic cluster.
+
+    Args:
+        synthetic (SyntheticCluster): Cluster to scan
+        directory (str): Where the cluster is recorded, it's written there
+            first unless already present. Exports are written there too.
+        rules (dict): `rules` section of a config, the offline rules of
+            the default config by default
+        collect (callable): Returns (cluster raw, namespace -> raw), by
+            default reads the recording back
+        exporters (tuple): Exporters to time, txt and html are written
+            in the report phase as the report is printed, like the CLI
+            does
+        server (dict): Serve the recording from a `FakeKubeServer`
+            created with these options and collect through the
+            Kubernetes client, instead of reading the recording back
+        async_collection (bool): Collect from the server with the
+            asyncio engine
+        concurrency (int): Maximum in-flight requests of the asyncio
+            engine
+        aws (dict): Answer AWS calls from a `FakeAWS` created with these
+            options. The AWS datasets of the rules are prefetched, the
+            cluster autoscaler role's policies read and the failures
+            exported to its Security Hub, each as a phase.
+
+    Returns:
+        dict: Benchmark results
+
+    """
+    if rules is None:
+        rules = offline_rules(_load_config()["rules"], aws=aws is not None)
+    if aws is not None and "security_hub" not in exporters:
+        exporters = tuple(exporters) + ("security_hub",)
+    args = (
+        synthetic,
+        directory,
+        rules,
+        collect,
+        exporters,
+        server,
+        async_collection,
+        concurrency,
+    )
+    if aws is None:
+        return _run(*args)
+
+    with FakeAWS(seed=synthetic.seed, **aws) as fake_aws:
+        benchmark = _run(*args, fake_aws=fake_aws)
+    benchmark["aws"] = {
+        "requests": sum(fake_aws.calls.values()),
+        "throttled": fake_aws.throttled,
+        "security_hub_findings": len(fake_aws.findings),
+    }
+    return benchmark
+
+
+def _run(
+    synthetic,
+    directory,
+    rules,
+    collect,
+    exporters,
+    server,
+    async_collection,
+    concurrency,
+    fake_aws=None,
+):
+    phases = Phases()
+    profiling.profile.drain()
+
+    if not os.path.exists(os.path.join(directory, "cluster")):
+        with phases.phase("generate"):
+            synthetic.write(directory)
+
+    api_server = None
+    if server is not None:
+        api_server = FakeKubeServer(
+            ItemStore.from_recording(directory), **server
+        ).start()
+        kubernetes.config.load_kube_config(
+            config_file=api_server.write_kubeconfig(
+                os.path.join(directory, "kubeconfig")
+            )
+        )
+        throttle.install_kubernetes()
+        collect = functools.partial(
+            collect_from_api, async_collection, concurrency
+        )
+
+    started = time.monotonic()
+    try:
+        with phases.phase("collection"):
+            if collect is None:
+                cluster_raw, namespaced_raw = load(directory)
+            else:
+                cluster_raw, namespaced_raw = collect()
+    finally:
+        if api_server is not None:
+            api_server.stop()
+
+    results = []
+    resources = Resources("us-east-1", "bench", "bench", list(namespaced_raw))
+    with phases.phase("deserialization"):
+        resources.set_raw_resources(cluster_raw)
+    if "cluster_wide" in rules:
+        if fake_aws is not None:
+            with phases.phase("aws_prefetch"):
+                resources.aws.prefetch(datasets_for(rules["cluster_wide"]))
+            with phases.phase("aws_iam"):
+                resources.aws.get("role_actions", fake_aws.autoscaler_role)
+        with phases.phase("harden"):
+            results.extend(harden(resources, rules, "cluster_wide"))
+    for namespace in list(namespaced_raw):
+        raw = namespaced_raw.pop(namespace)
+        resources = NamespacedResources(
+            "us-east-1", "bench", "bench", namespace
+        )
+        with phases.phase("deserialization"):
+            resources.set_raw_resources(raw)
+        if "namespace_based" in rules:
+            with phases.phase("harden"):
+                results.extend(harden(resources, rules, "namespace_based"))
+    duration = time.monotonic() - started
+
+    console = hardeneks.console
+    paths = {
+        i: os.path.join(directory, FILES.get(i, f"report.{i}"))
+        for i in exporters
+    }
+    with _quiet(console), phases.phase("report"), Report(
+        console, paths.get("txt"), paths.get("html")
+    ) as output:
+        hardeneks.print_consolidated_results(results, output)
+    for exporter in exporters:
+        if exporter in ("txt", "html"):
+            continue
+        path = paths[exporter]
+        with phases.phase(f"export_{exporter}"):
+            if exporter == "json":
+                hardeneks._export_json(results, path)
+            elif exporter == "ndjson":
+                with NDJSONWriter(path, "bench") as ndjson:
+                    for rule in results:
+                        ndjson.write(rule)
+            elif exporter == "csv":
+                hardeneks._export_csv(results, path)
+            elif exporter == "openmetrics":
+                metrics.write_textfile(
+                    path,
+                    metrics.openmetrics(
+                        metrics.Aggregates(results),
+                        "bench",
+                        duration,
+                        profiling.profile.to_dict(),
+                        throttle.summary(),
+                        time.time(),
+                    ),
+                )
+            elif exporter == "html_report":
+                html_report.write(path, results, "bench")
+            elif exporter in ("parquet", "arrow"):
+                columnar.write(
+                    columnar.table(results, "bench"), path, exporter
+                )
+            elif exporter == "store":
+                # A run recorded in an empty history, as the first run of
+                # the CLI would.
+                if os.path.exists(path):
+                    os.remove(path)
+                with Store(f"sqlite:///{path}") as store:
+                    finished_at = time.time()
+                    store.save(
+                        results, "bench", finished_at - duration, finished_at
+                    )
+            elif exporter == "security_hub":
+                with _quiet(console):
+                    hardeneks._export_security_hub(
+                        results, "us-east-1", "bench"
+                    )
+            else:
+                raise ValueError(f"Unknown exporter {exporter}")
+
+    benchmark = {
+        "hardeneks": _version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "namespaces": len(synthetic.namespaces),
+        "pods": sum(synthetic.pod_counts),
+        "seed": synthetic.seed,
+        "rule_checks": len(results),
+        "failed_checks": len([i for i in results if i.result.status is False]),
+        "peak_rss_kib": peak_rss_kib(),
+        "phases": phases.phases,
+    }
+    if api_server is not None:
+        benchmark["api_server"] = {
+            "requests": api_server.requests,
+            "throttled": api_server.throttled,
+        }
+    return benchmark
+
+
+def run_scenarios(scenarios, seed=0, directory=None, **kwargs):
+    """
+    Run `run` for named scenarios, see `synthetic.SCENARIOS`.
+
+    Args:
+        scenarios (list): Scenario names
+        seed (int): Seed of the generator
+        directory (str): Where scenarios are recorded, a temporary
+            directory removed afterwards by default
+        kwargs: Options of `run`, saved in the results as `options` so
+            that `bench compare` runs the scenarios the same way
+
+    Returns:
+        dict: scenario name -> results
+
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in scenarios:
+            results[name] = run(
+                SyntheticCluster.scenario(name, seed),
+                os.path.join(directory or tmp, f"{name}-{seed}"),
+                **kwargs,
+            )
+            results[name]["options"] = kwargs
+    return results
+
+
+def save(results, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=4)
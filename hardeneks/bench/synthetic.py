@@ -0,0 +1,598 @@
+import json
+import os
+import random
+
+from ..resources import CLUSTER_RESOURCES, NAMESPACED_RESOURCES
+
+# Sidecars injected next to the application container and the share of
+# pods carrying them, roughly what a service mesh plus a logging and a
+# monitoring agent look like in a production cluster.
+SIDECARS = [
+    ("istio-proxy", "docker.io/istio/proxyv2:1.20.3", 0.4),
+    ("fluent-bit", "public.ecr.aws/aws-observability/fluent-bit:2.31", 0.2),
+    ("datadog-agent", "gcr.io/datadoghq/agent:7.50.3", 0.1),
+    ("cloud-sql-proxy", "gcr.io/cloud-sql-connectors/proxy:2.8.1", 0.05),
+]
+
+SCENARIOS = {
+    "small": {"namespaces": 10, "pods": 200},
+    "medium": {"namespaces": 1000, "pods": 20000},
+    "large": {"namespaces": 10000, "pods": 100000},
+}
+
+_KINDS = {
+    "cluster_roles": ("rbac.authorization.k8s.io/v1", "ClusterRoleList"),
+    "cluster_role_bindings": (
+        "rbac.authorization.k8s.io/v1",
+        "ClusterRoleBindingList",
+    ),
+    "resource_quotas": ("v1", "ResourceQuotaList"),
+    "network_policies": ("networking.k8s.io/v1", "NetworkPolicyList"),
+    "storage_classes": ("storage.k8s.io/v1", "StorageClassList"),
+    "persistent_volumes": ("v1", "PersistentVolumeList"),
+    "namespaces": ("v1", "NamespaceList"),
+    "nodes": ("v1", "NodeList"),
+    "roles": ("rbac.authorization.k8s.io/v1", "RoleList"),
+    "pods": ("v1", "PodList"),
+    "role_bindings": ("rbac.authorization.k8s.io/v1", "RoleBindingList"),
+    "deployments": ("apps/v1", "DeploymentList"),
+    "daemon_sets": ("apps/v1", "DaemonSetList"),
+    "stateful_sets": ("apps/v1", "StatefulSetList"),
+    "services": ("v1", "ServiceList"),
+    "service_accounts": ("v1", "ServiceAccountList"),
+    "hpas": ("autoscaling/v1", "HorizontalPodAutoscalerList"),
+}
+
+# Cluster wide lists written next to the namespaced ones.
+CLUSTER_LISTS = list(CLUSTER_RESOURCES) + ["namespaces"]
+
+
+def response_file(attr):
+    """
+    Name of the recorded LIST response of a resource, as in tests/data.
+    """
+    if attr == "hpas":
+        return "horizontal_pod_autoscaler_api_response.json"
+    return f"{attr}_api_response.json"
+
+
+def list_response(attr, items, resource_version="1", _continue=None):
+    """
+    Render a LIST response body, one item per line.
+
+    Keeping items on lines of their own lets `load` split a recording by
+    namespace without parsing the whole document at once.
+    """
+    api_version, kind = _KINDS[attr]
+    metadata = {"resourceVersion": resource_version}
+    if _continue:
+        metadata["continue"] = _continue
+    head = json.dumps(
+        {"apiVersion": api_version, "kind": kind, "metadata": metadata}
+    )
+    body = ",\n".join(
+        i if isinstance(i, str) else json.dumps(i) for i in items
+    )
+    return f'{head[:-1]}, "items": [\n{body}\n]}}\n'
+
+
+def _metadata(name, namespace=None, labels=None, annotations=None):
+    metadata = {
+        "name": name,
+        "uid": f"{namespace or 'cluster'}-{name}",
+        "resourceVersion": "1",
+        "creationTimestamp": "2024-01-01T00:00:00Z",
+        "labels": labels or {},
+    }
+    if namespace:
+        metadata["namespace"] = namespace
+    if annotations:
+        metadata["annotations"] = annotations
+    return metadata
+
+
+class SyntheticCluster:
+    """
+    Deterministic synthetic cluster at a configurable scale.
+
+    Pods are spread over namespaces with a long tail, the way a few
+    large services and many small ones share a real cluster. Each
+    namespace is generated on demand from the seed, so a scenario never
+    has to be held in memory as a whole.
+
+    Args:
+        namespaces (int): Number of application namespaces
+        pods (int): Total number of pods
+        seed (int): Seed of the generator
+    """
+
+    def __init__(self, namespaces, pods, seed=0):
+        self.seed = seed
+        self.namespaces = [f"ns-{i:05d}" for i in range(namespaces)]
+        weights = [1 / (rank + 1) ** 0.8 for rank in range(namespaces)]
+        total = sum(weights)
+        self.pod_counts = [int(pods * w / total) for w in weights]
+        for i in range(pods - sum(self.pod_counts)):
+            self.pod_counts[i % namespaces] += 1
+
+    @classmethod
+    def scenario(cls, name, seed=0):
+        return cls(seed=seed, **SCENARIOS[name])
+
+    def _random(self, index):
+        return random.Random(self.seed * 1_000_003 + index)
+
+    def _container(self, rng, name, image, hardened):
+        container = {
+            "name": name,
+            "image": image,
+            "ports": [{"containerPort": 8080, "protocol": "TCP"}],
+            "resources": {},
+            "securityContext": {
+                "allowPrivilegeEscalation": not hardened,
+                "readOnlyRootFilesystem": hardened,
+                "runAsNonRoot": hardened,
+            },
+        }
+        if rng.random() < 0.8:
+            container["resources"] = {
+                "requests": {"cpu": "100m", "memory": "128Mi"},
+                "limits": {"cpu": "500m", "memory": "512Mi"},
+            }
+        if rng.random() < 0.7:
+            container["livenessProbe"] = {
+                "httpGet": {"path": "/healthz", "port": 8080},
+                "periodSeconds": 10,
+            }
+            container["readinessProbe"] = {
+                "httpGet": {"path": "/ready", "port": 8080},
+                "periodSeconds": 5,
+            }
+        if rng.random() < 0.1:
+            container["env"] = [
+                {
+                    "name": "DB_PASSWORD",
+                    "valueFrom": {
+                        "secretKeyRef": {"name": "db", "key": "password"}
+                    },
+                }
+            ]
+        if rng.random() < 0.05:
+            container["securityContext"]["capabilities"] = {
+                "add": ["NET_ADMIN"]
+            }
+        if rng.random() < 0.02:
+            container["securityContext"]["privileged"] = True
+        return container
+
+    def _pod_spec(self, rng, app, service_account):
+        hardened = rng.random() < 0.6
+        containers = [
+            self._container(
+                rng, app, f"123456789012.dkr.ecr.us-east-1/{app}:1.0", hardened
+            )
+        ]
+        init_containers = []
+        for name, image, share in SIDECARS:
+            if rng.random() < share:
+                containers.append(self._container(rng, name, image, hardened))
+                if name == "istio-proxy":
+                    init_containers.append(
+                        {
+                            "name": "istio-init",
+                            "image": image,
+                            "resources": {},
+                            "securityContext": {
+                                "capabilities": {
+                                    "add": ["NET_ADMIN", "NET_RAW"]
+                                }
+                            },
+                        }
+                    )
+        spec = {
+            "serviceAccountName": service_account,
+            "containers": containers,
+            "initContainers": init_containers,
+            "volumes": [
+                {"name": "config", "configMap": {"name": f"{app}-config"}}
+            ],
+            "topologySpreadConstraints": [],
+        }
+        if rng.random() < 0.5:
+            spec["automountServiceAccountToken"] = False
+        if rng.random() < 0.5:
+            spec["topologySpreadConstraints"] = [
+                {
+                    "maxSkew": 1,
+                    "topologyKey": "topology.kubernetes.io/zone",
+                    "whenUnsatisfiable": "ScheduleAnyway",
+                    "labelSelector": {"matchLabels": {"app": app}},
+                }
+            ]
+        if rng.random() < 0.01:
+            spec["volumes"].append(
+                {
+                    "name": "docker",
+                    "hostPath": {"path": "/var/run/docker.sock"},
+                }
+            )
+        elif rng.random() < 0.03:
+            spec["volumes"].append(
+                {"name": "logs", "hostPath": {"path": "/var/log"}}
+            )
+        return spec
+
+    def _workload(self, namespace, name, spec, replicas, labels):
+        return {
+            "metadata": _metadata(name, namespace, labels),
+            "spec": {
+                "replicas": replicas,
+                "selector": {"matchLabels": labels},
+                "template": {"metadata": {"labels": labels}, "spec": spec},
+            },
+            "status": {"replicas": replicas, "readyReplicas": replicas},
+        }
+
+    def namespace_items(self, index):
+        """
+        Generate the namespaced resources of one namespace.
+
+        Args:
+            index (int): Position of the namespace in `namespaces`
+
+        Returns:
+            dict: attribute name -> list of items
+
+        """
+        rng = self._random(index)
+        namespace = self.namespaces[index]
+        pods_left = self.pod_counts[index]
+        items = {attr: [] for attr in NAMESPACED_RESOURCES}
+
+        items["service_accounts"].append(
+            {
+                "metadata": _metadata("default", namespace),
+                "automountServiceAccountToken": rng.random() < 0.5,
+            }
+        )
+        apps = 0
+        while pods_left > 0:
+            app = f"app-{apps}"
+            apps += 1
+            replicas = min(pods_left, rng.choice([1, 2, 3, 3, 5, 10]))
+            pods_left -= replicas
+            labels = {"app": app}
+            service_account = "default"
+            if rng.random() < 0.7:
+                service_account = app
+                items["service_accounts"].append(
+                    {"metadata": _metadata(app, namespace)}
+                )
+            spec = self._pod_spec(rng, app, service_account)
+            kind = "deployments"
+            if rng.random() < 0.1:
+                kind = "stateful_sets"
+            workload = self._workload(namespace, app, spec, replicas, labels)
+            if kind == "stateful_sets":
+                workload["spec"]["serviceName"] = app
+            items[kind].append(workload)
+            for replica in range(replicas):
+                items["pods"].append(
+                    {
+                        "metadata": _metadata(
+                            f"{app}-{replica}", namespace, labels
+                        ),
+                        "spec": spec,
+                        "status": {"phase": "Running"},
+                    }
+                )
+            service = {
+                "metadata": _metadata(app, namespace, labels),
+                "spec": {
+                    "type": "ClusterIP",
+                    "selector": labels,
+                    "ports": [{"port": 80, "targetPort": 8080}],
+                },
+            }
+            if rng.random() < 0.05:
+                service["spec"]["type"] = "LoadBalancer"
+                if rng.random() < 0.5:
+                    service["metadata"]["annotations"] = {
+                        "service.beta.kubernetes.io/aws-load-balancer-ssl-cert": (
+                            "arn:aws:acm:us-east-1:123456789012:certificate/x"
+                        ),
+                        "service.beta.kubernetes.io/aws-load-balancer-ssl-ports": (
+                            "443"
+                        ),
+                    }
+            items["services"].append(service)
+            if kind == "deployments" and rng.random() < 0.5:
+                items["hpas"].append(
+                    {
+                        "metadata": _metadata(app, namespace),
+                        "spec": {
+                            "scaleTargetRef": {
+                                "apiVersion": "apps/v1",
+                                "kind": "Deployment",
+                                "name": app,
+                            },
+                            "minReplicas": replicas,
+                            "maxReplicas": replicas * 3,
+                            "targetCPUUtilizationPercentage": 70,
+                        },
+                    }
+                )
+
+        if index % 20 == 0:
+            spec = self._pod_spec(rng, "node-agent", "node-agent")
+            items["daemon_sets"].append(
+                {
+                    "metadata": _metadata(
+                        "node-agent", namespace, {"app": "node-agent"}
+                    ),
+                    "spec": {
+                        "selector": {"matchLabels": {"app": "node-agent"}},
+                        "template": {
+                            "metadata": {"labels": {"app": "node-agent"}},
+                            "spec": spec,
+                        },
+                    },
+                }
+            )
+        verbs = ["get", "list", "watch"]
+        if rng.random() < 0.1:
+            verbs = ["*"]
+        items["roles"].append(
+            {
+                "metadata": _metadata("reader", namespace),
+                "rules": [
+                    {
+                        "apiGroups": [""],
+                        "resources": ["configmaps", "pods"],
+                        "verbs": verbs,
+                    }
+                ],
+            }
+        )
+        subject = {
+            "kind": "ServiceAccount",
+            "name": "default",
+            "namespace": namespace,
+        }
+        if rng.random() < 0.02:
+            subject = {
+                "kind": "Group",
+                "name": "system:unauthenticated",
+                "apiGroup": "rbac.authorization.k8s.io",
+            }
+        items["role_bindings"].append(
+            {
+                "metadata": _metadata("reader", namespace),
+                "roleRef": {
+                    "apiGroup": "rbac.authorization.k8s.io",
+                    "kind": "Role",
+                    "name": "reader",
+                },
+                "subjects": [subject],
+            }
+        )
+        return items
+
+    def cluster_items(self):
+        """
+        Generate the cluster wide resources and the namespace list.
+
+        Returns:
+            dict: attribute name -> list of items
+
+        """
+        rng = self._random(-1)
+        items = {attr: [] for attr in CLUSTER_LISTS}
+        for i, namespace in enumerate(self.namespaces):
+            labels = {"kubernetes.io/metadata.name": namespace}
+            if rng.random() < 0.5:
+                labels["pod-security.kubernetes.io/enforce"] = "baseline"
+            items["namespaces"].append(
+                {
+                    "metadata": _metadata(namespace, labels=labels),
+                    "status": {"phase": "Active"},
+                }
+            )
+            if rng.random() < 0.5:
+                items["resource_quotas"].append(
+                    {
+                        "metadata": _metadata("quota", namespace),
+                        "spec": {"hard": {"pods": "100", "cpu": "20"}},
+                    }
+                )
+            if rng.random() < 0.6:
+                items["network_policies"].append(
+                    {
+                        "metadata": _metadata("default-deny", namespace),
+                        "spec": {
+                            "podSelector": {},
+                            "policyTypes": ["Ingress", "Egress"],
+                        },
+                    }
+                )
+        for i in range(50 + len(self.namespaces) // 100):
+            verbs = ["get", "list", "watch"]
+            if i % 25 == 0:
+                verbs = ["*"]
+            items["cluster_roles"].append(
+                {
+                    "metadata": _metadata(f"cluster-role-{i}"),
+                    "rules": [
+                        {
+                            "apiGroups": [""],
+                            "resources": ["pods", "nodes"],
+                            "verbs": verbs,
+                        }
+                    ],
+                }
+            )
+            items["cluster_role_bindings"].append(
+                {
+                    "metadata": _metadata(f"cluster-role-{i}"),
+                    "roleRef": {
+                        "apiGroup": "rbac.authorization.k8s.io",
+                        "kind": "ClusterRole",
+                        "name": f"cluster-role-{i}",
+                    },
+                    "subjects": [
+                        {
+                            "kind": "ServiceAccount",
+                            "name": "default",
+                            "namespace": self.namespaces[
+                                i % len(self.namespaces)
+                            ],
+                        }
+                    ],
+                }
+            )
+        for name, provisioner, parameters in [
+            ("gp3", "ebs.csi.aws.com", {"type": "gp3", "encrypted": "true"}),
+            ("gp2", "kubernetes.io/aws-ebs", {"type": "gp2"}),
+            (
+                "efs",
+                "efs.csi.aws.com",
+                {"provisioningMode": "efs-ap", "fileSystemId": "fs-1"},
+            ),
+        ]:
+            items["storage_classes"].append(
+                {
+                    "metadata": _metadata(name),
+                    "provisioner": provisioner,
+                    "parameters": parameters,
+                }
+            )
+        for i in range(len(self.namespaces)):
+            if rng.random() < 0.1:
+                items["persistent_volumes"].append(
+                    {
+                        "metadata": _metadata(f"pv-{i}"),
+                        "spec": {
+                            "capacity": {"storage": "10Gi"},
+                            "accessModes": ["ReadWriteOnce"],
+                            "storageClassName": "gp3",
+                            "csi": {
+                                "driver": "ebs.csi.aws.com",
+                                "volumeHandle": f"vol-{i:08x}",
+                            },
+                        },
+                    }
+                )
+        return items
+
+    def raw_cluster(self):
+        """
+        Cluster wide LIST responses, as `Resources.set_raw_resources`
+        takes them.
+        """
+        return {
+            attr: list_response(attr, items)
+            for attr, items in self.cluster_items().items()
+        }
+
+    def raw_namespace(self, index):
+        """
+        LIST responses of one namespace, as
+        `NamespacedResources.set_raw_resources` takes them.
+        """
+        return {
+            attr: list_response(attr, items)
+            for attr, items in self.namespace_items(index).items()
+        }
+
+    def write(self, directory):
+        """
+        Record the cluster as `*_api_response.json` files.
+
+        The layout is the one of a tests/data fixture: `<directory>/cluster`
+        holds one LIST response per resource, namespaced resources of all
+        namespaces included. Namespaces are written one at a time.
+
+        Args:
+            directory (str): Output directory
+
+        Returns:
+            str: Path of the `cluster` directory
+
+        """
+        path = os.path.join(directory, "cluster")
+        os.makedirs(path, exist_ok=True)
+        for attr, items in self.cluster_items().items():
+            with open(os.path.join(path, response_file(attr)), "w") as f:
+                f.write(list_response(attr, items))
+
+        files = {}
+        try:
+            for attr in NAMESPACED_RESOURCES:
+                files[attr] = open(
+                    os.path.join(path, response_file(attr)), "w"
+                )
+                api_version, kind = _KINDS[attr]
+                head = json.dumps(
+                    {
+                        "apiVersion": api_version,
+                        "kind": kind,
+                        "metadata": {"resourceVersion": "1"},
+                    }
+                )
+                files[attr].write(f'{head[:-1]}, "items": [')
+            first = dict.fromkeys(NAMESPACED_RESOURCES, True)
+            for index in range(len(self.namespaces)):
+                for attr, items in self.namespace_items(index).items():
+                    for item in items:
+                        separator = "\n" if first[attr] else ",\n"
+                        first[attr] = False
+                        files[attr].write(separator + json.dumps(item))
+            for f in files.values():
+                f.write("\n]}\n")
+        finally:
+            for f in files.values():
+                f.close()
+        return path
+
+
+def load(directory):
+    """
+    Read a recording made by `SyntheticCluster.write` back as raw LIST
+    responses.
+
+    Args:
+        directory (str): Directory given to `write`
+
+    Returns:
+        tuple: cluster wide attribute -> raw response, and namespace ->
+            attribute -> raw response
+
+    """
+    path = os.path.join(directory, "cluster")
+    cluster_raw = {}
+    for attr in CLUSTER_LISTS:
+        with open(os.path.join(path, response_file(attr))) as f:
+            cluster_raw[attr] = f.read()
+
+    namespaces = [
+        i["metadata"]["name"]
+        for i in json.loads(cluster_raw["namespaces"])["items"]
+    ]
+    lines = {
+        ns: {attr: [] for attr in NAMESPACED_RESOURCES} for ns in namespaces
+    }
+    for attr in NAMESPACED_RESOURCES:
+        with open(os.path.join(path, response_file(attr))) as f:
+            next(f)
+            for line in f:
+                line = line.rstrip().rstrip(",")
+                if not line.startswith("{"):
+                    continue
+                namespace = json.loads(line)["metadata"]["namespace"]
+                lines[namespace][attr].append(line)
+
+    namespaced_raw = {
+        ns: {attr: list_response(attr, items) for attr, items in attrs.items()}
+        for ns, attrs in lines.items()
+    }
+    return cluster_raw, namespaced_raw
@@ -1,50 +1,14 @@
-import boto3
 from kubernetes import client
 
 from hardeneks.rules import Rule, Result
 from ...resources import Resources
 
 
-def _get_policy_documents_for_role(role_name, iam_client):
-    attached_policies = iam_client.list_attached_role_policies(
-        RoleName=role_name
-    )["AttachedPolicies"]
-    inline_policies = iam_client.list_role_policies(RoleName=role_name)[
-        "PolicyNames"
-    ]
-    actions = []
-    for policy_arn in [x["PolicyArn"] for x in attached_policies]:
-        version_id = iam_client.get_policy(PolicyArn=policy_arn)["Policy"][
-            "DefaultVersionId"
-        ]
-        response = iam_client.get_policy_version(
-            PolicyArn=policy_arn, VersionId=version_id
-        )["PolicyVersion"]["Document"]["Statement"]
-        for statement in response:
-            if statement.get("Effect") == "Allow":
-                action = statement.get("Action")
-                if isinstance(action, str):
-                    actions.append(action)
-                elif isinstance(action, list):
-                    actions.extend(action)
-    for policy_name in inline_policies:
-        response = iam_client.get_role_policy(
-            RoleName=role_name, PolicyName=policy_name
-        )["PolicyDocument"]["Statement"]
-        for statement in response:
-            if statement.get("Effect") == "Allow":
-                action = statement.get("Action")
-                if isinstance(action, str):
-                    actions.append(action)
-                elif isinstance(action, list):
-                    actions.extend(action)
-    return actions
-
-
 class check_any_cluster_autoscaler_exists(Rule):
     _type = "cluster_wide"
     pillar = "cluster_autoscaling"
     section = "cluster_autoscaler"
+    severity = "MEDIUM"
     message = "Cluster Autoscaler or Karpenter is not deployed."
     url = "https://aws.github.io/aws-eks-best-practices/cluster-autoscaling/"
 
@@ -66,14 +30,12 @@ class ensure_cluster_autoscaler_and_cluster_versions_match(Rule):
     _type = "cluster_wide"
     pillar = "cluster_autoscaling"
     section = "cluster_autoscaler"
+    severity = "MEDIUM"
     message = "Cross version compatibility between CA and k8s is not recommended."
     url = "https://aws.github.io/aws-eks-best-practices/cluster-autoscaling/#operating-the-cluster-autoscaler"
 
     def check(self, resources):
-        eks_client = boto3.client("eks", region_name=resources.region)
-        cluster_metadata = eks_client.describe_cluster(name=resources.cluster)
-
-        cluster_version = cluster_metadata["cluster"]["version"]
+        cluster_version = resources.aws.get("cluster")["version"]
 
         deployments = (
             client.AppsV1Api().list_deployment_for_all_namespaces().items
@@ -95,6 +57,7 @@ class ensure_cluster_autoscaler_has_autodiscovery_mode(Rule):
     _type = "cluster_wide"
     pillar = "cluster_autoscaling"
     section = "cluster_autoscaler"
+    severity = "LOW"
     message = "Auto discovery is not enabled for Cluster Autoscaler."
     url = "https://aws.github.io/aws-eks-best-practices/cluster-autoscaling/#operating-the-cluster-autoscaler"
 
@@ -118,6 +81,7 @@ class use_separate_iam_role_for_cluster_autoscaler(Rule):
     _type = "cluster_wide"
     pillar = "cluster_autoscaling"
     section = "cluster_autoscaler"
+    severity = "MEDIUM"
     message = "Cluster-autoscaler deployment does not use a dedicated IAM Role (IRSA)."
     url = "https://aws.github.io/aws-eks-best-practices/cluster-autoscaling/#employ-least-privileged-access-to-the-iam-role"
 
@@ -141,12 +105,11 @@ class use_separate_iam_role_for_cluster_autoscaler(Rule):
 
                 # Check for Pod Identity
                 try:
-                    eks_client = boto3.client("eks", region_name=resources.region)
-                    pod_identity_associations = eks_client.list_pod_identity_associations(
-                        clusterName=resources.cluster
+                    pod_identity_associations = resources.aws.get(
+                        "pod_identity_associations"
                     )
-                    
-                    for association in pod_identity_associations.get("associations", []):
+
+                    for association in pod_identity_associations:
                         if (
                             association.get("namespace") == sa_namespace
                             and association.get("serviceAccount") == service_account_name
@@ -168,12 +131,12 @@ class employ_least_privileged_access_cluster_autoscaler_role(Rule):
     _type = "cluster_wide"
     pillar = "cluster_autoscaling"
     section = "cluster_autoscaler"
+    severity = "MEDIUM"
     message = "Cluster autoscaler role has unnecessary actions assigned."
     url = "https://aws.github.io/aws-eks-best-practices/cluster-autoscaling/#employ-least-privileged-access-to-the-iam-role"
 
     def check(self, resources):
         deployments = client.AppsV1Api().list_deployment_for_all_namespaces().items
-        iam_client = boto3.client("iam", region_name=resources.region)
 
         ACTIONS = {
             "autoscaling:DescribeAutoScalingGroups",
@@ -198,20 +161,19 @@ class employ_least_privileged_access_cluster_autoscaler_role(Rule):
 
                 # Check for Pod Identity first
                 try:
-                    eks_client = boto3.client("eks", region_name=resources.region)
-                    pod_identity_associations = eks_client.list_pod_identity_associations(
-                        clusterName=resources.cluster
+                    pod_identity_associations = resources.aws.get(
+                        "pod_identity_associations"
                     )
-                    
-                    for association in pod_identity_associations.get("associations", []):
+
+                    for association in pod_identity_associations:
                         if (
                             association.get("namespace") == sa_namespace
                             and association.get("serviceAccount") == service_account_name
                         ):
-                            describe_identity_association = eks_client.describe_pod_identity_association(
-                                clusterName=resources.cluster, associationId=association.get("associationId")
-                            )
-                            role_arn = describe_identity_association.get("association", {}).get("roleArn")
+                            role_arn = resources.aws.get(
+                                "pod_identity_association",
+                                association.get("associationId"),
+                            ).get("roleArn")
                             break
                 except Exception:
                     pass
@@ -228,7 +190,7 @@ class employ_least_privileged_access_cluster_autoscaler_role(Rule):
         # If we found a role (either Pod Identity or IRSA), check permissions
         if role_arn:
             role_name = role_arn.split("/")[-1]
-            actions = _get_policy_documents_for_role(role_name, iam_client)
+            actions = resources.aws.get("role_actions", role_name)
 
             if len(set(actions) - ACTIONS) > 0:
                 self.result = Result(
@@ -242,6 +204,7 @@ class use_managed_nodegroups(Rule):
     _type = "cluster_wide"
     pillar = "cluster_autoscaling"
     section = "cluster_autoscaler"
+    severity = "LOW"
     message = "Nodes are recommended to be part of a managed node group."
     url = "https://aws.github.io/aws-eks-best-practices/cluster-autoscaling/#configuring-your-node-groups"
 
@@ -8,6 +8,7 @@ class check_metrics_server_is_running(Rule):
     _type = "cluster_wide"
     pillar = "reliability"
     section = "applications"
+    severity = "MEDIUM"
     message = "Metrics server is not deployed."
     url = "https://aws.github.io/aws-eks-best-practices/reliability/docs/application/#run-kubernetes-metrics-server"
 
@@ -27,6 +28,7 @@ class check_vertical_pod_autoscaler_exists(Rule):
     _type = "cluster_wide"
     pillar = "reliability"
     section = "applications"
+    severity = "LOW"
     message = "Vertical pod autoscaler is not deployed."
     url = "https://aws.github.io/aws-eks-best-practices/reliability/docs/application/#run-kubernetes-metrics-server"
 
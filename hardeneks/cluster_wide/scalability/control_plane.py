@@ -1,27 +1,24 @@
 import re
-import boto3
 import kubernetes
 from hardeneks import helpers
 from hardeneks.rules import Rule, Result
-from hardeneks import Resources
+from hardeneks.resources import Resources
 
 
 class check_EKS_version(Rule):
     _type = "cluster_wide"
     pillar = "scalability"
     section = "control_plane"
+    severity = "HIGH"
     message = "EKS Version should be in standard support."
     url = "https://aws.github.io/aws-eks-best-practices/scalability/docs/control-plane/"
 
     def check(self, resources: Resources):
-        eks_client = boto3.client("eks", region_name=resources.region)
-
-        cluster_version = eks_client.describe_cluster(name=resources.cluster)["cluster"]["version"]
+        cluster_version = resources.aws.get("cluster")["version"]
         # Get versions in standard support
-        cluster_versions_response = eks_client.describe_cluster_versions()
         standard_support_versions = [
-            v["clusterVersion"] 
-            for v in cluster_versions_response.get("clusterVersions", [])
+            v["clusterVersion"]
+            for v in resources.aws.get("cluster_versions")
             if v.get("versionStatus") == "STANDARD_SUPPORT"
         ]
 
@@ -42,6 +39,7 @@ class check_kubectl_compression(Rule):
     _type = "cluster_wide"
     pillar = "scalability"
     section = "control_plane"
+    severity = "INFORMATIONAL"
     message = "`disable-compression` in kubeconfig should equal True"
     url = "https://aws.github.io/aws-eks-best-practices/scalability/docs/control-plane/#disable-kubectl-compression"
 
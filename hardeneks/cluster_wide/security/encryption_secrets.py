@@ -6,6 +6,7 @@ class use_encryption_with_ebs(Rule):
     _type = "cluster_wide"
     pillar = "security"
     section = "encryption_secrets"
+    severity = "HIGH"
     message = "EBS Storage Classes should have encryption parameter."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/data/#encryption-at-rest"
 
@@ -38,6 +39,7 @@ class use_encryption_with_efs(Rule):
     _type = "cluster_wide"
     pillar = "security"
     section = "encryption_secrets"
+    severity = "HIGH"
     message = "EFS Persistent volumes should have encryptInTransit enabled."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/data/#encryption-at-rest"
 
@@ -67,6 +69,7 @@ class use_efs_access_points(Rule):
     _type = "cluster_wide"
     pillar = "security"
     section = "encryption_secrets"
+    severity = "MEDIUM"
     message = "EFS Persistent volumes should leverage access points."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/data/#use-efs-access-points-to-simplify-access-to-shared-datasets"
 
@@ -1,4 +1,3 @@
-import boto3
 from kubernetes import client
 
 from hardeneks.rules import Rule, Result
@@ -9,6 +8,7 @@ class restrict_wildcard_for_cluster_roles(Rule):
     _type = "cluster_wide"
     pillar = "security"
     section = "iam"
+    severity = "HIGH"
     message = "ClusterRoles should not have '*' in Verbs or Resources."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/iam/#employ-least-privileged-access-when-creating-rolebindings-and-clusterrolebindings"
 
@@ -49,13 +49,13 @@ class check_endpoint_public_access(Rule):
     _type = "cluster_wide"
     pillar = "security"
     section = "iam"
+    severity = "HIGH"
     message = "EKS Cluster Endpoint is Public."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/iam/#make-the-eks-cluster-endpoint-private"
 
     def check(self, resources: Resources):
-        client = boto3.client("eks", region_name=resources.region)
-        cluster_metadata = client.describe_cluster(name=resources.cluster)
-        endpoint_access = cluster_metadata["cluster"]["resourcesVpcConfig"][
+        cluster_metadata = resources.aws.get("cluster")
+        endpoint_access = cluster_metadata["resourcesVpcConfig"][
             "endpointPublicAccess"
         ]
         self.result = Result(status=True, resource_type="Cluster Endpoint")
@@ -70,6 +70,7 @@ class check_aws_node_daemonset_service_account(Rule):
     _type = "cluster_wide"
     pillar = "security"
     section = "iam"
+    severity = "MEDIUM"
     message = "aws-node daemonset should use IRSA or EKS Pod Identity."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/iam/#update-the-aws-node-daemonset-to-use-irsa"
 
@@ -89,12 +90,11 @@ class check_aws_node_daemonset_service_account(Rule):
 
         # Check for Pod Identity
         try:
-            eks_client = boto3.client("eks", region_name=resources.region)
-            pod_identity_associations = eks_client.list_pod_identity_associations(
-                clusterName=resources.cluster
+            pod_identity_associations = resources.aws.get(
+                "pod_identity_associations"
             )
-            
-            for association in pod_identity_associations.get("associations", []):
+
+            for association in pod_identity_associations:
                 if (
                     association.get("namespace") == "kube-system"
                     and association.get("serviceAccount") == service_account_name
@@ -116,33 +116,20 @@ class check_access_to_instance_profile(Rule):
     _type = "cluster_wide"
     pillar = "security"
     section = "iam"
+    severity = "HIGH"
     message = "Restrict access to the instance profile assigned to nodes."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/iam/#restrict-access-to-the-instance-profile-assigned-to-the-worker-node"
 
     def check(self, resources: Resources):
-        client = boto3.client("ec2", region_name=resources.region)
         offenders = []
 
-        paginator = client.get_paginator('describe_instances')
-        page_iterator = paginator.paginate(PaginationConfig={'PageSize': 1000},
-            Filters=[
-                {
-                    "Name": "tag:aws:eks:cluster-name",
-                    "Values": [
-                        resources.cluster,
-                    ],
-                },
-            ]
-        )
+        for reservation in resources.aws.get("instances"):
+            metadata_options = reservation["Instances"][0]["MetadataOptions"]
+            hop_limit = metadata_options["HttpPutResponseHopLimit"]
+            http_tokens = metadata_options.get("HttpTokens", "optional")
 
-        for page in page_iterator:
-            for reservation in page["Reservations"]:
-                metadata_options = reservation["Instances"][0]["MetadataOptions"]
-                hop_limit = metadata_options["HttpPutResponseHopLimit"]
-                http_tokens = metadata_options.get("HttpTokens", "optional")
-                
-                if hop_limit != 1 or http_tokens != "required":
-                    offenders.append(reservation)
+            if hop_limit != 1 or http_tokens != "required":
+                offenders.append(reservation)
 
         self.result = Result(status=True, resource_type="Node")
 
@@ -158,6 +145,7 @@ class disable_anonymous_access_for_cluster_roles(Rule):
     _type = "cluster_wide"
     pillar = "security"
     section = "iam"
+    severity = "CRITICAL"
     message = "Don't bind clusterroles to anonymous/unauthenticated groups."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/iam/#review-and-revoke-unnecessary-anonymous-access"
 
@@ -1,5 +1,3 @@
-import boto3
-
 from ...resources import Resources
 from hardeneks.rules import Rule, Result
 
@@ -8,19 +6,16 @@ class use_immutable_tags_with_ecr(Rule):
     _type = "cluster_wide"
     pillar = "security"
     section = "image_security"
+    severity = "MEDIUM"
     message = "Make image tags immutable."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/image/#use-immutable-tags-with-ecr"
 
     def check(self, resources: Resources):
         offenders = []
 
-        client = boto3.client("ecr", region_name=resources.region)
-        paginator = client.get_paginator('describe_repositories')
-        
-        for page in paginator.paginate(PaginationConfig={'PageSize': 1000}):
-            for repository in page["repositories"]:
-                if repository["imageTagMutability"] != "IMMUTABLE":
-                    offenders.append(repository)
+        for repository in resources.aws.get("repositories"):
+            if repository["imageTagMutability"] != "IMMUTABLE":
+                offenders.append(repository)
 
         self.result = Result(status=True, resource_type="ECR Repository")
         if offenders:
@@ -1,5 +1,3 @@
-import boto3
-
 from ...resources import Resources
 from hardeneks.rules import Rule, Result
 
@@ -8,29 +6,16 @@ class deploy_workers_onto_private_subnets(Rule):
     _type = "cluster_wide"
     pillar = "security"
     section = "infrastructure_security"
+    severity = "HIGH"
     message = "Place worker nodes on private subnets."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/hosts/#deploy-workers-onto-private-subnets"
 
     def check(self, resources: Resources):
-        client = boto3.client("ec2", region_name=resources.region)
         offenders = []
-        
-        paginator = client.get_paginator('describe_instances')
-        page_iterator = paginator.paginate(PaginationConfig={'PageSize': 1000},
-            Filters=[
-                {
-                    "Name": "tag:aws:eks:cluster-name",
-                    "Values": [
-                        resources.cluster,
-                    ],
-                },
-            ]
-        )
 
-        for page in page_iterator:
-            for reservation in page["Reservations"]:
-                if reservation["Instances"][0]["PublicDnsName"]:
-                    offenders.append(reservation["Instances"][0]["InstanceId"])
+        for reservation in resources.aws.get("instances"):
+            if reservation["Instances"][0]["PublicDnsName"]:
+                offenders.append(reservation["Instances"][0]["InstanceId"])
 
         self.result = Result(status=True, resource_type="Node")
 
@@ -44,22 +29,12 @@ class make_sure_inspector_is_enabled(Rule):
     _type = "cluster_wide"
     pillar = "security"
     section = "infrastructure_security"
+    severity = "MEDIUM"
     message = "Enable Amazon Inspector for ec2 and ecr."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/hosts/#run-amazon-inspector-to-assess-hosts-for-exposure-vulnerabilities-and-deviations-from-best-practices"
 
     def check(self, resources: Resources):
-        client = boto3.client("inspector2", region_name=resources.region)
-        account_id = boto3.client(
-            "sts", region_name=resources.region
-        ).get_caller_identity()["Account"]
-
-        response = client.batch_get_account_status(
-            accountIds=[
-                account_id,
-            ]
-        )
-
-        resource_state = response["accounts"][0]["resourceState"]
+        resource_state = resources.aws.get("inspector_status")
         ec2_status = resource_state["ec2"]["status"]
         ecr_status = resource_state["ecr"]["status"]
 
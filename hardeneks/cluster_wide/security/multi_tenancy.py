@@ -6,6 +6,7 @@ class ensure_namespace_quotas_exist(Rule):
     _type = "cluster_wide"
     pillar = "security"
     section = "multi_tenancy"
+    severity = "MEDIUM"
     message = "Namespaces should have quotas assigned."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/multitenancy/#namespaces"
 
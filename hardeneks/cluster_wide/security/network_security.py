@@ -1,4 +1,3 @@
-import boto3
 from kubernetes import client
 
 from ...resources import Resources
@@ -9,19 +8,12 @@ class check_vpc_flow_logs(Rule):
     _type = "cluster_wide"
     pillar = "security"
     section = "network_security"
+    severity = "MEDIUM"
     message = "Enable flow logs for your VPC."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/network/#log-network-traffic-metadata"
 
     def check(self, resources: Resources):
-        client = boto3.client("eks", region_name=resources.region)
-        cluster_metadata = client.describe_cluster(name=resources.cluster)
-
-        vpc_id = cluster_metadata["cluster"]["resourcesVpcConfig"]["vpcId"]
-        client = boto3.client("ec2", region_name=resources.region)
-
-        flow_logs = client.describe_flow_logs(
-            Filters=[{"Name": "resource-id", "Values": [vpc_id]}]
-        )["FlowLogs"]
+        flow_logs = resources.aws.get("flow_logs")
 
         self.result = Result(status=True, resource_type="VPC Configuration")
         if not flow_logs:
@@ -34,6 +26,7 @@ class check_awspca_exists(Rule):
     _type = "cluster_wide"
     pillar = "security"
     section = "network_security"
+    severity = "LOW"
     message = "Install aws privateca issuer for your certificates."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/network/#acm-private-ca-with-cert-manager"
 
@@ -55,6 +48,7 @@ class check_default_deny_policy_exists(Rule):
     _type = "cluster_wide"
     pillar = "security"
     section = "network_security"
+    severity = "HIGH"
     message = "Namespaces that does not have default network deny policies."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/network/#create-a-default-deny-policy"
 
@@ -0,0 +1,124 @@
+import datetime
+
+from .findings import findings
+
+try:
+    import pyarrow
+    from pyarrow import ipc, parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+# Rows per record batch of the written file.
+BATCH = 64 * 1024
+
+# Column -> whether it is dictionary encoded. Only resources are mostly
+# distinct, the other columns repeat a handful of values.
+COLUMNS = [
+    ("cluster", True),
+    ("namespace", True),
+    ("pillar", True),
+    ("section", True),
+    ("rule", True),
+    ("severity", True),
+    ("status", True),
+    ("resource", False),
+    ("resource_type", True),
+    ("url", True),
+]
+
+
+def require():
+    """
+    Raise ImportError when pyarrow is not installed.
+    """
+    if pyarrow is None:
+        raise ImportError(
+            "Columnar exports require pyarrow. "
+            "Install it with `pip install hardeneks[columnar]`."
+        )
+
+
+def schema():
+    fields = [
+        pyarrow.field(
+            name,
+            (
+                pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+                if dictionary
+                else pyarrow.string()
+            ),
+        )
+        for name, dictionary in COLUMNS
+    ]
+    fields.append(
+        pyarrow.field("scanned_at", pyarrow.timestamp("s", tz="UTC"))
+    )
+    return pyarrow.schema(fields)
+
+
+def table(rules, cluster, scanned_at=None):
+    """
+    Findings of rule results as an Arrow table, one row per (rule,
+    namespace, resource).
+
+    Args:
+        rules (list): Rule results
+        cluster (str): Cluster name
+        scanned_at (datetime.datetime): Time of the scan, now by default
+
+    Returns:
+        pyarrow.Table: Table with the columns of `schema()`
+
+    """
+    require()
+    if scanned_at is None:
+        scanned_at = datetime.datetime.now(datetime.timezone.utc)
+    columns = {name: [] for name, _ in COLUMNS}
+    for rule in rules:
+        for finding in findings(rule, cluster):
+            finding["url"] = finding["resolution"]
+            for name, values in columns.items():
+                values.append(finding[name])
+    rows = len(columns["cluster"])
+    arrays = [
+        (
+            pyarrow.array(columns[name], pyarrow.string()).dictionary_encode()
+            if dictionary
+            else pyarrow.array(columns[name], pyarrow.string())
+        )
+        for name, dictionary in COLUMNS
+    ]
+    arrays.append(
+        pyarrow.array(
+            [scanned_at.replace(microsecond=0)] * rows,
+            pyarrow.timestamp("s", tz="UTC"),
+        )
+    )
+    return pyarrow.Table.from_arrays(arrays, schema=schema())
+
+
+def write(findings_table, path, _format="parquet"):
+    """
+    Write a table of findings to a Parquet or Arrow IPC file.
+
+    Args:
+        findings_table (pyarrow.Table): Output of `table`
+        path (str): File to write
+        _format (str): parquet or arrow
+
+    Returns:
+        None
+
+    """
+    if _format == "parquet":
+        parquet.write_table(
+            findings_table,
+            path,
+            row_group_size=BATCH,
+            compression="zstd",
+        )
+    elif _format == "arrow":
+        with ipc.new_file(path, findings_table.schema) as writer:
+            writer.write_table(findings_table, max_chunksize=BATCH)
+    else:
+        raise ValueError(f"Unknown format {_format}")
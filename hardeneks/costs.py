@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+
+
+class CostModel:
+    """
+    Per-rule cost learned from previous runs, stored as a small JSON file.
+
+    Each rule keeps an exponentially weighted mean of its wall time and
+    API calls, so recent runs dominate without one outlier taking over.
+    """
+
+    alpha = 0.3
+
+    def __init__(self, path):
+        self.path = path
+        self.rules = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.rules = json.load(f).get("rules", {})
+
+    def cost(self, key):
+        # Rules never seen before are assumed expensive so they are
+        # measured early rather than stretching the tail of the run.
+        if key not in self.rules:
+            return float("inf")
+        return self.rules[key]["seconds"]
+
+    def order(self, keys, expensive_first=True):
+        """
+        Sort rule keys by learned cost.
+
+        Args:
+            keys (list): rule keys, see `rule_key`
+            expensive_first (bool): Longest first to minimize makespan
+                on a parallel executor, or cheapest first to fail fast
+
+        Returns:
+            list: sorted keys
+
+        """
+        if expensive_first:
+            return sorted(keys, key=self.cost, reverse=True)
+        return sorted(keys, key=lambda k: (k not in self.rules, self.cost(k)))
+
+    def record(self, key, seconds, api_calls):
+        with self._lock:
+            entry = self.rules.get(key)
+            if entry is None:
+                self.rules[key] = {
+                    "runs": 1,
+                    "seconds": seconds,
+                    "api_calls": api_calls,
+                }
+                return
+            entry["runs"] += 1
+            entry["seconds"] += self.alpha * (seconds - entry["seconds"])
+            entry["api_calls"] += self.alpha * (api_calls - entry["api_calls"])
+
+    def snapshot(self):
+        """
+        Copy of the learned costs, to order rules in a worker process,
+        see `Observations`.
+        """
+        with self._lock:
+            return {key: dict(entry) for key, entry in self.rules.items()}
+
+    def merge(self, observations):
+        """
+        Record (key, seconds, api_calls) observations of a worker process.
+        """
+        for observation in observations:
+            self.record(*observation)
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"rules": self.rules}, f, ensure_ascii=False, indent=4)
+
+
+class Observations(CostModel):
+    """
+    Costs in a worker process: rules are ordered by a snapshot of the
+    parent's model, and what they cost is kept to be merged back into it.
+
+    Args:
+        rules (dict): `CostModel.snapshot` of the parent's model
+    """
+
+    def __init__(self, rules):
+        self.path = None
+        self.rules = rules
+        self.observed = []
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds, api_calls):
+        with self._lock:
+            self.observed.append((key, seconds, api_calls))
+
+
+def rule_key(_type, pillar, section, rule):
+    return f"{_type}.{pillar}.{section}.{rule}"
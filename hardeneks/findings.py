@@ -0,0 +1,93 @@
+import datetime
+import json
+import sys
+
+
+def status(rule):
+    if rule.result.incomplete:
+        return "incomplete"
+    return "passed" if rule.result.status else "failed"
+
+
+def findings(rule, cluster, scanned_at=None):
+    """
+    Flatten a rule result into one finding per resource.
+
+    Incomplete results give a single finding carrying the reason, passed
+    results without resources a single finding with no resource.
+
+    Args:
+        rule (Rule): Rule result
+        cluster (str): Cluster name
+        scanned_at (str): ISO 8601 time of the scan
+
+    Yields:
+        dict: Finding
+
+    """
+    finding = {
+        "cluster": cluster,
+        "scanned_at": scanned_at,
+        "type": rule._type,
+        "pillar": rule.pillar,
+        "section": rule.section,
+        "rule": type(rule).__name__,
+        "message": rule.message,
+        "severity": rule.severity,
+        "status": status(rule),
+        "namespace": rule.result.namespace,
+        "resource": None,
+        "resource_type": rule.result.resource_type,
+        "resolution": rule.url,
+    }
+    if rule.result.incomplete:
+        finding["reason"] = rule.result.reason
+        yield finding
+        return
+    resources = [i for i in rule.result.resources if i]
+    if not resources:
+        yield finding
+        return
+    for resource in resources:
+        yield dict(finding, resource=resource)
+
+
+class NDJSONWriter:
+    """
+    Writes the findings of rule results as newline delimited JSON as
+    soon as they are done, flushed after every rule.
+
+    Args:
+        path (str): File to write, - for stdout
+        cluster (str): Cluster name added to every finding
+    """
+
+    def __init__(self, path, cluster):
+        self.cluster = cluster
+        self.scanned_at = (
+            datetime.datetime.now(datetime.timezone.utc)
+            .replace(microsecond=0)
+            .isoformat()
+        )
+        self.count = 0
+        if path == "-":
+            self.file = sys.stdout
+        else:
+            self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, rule):
+        for finding in findings(rule, self.cluster, self.scanned_at):
+            self.file.write(json.dumps(finding, ensure_ascii=False))
+            self.file.write("\n")
+            self.count += 1
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,12 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+import contextvars
 from importlib import import_module
+import threading
+import time
+
 from rich.console import Console
 
+from . import accounting, profiling
+from .costs import rule_key
+
 console = Console()
 
+# Security Hub severity labels of rules, lowest first.
+SEVERITIES = ["INFORMATIONAL", "LOW", "MEDIUM", "HIGH", "CRITICAL"]
+
+
+def deadline_passed(deadline):
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def _time_budget(rule_timeout, deadline):
+    if deadline is None:
+        return rule_timeout
+    remaining = deadline - time.monotonic()
+    if rule_timeout is None:
+        return remaining
+    return min(rule_timeout, remaining)
+
+
+def _check_with_timeout(rule_instance, resources, timeout):
+    # A rule can't be interrupted, so it runs on a daemon thread and is
+    # abandoned if it overruns. Returns False on timeout.
+    outcome = {}
+
+    def target():
+        start = time.thread_time()
+        try:
+            rule_instance.check(resources)
+        except Exception as exc:
+            outcome["exc"] = exc
+        finally:
+            accounting.record_cpu(time.thread_time() - start)
+
+    thread = threading.Thread(
+        target=contextvars.copy_context().run, args=(target,), daemon=True
+    )
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        return False
+    if "exc" in outcome:
+        raise outcome["exc"]
+    return True
+
 
-def harden(resources, config, _type):
-    config = config[_type]
-    results = []
+def _incomplete(resources, reason):
+    # Imported here, hardeneks.rules needs the package console first.
+    from .rules import Result
+
+    return Result(
+        status=None,
+        namespace=getattr(resources, "namespace", None),
+        reason=reason,
+    )
+
+
+def _load_rules(config, _type):
+    rules = []
     for pillar in config.keys():
         for section in config[pillar]:
             for rule in config[pillar][section]:
@@ -14,13 +74,93 @@ def harden(resources, config, _type):
                 try:
                     cls = getattr(module, rule)
                 except AttributeError as exc:
-                    console.print(f"[bold red]Error loading rule '{rule}': {exc}")
+                    console.print(
+                        f"[bold red]Error loading rule '{rule}': {exc}"
+                    )
                     continue
-                try:
-                    rule_instance = cls()
-                    rule_instance.check(resources)
-                    results.append(rule_instance)
-                except Exception as exc:
-                    console.print(f"[bold red]Error in rule '{rule}': {exc}")
+                rules.append((rule_key(_type, pillar, section, rule), cls))
+    return rules
+
+
+def _run_rule(cls, resources, rule_timeout, deadline):
+    rule_instance = cls()
+    timeout = _time_budget(rule_timeout, deadline)
+    if timeout is None:
+        rule_instance.check(resources)
+    elif timeout <= 0:
+        rule_instance.result = _incomplete(
+            resources, "skipped, scan deadline reached"
+        )
+    else:
+        # Checked on its own instance so a rule that finishes after its
+        # deadline can't overwrite the incomplete result.
+        worker = cls()
+        if _check_with_timeout(worker, resources, timeout):
+            rule_instance = worker
+        else:
+            rule_instance.result = _incomplete(
+                resources, f"timed out after {timeout:.0f}s"
+            )
+    return rule_instance
+
+
+def harden(
+    resources,
+    config,
+    _type,
+    rule_timeout=None,
+    deadline=None,
+    workers=1,
+    costs=None,
+    expensive_first=True,
+    on_result=None,
+    stop=None,
+):
+    rules = _load_rules(config[_type], _type)
+    order = list(range(len(rules)))
+    if costs is not None:
+        # Longest rules first: with several workers the expensive I/O
+        # bound rules overlap instead of being left for the end. Cheapest
+        # first when the caller wants an early failure.
+        ranked = costs.order([key for key, _ in rules], expensive_first)
+        rank = {key: position for position, key in enumerate(ranked)}
+        order.sort(key=lambda i: rank[rules[i][0]])
+    results = [None] * len(rules)
+    lock = threading.Lock()
+    namespace = getattr(resources, "namespace", None)
+    attributes = {"namespace": namespace} if namespace else {}
+
+    def run(index):
+        if stop is not None and stop.is_set():
+            return
+        key, cls = rules[index]
+        with profiling.step(key, **attributes) as usage:
+            try:
+                results[index] = _run_rule(
+                    cls, resources, rule_timeout, deadline
+                )
+            except Exception as exc:
+                console.print(
+                    f"[bold red]Error in rule '{cls.__name__}': {exc}"
+                )
+                return
+        if costs is not None and not results[index].result.incomplete:
+            costs.record(key, usage.wall_seconds, usage.api_calls)
+        if on_result is not None:
+            with lock:
+                on_result(results[index])
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, run, index)
+                for index in order
+            ]
+            wait(futures)
+    else:
+        for index in order:
+            run(index)
 
-    return results
+    # Results keep the config order whatever order the rules ran in,
+    # rules not run because of `stop` are left out.
+    return [i for i in results if i is not None]
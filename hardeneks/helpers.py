@@ -6,11 +6,13 @@ import yaml
 # get_kube_config
 # returns kube config in json
 # 
-# we need to update this function to take in a config string, so users can pass in kubeconfig as a param
+# kube_config_path is set from --kubeconfig, ~/.kube/config is read otherwise
+kube_config_path = None
+
+
 def get_kube_config():
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-    # need to fix this, so user can pass in .kube/config as a param (joshkurz)
-    kube_config_orig = f"{Path.home()}/.kube/config"
+    kube_config_orig = kube_config_path or f"{Path.home()}/.kube/config"
 
     with open(kube_config_orig, "r") as fd:
         kubeconfig = yaml.safe_load(fd)
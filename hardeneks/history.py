@@ -0,0 +1,146 @@
+import datetime
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from .store import Store, path_of
+
+app = typer.Typer(help="Queries of the scans recorded with --store.")
+console = Console()
+
+
+def _store_callback(value: str):
+    if value is None:
+        return value
+    try:
+        path_of(value)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc))
+    return value
+
+
+def _open(store, cluster):
+    store = Store(store)
+    cluster = cluster or store.latest_cluster()
+    if cluster is None:
+        raise typer.BadParameter("The store has no runs")
+    return store, cluster
+
+
+def _time(timestamp):
+    if timestamp is None:
+        return ""
+    return (
+        datetime.datetime.fromtimestamp(timestamp)
+        .replace(microsecond=0)
+        .isoformat(sep=" ")
+    )
+
+
+def _duration(seconds):
+    if seconds is None:
+        return ""
+    return str(datetime.timedelta(seconds=round(seconds)))
+
+
+STORE = typer.Option(
+    ..., callback=_store_callback, help="sqlite:///path of the store."
+)
+CLUSTER = typer.Option(
+    default=None, help="Cluster name, the latest scanned by default."
+)
+
+
+@app.command()
+def runs(
+    store: str = STORE,
+    cluster: str = CLUSTER,
+    limit: int = typer.Option(20, min=1, help="Runs shown."),
+):
+    """
+    Latest runs of a cluster with their failing resources.
+    """
+    store, cluster = _open(store, cluster)
+    with store:
+        table = Table(title=f"Runs of {cluster}")
+        table.add_column("Run", justify="right")
+        table.add_column("Started")
+        table.add_column("Duration", justify="right")
+        table.add_column("Failing", justify="right")
+        for run, started, finished, failing in store.runs(cluster, limit):
+            table.add_row(
+                str(run),
+                _time(started),
+                _duration(finished - started if finished else None),
+                str(failing),
+            )
+    console.print(table)
+
+
+@app.command()
+def new(store: str = STORE, cluster: str = CLUSTER):
+    """
+    Failures of the latest run that the run before it did not have.
+    """
+    store, cluster = _open(store, cluster)
+    with store:
+        rows = store.new_failures(cluster)
+    table = Table(title=f"{len(rows)} new failures of {cluster}")
+    for column in ["Pillar", "Section", "Rule", "Namespace", "Resource"]:
+        table.add_column(column)
+    for pillar, section, rule, namespace, resource in rows:
+        table.add_row(
+            pillar, section, rule, namespace or "Cluster Wide", resource
+        )
+    console.print(table)
+
+
+@app.command()
+def remediation(store: str = STORE, cluster: str = CLUSTER):
+    """
+    Time from the first failure of a resource to the run that no longer
+    had it, per rule.
+    """
+    store, cluster = _open(store, cluster)
+    with store:
+        rows = store.remediation(cluster)
+    table = Table(title=f"Time to remediate on {cluster}")
+    for column in ["Pillar", "Section", "Rule"]:
+        table.add_column(column)
+    for column in ["Remediated", "Mean", "Max", "Open"]:
+        table.add_column(column, justify="right")
+    for pillar, section, rule, fixed, mean, longest, still_open in rows:
+        table.add_row(
+            pillar,
+            section,
+            rule,
+            str(fixed),
+            _duration(mean),
+            _duration(longest),
+            str(still_open),
+        )
+    console.print(table)
+
+
+@app.command()
+def trending(
+    store: str = STORE,
+    cluster: str = CLUSTER,
+    runs: int = typer.Option(
+        1, min=1, help="Compare the latest run with this many runs before."
+    ),
+):
+    """
+    Namespaces with more failing resources than `runs` runs before.
+    """
+    store, cluster = _open(store, cluster)
+    with store:
+        rows = store.trending(cluster, runs)
+    table = Table(title=f"Namespaces trending worse on {cluster}")
+    table.add_column("Namespace")
+    for column in ["Before", "Now", "Change"]:
+        table.add_column(column, justify="right")
+    for namespace, before, now in rows:
+        table.add_row(namespace, str(before), str(now), f"+{now - before}")
+    console.print(table)
@@ -0,0 +1,155 @@
+import datetime
+import json
+
+from pkg_resources import resource_filename
+
+from .findings import findings
+from .metrics import Aggregates
+
+TEMPLATE = resource_filename(__name__, "html_report.html")
+
+# Replaced by the findings in the template.
+MARKER = "/*FINDINGS*/"
+
+STATUSES = ["failed", "passed", "incomplete"]
+
+
+class _Index:
+    """
+    Dictionary encoding of a column: value -> position in `values`.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.positions = {}
+
+    def __call__(self, value):
+        if value not in self.positions:
+            self.positions[value] = len(self.values)
+            self.values.append(value)
+        return self.positions[value]
+
+
+def data(rules, cluster, aggregates=None, scanned_at=None):
+    """
+    Findings of rule results in the compact layout read by the page.
+
+    Findings are stored by column. Rules, namespaces and resource types
+    are dictionary encoded, so that a finding takes a few integers and
+    its resource. Incomplete results carry their reason as resource.
+
+    Args:
+        rules (list): Rule results
+        cluster (str): Cluster name
+        aggregates (Aggregates): Counts of `rules`, computed if None
+        scanned_at (str): ISO 8601 time of the scan, now by default
+
+    Returns:
+        dict: JSON serializable findings and aggregates
+
+    """
+    if aggregates is None:
+        aggregates = Aggregates(rules)
+    if scanned_at is None:
+        scanned_at = (
+            datetime.datetime.now(datetime.timezone.utc)
+            .replace(microsecond=0)
+            .isoformat()
+        )
+    rule_index = _Index()
+    namespace_index = _Index()
+    resource_type_index = _Index()
+    columns = {
+        "rule": [],
+        "namespace": [],
+        "status": [],
+        "resourceType": [],
+        "resource": [],
+    }
+    for rule in rules:
+        for finding in findings(rule, cluster):
+            columns["rule"].append(
+                rule_index(
+                    (
+                        finding["type"],
+                        finding["pillar"],
+                        finding["section"],
+                        finding["rule"],
+                        finding["message"],
+                        finding["severity"],
+                        finding["resolution"],
+                    )
+                )
+            )
+            columns["namespace"].append(
+                namespace_index(finding["namespace"] or "")
+            )
+            columns["status"].append(STATUSES.index(finding["status"]))
+            columns["resourceType"].append(
+                resource_type_index(finding["resource_type"] or "")
+            )
+            columns["resource"].append(
+                finding.get("reason") or finding["resource"] or ""
+            )
+    sections = aggregates.total("pillar", "section")
+    return {
+        "cluster": cluster,
+        "scannedAt": scanned_at,
+        "statuses": STATUSES,
+        "rules": rule_index.values,
+        "namespaces": namespace_index.values,
+        "resourceTypes": resource_type_index.values,
+        "findings": columns,
+        "aggregates": {
+            "checks": dict(aggregates.checks),
+            "pillar": sorted(
+                list(key) + [count]
+                for key, count in aggregates.total("pillar").items()
+            ),
+            "section": sorted(
+                list(key) + [count] for key, count in sections.items()
+            ),
+            "namespace": sorted(
+                (
+                    list(key) + [count]
+                    for key, count in aggregates.total("namespace").items()
+                ),
+                key=lambda i: (-i[1], i[0]),
+            ),
+        },
+    }
+
+
+def write(path, rules, cluster, aggregates=None):
+    """
+    Write a standalone HTML report of rule results.
+
+    The page has no external assets. Findings are embedded as JSON and
+    rendered by the page itself: aggregates per pillar, section and
+    namespace, filters, and a table that only creates the rows in view,
+    so that it stays responsive with hundreds of thousands of findings.
+
+    Args:
+        path (str): File to write
+        rules (list): Rule results
+        cluster (str): Cluster name
+        aggregates (Aggregates): Counts of `rules`, computed if None
+
+    Returns:
+        None
+
+    """
+    with open(TEMPLATE, encoding="utf-8") as f:
+        head, tail = f.read().split(MARKER)
+    blob = json.dumps(
+        data(rules, cluster, aggregates),
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    # "<" only appears in JSON strings, escaping it keeps resource names
+    # from closing the script element.
+    blob = blob.replace("<", "\\u003c")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(head)
+        f.write(blob)
+        f.write(tail)
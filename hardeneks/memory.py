@@ -0,0 +1,125 @@
+import os
+import sys
+import tracemalloc
+
+# Allocation sites reported per phase.
+TOP = 10
+
+# Namespaces evaluated between two samples of the namespace based phase.
+BATCH = 100
+
+_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def peak_rss_kib():
+    """
+    Peak RSS of the process in KiB, 0 where the resource module is not
+    available (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    if sys.platform == "darwin":
+        peak //= 1024
+    return peak
+
+
+def _site(frame):
+    parts = frame.filename.split(os.sep)
+    return f"{os.sep.join(parts[-3:])}:{frame.lineno}"
+
+
+class MemoryTracker:
+    """
+    Memory of the phases of a scan, sampled with tracemalloc at their
+    boundaries.
+
+    Every phase records the memory traced at its end, the traced peak
+    during the phase, the peak RSS of the process so far and the sites
+    that allocated most since the previous phase. Only this process is
+    traced, not the workers of `--workers`.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.top = TOP
+        self.phases = {}
+        self._snapshot = None
+
+    def start(self, top=TOP):
+        self.top = top
+        self.phases = {}
+        tracemalloc.start()
+        self._snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+        self._snapshot = None
+        tracemalloc.stop()
+
+    def checkpoint(self, phase):
+        """
+        Close `phase` and start measuring the next one.
+
+        Args:
+            phase (str): Name of the phase that just ended
+
+        Returns:
+            None
+
+        """
+        if not self.enabled:
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        current, peak = tracemalloc.get_traced_memory()
+        # Without reset_peak (Python 3.8) peaks are since the start.
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        top = []
+        for stat in snapshot.compare_to(self._snapshot, "lineno"):
+            if len(top) == self.top:
+                break
+            if stat.size_diff <= 0:
+                continue
+            top.append(
+                {
+                    "site": _site(stat.traceback[0]),
+                    "size_kib": stat.size_diff / 1024,
+                    "blocks": stat.count_diff,
+                }
+            )
+        self.phases[phase] = {
+            "traced_kib": current / 1024,
+            "traced_peak_kib": peak / 1024,
+            "peak_rss_kib": peak_rss_kib(),
+            "top": top,
+        }
+        self._snapshot = snapshot
+
+    def to_dict(self):
+        return dict(self.phases)
+
+    def drain(self):
+        """
+        Return the recorded phases and start over, used between scans of
+        the daemon mode.
+        """
+        phases, self.phases = self.phases, {}
+        return phases
+
+
+tracker = MemoryTracker()
+
+
+def checkpoint(phase):
+    tracker.checkpoint(phase)
@@ -0,0 +1,291 @@
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import tempfile
+import threading
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Fields of the keys of `Aggregates.failing`.
+FIELDS = ("pillar", "section", "rule", "namespace")
+
+
+class Aggregates:
+    """
+    Counts of a scan's results, built in a single pass over the rules.
+
+    Attributes:
+        failing (Counter): (pillar, section, rule, namespace) -> number
+            of failing resources
+        checks (Counter): status -> number of rule checks, status is one
+            of passed, failed or incomplete
+    """
+
+    def __init__(self, results):
+        self.failing = Counter()
+        self.checks = Counter()
+        for rule in results:
+            if rule.result.incomplete:
+                self.checks["incomplete"] += 1
+                continue
+            if rule.result.status:
+                self.checks["passed"] += 1
+                continue
+            self.checks["failed"] += 1
+            key = (
+                rule.pillar,
+                rule.section,
+                type(rule).__name__,
+                rule.result.namespace or "",
+            )
+            self.failing[key] += len(rule.result.resources)
+
+    def total(self, *fields):
+        """
+        Failing resources summed over the fields that are not given.
+
+        Args:
+            fields (str): Any of pillar, section, rule and namespace
+
+        Returns:
+            Counter: Tuple of the given fields -> number of failing
+                resources
+
+        """
+        positions = [FIELDS.index(i) for i in fields]
+        totals = Counter()
+        for key, count in self.failing.items():
+            totals[tuple(key[i] for i in positions)] += count
+        return totals
+
+
+def _escape(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def _sample(name, value, **labels):
+    if labels:
+        rendered = ",".join(
+            f'{key}="{_escape(label)}"' for key, label in labels.items()
+        )
+        name = f"{name}{{{rendered}}}"
+    return f"{name} {value}"
+
+
+def _family(lines, name, _type, _help, samples):
+    lines.append(f"# TYPE {name} {_type}")
+    lines.append(f"# HELP {name} {_help}")
+    lines.extend(samples)
+
+
+def openmetrics(aggregates, cluster, duration, profile, throttles, finished):
+    """
+    Render the metrics of a scan in the OpenMetrics text format.
+
+    Args:
+        aggregates (Aggregates): Counts of the scan's results
+        cluster (str): Cluster name, added as a label to every sample
+        duration (float): Wall time of the scan, in seconds
+        profile (dict): Steps of `profiling.Profile.to_dict`
+        throttles (dict): Output of `throttle.summary`
+        finished (float): Unix time the scan finished at
+
+    Returns:
+        str: Exposition ending with `# EOF`
+
+    """
+    phases = Counter()
+    calls = Counter()
+    for name, step in profile.items():
+        phase = name.split(".", 1)[0]
+        if phase in ("cluster_wide", "namespace_based"):
+            phase = "rules"
+        phases[phase] += step["wall_seconds"]
+        calls["kubernetes"] += step["kubernetes_calls"]
+        calls["aws"] += step["aws_calls"]
+
+    lines = []
+    _family(
+        lines,
+        "hardeneks_failing_resources",
+        "gauge",
+        "Resources failing a rule.",
+        [
+            _sample(
+                "hardeneks_failing_resources",
+                count,
+                cluster=cluster,
+                pillar=pillar,
+                section=section,
+                rule=rule,
+                namespace=namespace,
+            )
+            for (pillar, section, rule, namespace), count in sorted(
+                aggregates.failing.items()
+            )
+        ],
+    )
+    _family(
+        lines,
+        "hardeneks_rule_checks",
+        "gauge",
+        "Rule checks of the last scan by outcome.",
+        [
+            _sample(
+                "hardeneks_rule_checks",
+                aggregates.checks[status],
+                cluster=cluster,
+                status=status,
+            )
+            for status in ("passed", "failed", "incomplete")
+        ],
+    )
+    _family(
+        lines,
+        "hardeneks_scan_duration_seconds",
+        "gauge",
+        "Wall time of the last scan.",
+        [
+            _sample(
+                "hardeneks_scan_duration_seconds",
+                f"{duration:.3f}",
+                cluster=cluster,
+            )
+        ],
+    )
+    _family(
+        lines,
+        "hardeneks_phase_duration_seconds",
+        "gauge",
+        "Time spent in each phase of the last scan, summed over "
+        "concurrent steps.",
+        [
+            _sample(
+                "hardeneks_phase_duration_seconds",
+                f"{seconds:.3f}",
+                cluster=cluster,
+                phase=phase,
+            )
+            for phase, seconds in sorted(phases.items())
+        ],
+    )
+    _family(
+        lines,
+        "hardeneks_api_calls",
+        "gauge",
+        "API calls made by the last scan.",
+        [
+            _sample(
+                "hardeneks_api_calls", calls[api], cluster=cluster, api=api
+            )
+            for api in ("kubernetes", "aws")
+        ],
+    )
+    _family(
+        lines,
+        "hardeneks_throttled_requests",
+        "counter",
+        "Requests throttled by the API servers.",
+        [
+            _sample(
+                "hardeneks_throttled_requests_total",
+                count,
+                cluster=cluster,
+                api=api,
+            )
+            for api, (count, _) in throttles.items()
+        ],
+    )
+    _family(
+        lines,
+        "hardeneks_throttle_backoff_seconds",
+        "counter",
+        "Time spent backing off throttled requests.",
+        [
+            _sample(
+                "hardeneks_throttle_backoff_seconds_total",
+                f"{backoff:.3f}",
+                cluster=cluster,
+                api=api,
+            )
+            for api, (_, backoff) in throttles.items()
+        ],
+    )
+    _family(
+        lines,
+        "hardeneks_last_scan_timestamp_seconds",
+        "gauge",
+        "Unix time the last scan finished at.",
+        [
+            _sample(
+                "hardeneks_last_scan_timestamp_seconds",
+                f"{finished:.3f}",
+                cluster=cluster,
+            )
+        ],
+    )
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path, text):
+    """
+    Write metrics for the node exporter's textfile collector.
+
+    The file is replaced atomically so the collector never reads a
+    partial exposition.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".hardeneks")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+class MetricsServer:
+    """
+    Serves the metrics of the last scan on `/metrics` from a background
+    thread.
+    """
+
+    def __init__(self, port, host=""):
+        self.text = "# EOF\n"
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = server.text.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True
+        )
+        self.thread.start()
+
+    def update(self, text):
+        self.text = text
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
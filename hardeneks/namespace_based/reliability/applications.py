@@ -6,6 +6,7 @@ class avoid_running_singleton_pods(Rule):
     _type = "namespace_based"
     pillar = "reliability"
     section = "applications"
+    severity = "MEDIUM"
     message = "Avoid running pods without deployments."
     url = "https://aws.github.io/aws-eks-best-practices/reliability/docs/application/#avoid-running-singleton-pods"
 
@@ -33,6 +34,7 @@ class run_multiple_replicas(Rule):
     _type = "namespace_based"
     pillar = "reliability"
     section = "applications"
+    severity = "MEDIUM"
     message = "Avoid running single replica deployments."
     url = "https://aws.github.io/aws-eks-best-practices/reliability/docs/application/#run-multiple-replicas"
 
@@ -62,6 +64,7 @@ class schedule_replicas_across_nodes(Rule):
     _type = "namespace_based"
     pillar = "reliability"
     section = "applications"
+    severity = "LOW"
     message = "Spread replicas across AZs and Nodes."
     url = "https://aws.github.io/aws-eks-best-practices/reliability/docs/application/#schedule-replicas-across-nodes"
 
@@ -96,6 +99,7 @@ class check_horizontal_pod_autoscaling_exists(Rule):
     _type = "namespace_based"
     pillar = "reliability"
     section = "applications"
+    severity = "LOW"
     message = "Deploy horizontal pod autoscaler for deployments."
     url = "https://aws.github.io/aws-eks-best-practices/reliability/docs/application/#horizontal-pod-autoscaler-hpa"
 
@@ -127,6 +131,7 @@ class check_readiness_probes(Rule):
     _type = "namespace_based"
     pillar = "reliability"
     section = "applications"
+    severity = "MEDIUM"
     message = "Define readiness probes for pods."
     url = "https://aws.github.io/aws-eks-best-practices/reliability/docs/application/#use-readiness-probe-to-detect-partial-unavailability"
 
@@ -158,6 +163,7 @@ class check_liveness_probes(Rule):
     _type = "namespace_based"
     pillar = "reliability"
     section = "applications"
+    severity = "MEDIUM"
     message = "Define liveness probes for pods."
     url = "https://aws.github.io/aws-eks-best-practices/reliability/docs/application/#use-liveness-probe-to-remove-unhealthy-pods"
 
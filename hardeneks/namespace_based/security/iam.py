@@ -8,6 +8,7 @@ class restrict_wildcard_for_roles(Rule):
     _type = "namespace_based"
     pillar = "security"
     section = "iam"
+    severity = "HIGH"
     message = "Roles should not have '*' in Verbs or Resources."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/iam/#employ-least-privileged-access-when-creating-rolebindings-and-clusterrolebindings"
 
@@ -41,6 +42,7 @@ class disable_service_account_token_mounts(Rule):
     _type = "namespace_based"
     pillar = "security"
     section = "iam"
+    severity = "MEDIUM"
     message = "Default service account should have automountServiceAccountToken set to false."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/iam/#disable-auto-mounting-of-service-account-tokens"
 
@@ -71,6 +73,7 @@ class disable_run_as_root_user(Rule):
     _type = "namespace_based"
     pillar = "security"
     section = "iam"
+    severity = "HIGH"
     message = "Running as root is not allowed."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/iam/#run-the-application-as-a-non-root-user"
 
@@ -112,6 +115,7 @@ class disable_anonymous_access_for_roles(Rule):
     _type = "namespace_based"
     pillar = "security"
     section = "iam"
+    severity = "CRITICAL"
     message = "Don't bind roles to anonymous or unauthenticated groups."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/iam/#review-and-revoke-unnecessary-anonymous-access"
 
@@ -147,6 +151,7 @@ class use_dedicated_service_accounts_for_each_deployment(Rule):
     _type = "namespace_based"
     pillar = "security"
     section = "iam"
+    severity = "LOW"
     message = "Don't share service accounts between Deployments."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/iam/#use-dedicated-service-accounts-for-each-application"
 
@@ -187,6 +192,7 @@ class use_dedicated_service_accounts_for_each_stateful_set(Rule):
     _type = "namespace_based"
     pillar = "security"
     section = "iam"
+    severity = "LOW"
     message = "Don't share service accounts between StatefulSets."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/iam/#use-dedicated-service-accounts-for-each-application"
 
@@ -227,6 +233,7 @@ class use_dedicated_service_accounts_for_each_daemon_set(Rule):
     _type = "namespace_based"
     pillar = "security"
     section = "iam"
+    severity = "LOW"
     message = "Don't share service accounts between DaemonSets."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/iam/#use-dedicated-service-accounts-for-each-application"
 
@@ -6,6 +6,7 @@ class use_encryption_with_aws_load_balancers(Rule):
     _type = "namespace_based"
     pillar = "security"
     section = "network_security"
+    severity = "HIGH"
     message = "Make sure you specify an ssl cert."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/network/#use-encryption-with-aws-load-balancers"
 
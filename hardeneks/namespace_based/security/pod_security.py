@@ -6,6 +6,7 @@ class disallow_container_socket_mount(Rule):
     _type = "namespace_based"
     pillar = "security"
     section = "pod_security"
+    severity = "CRITICAL"
     message = "Container socket mounts are not allowed."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/pods/#never-run-docker-in-docker-or-mount-the-socket-in-the-container"
 
@@ -43,6 +44,7 @@ class disallow_host_path_or_make_it_read_only(Rule):
     _type = "namespace_based"
     pillar = "security"
     section = "pod_security"
+    severity = "HIGH"
     message = "Restrict the use of hostpath."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/pods/#restrict-the-use-of-hostpath-or-if-hostpath-is-necessary-restrict-which-prefixes-can-be-used-and-configure-the-volume-as-read-only"
 
@@ -75,6 +77,7 @@ class set_requests_limits_for_containers(Rule):
     _type = "namespace_based"
     pillar = "security"
     section = "pod_security"
+    severity = "MEDIUM"
     message = "Set requests and limits for each container."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/pods/#set-requests-and-limits-for-each-container-to-avoid-resource-contention-and-dos-attacks"
 
@@ -108,6 +111,7 @@ class disallow_privilege_escalation(Rule):
     _type = "namespace_based"
     pillar = "security"
     section = "pod_security"
+    severity = "HIGH"
     message = "Set allowPrivilegeEscalation in the pod spec to false."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/pods/#do-not-allow-privileged-escalation"
 
@@ -142,6 +146,7 @@ class check_read_only_root_file_system(Rule):
     _type = "namespace_based"
     pillar = "security"
     section = "pod_security"
+    severity = "MEDIUM"
     message = "Configure your images with a read-only root file system."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/pods/#configure-your-images-with-read-only-root-file-system"
 
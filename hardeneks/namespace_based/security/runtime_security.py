@@ -6,6 +6,7 @@ class disallow_linux_capabilities(Rule):
     _type = "namespace_based"
     pillar = "security"
     section = "runtime_security"
+    severity = "HIGH"
     message = "Capabilities beyond the allowed list are disallowed."
     url = "https://aws.github.io/aws-eks-best-practices/security/docs/runtime/#consider-adddropping-linux-capabilities-before-writing-seccomp-policies"
 
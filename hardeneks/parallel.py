@@ -0,0 +1,174 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import math
+
+from . import profiling, tracing
+from .costs import Observations
+from .harden import deadline_passed, harden
+from .resources import NamespacedResources
+
+
+def _init_worker():
+    # Forked workers start with a copy of what the parent recorded so
+    # far, which is not theirs to send back.
+    profiling.profile.drain()
+    tracing.tracer.drain()
+
+
+def _harden_partition(
+    region,
+    context,
+    cluster,
+    partition,
+    rules,
+    rule_timeout=None,
+    deadline=None,
+    trace=False,
+    costs=None,
+    expensive_first=True,
+    rule_workers=1,
+):
+    # Runs inside a worker process. `partition` is a list of
+    # (namespace, raw resources) pairs so only plain JSON strings
+    # cross the process boundary on the way in. Namespaces that were not
+    # collected before the deadline come without resources. `costs` is a
+    # snapshot of the parent's cost model. The profile, spans and cost
+    # observations of the partition go back with its results.
+    tracing.tracer.enabled = trace
+    if costs is not None:
+        costs = Observations(costs)
+    results = []
+    for namespace, raw in partition:
+        with tracing.span(namespace, "namespace"):
+            resources = NamespacedResources(
+                region, context, cluster, namespace
+            )
+            if raw is not None:
+                resources.set_raw_resources(raw)
+            results.extend(
+                harden(
+                    resources,
+                    rules,
+                    "namespace_based",
+                    rule_timeout=rule_timeout,
+                    deadline=deadline,
+                    workers=rule_workers,
+                    costs=costs,
+                    expensive_first=expensive_first,
+                )
+            )
+    observed = costs.observed if costs is not None else []
+    return (
+        results,
+        profiling.profile.drain(),
+        tracing.tracer.drain(),
+        observed,
+    )
+
+
+def _partition_results(future, costs):
+    results, steps, spans, observed = future.result()
+    profiling.profile.merge(steps)
+    tracing.tracer.merge(spans)
+    if costs is not None:
+        costs.merge(observed)
+    return results
+
+
+def _partition_size(namespaces, workers):
+    # A few partitions per worker keeps the pool busy when namespaces
+    # differ in size without paying a round trip per namespace.
+    return max(1, math.ceil(len(namespaces) / (workers * 4)))
+
+
+def harden_namespaces(
+    region,
+    context,
+    cluster,
+    namespaces,
+    rules,
+    workers,
+    raw=None,
+    rule_timeout=None,
+    deadline=None,
+    costs=None,
+    expensive_first=True,
+    rule_workers=1,
+    stop=None,
+):
+    """
+    Evaluate namespace based rules on a pool of worker processes.
+
+    Namespaces are collected in this process as raw JSON and shipped to
+    the workers in partitions. Collection of the next partition overlaps
+    with evaluation of the previous ones, whose results are yielded as
+    soon as they are done. Closing the generator cancels partitions that
+    haven't started.
+
+    Args:
+        region (str): AWS region of the cluster
+        context (str): K8s context
+        cluster (str): Cluster name
+        namespaces (list): Namespaces to harden
+        rules (dict): `rules` section of the hardeneks config
+        workers (int): Number of worker processes
+        raw (dict): Already collected namespace -> raw resources, if any
+        rule_timeout (float): Time budget of a rule, in seconds
+        deadline (float): time.monotonic() after which rules are skipped
+        costs (CostModel): Learned rule costs, a snapshot of which orders
+            the rules of a partition. The costs measured by the workers
+            are recorded into it.
+        expensive_first (bool): Order rules longest first, else cheapest
+        rule_workers (int): Rules checked concurrently in a worker
+        stop (threading.Event): Stops collecting and submitting partitions
+
+    Yields:
+        list: Rule results of a partition, as partitions complete
+
+    """
+    size = _partition_size(namespaces, workers)
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker
+    ) as executor:
+        pending = set()
+        try:
+            for start in range(0, len(namespaces), size):
+                if stop is not None and stop.is_set():
+                    break
+                partition = []
+                for ns in namespaces[start : start + size]:
+                    if raw is not None:
+                        partition.append((ns, raw[ns]))
+                        continue
+                    if deadline_passed(deadline):
+                        partition.append((ns, None))
+                        continue
+                    resources = NamespacedResources(
+                        region, context, cluster, ns
+                    )
+                    partition.append((ns, resources.get_raw_resources()))
+                pending.add(
+                    executor.submit(
+                        _harden_partition,
+                        region,
+                        context,
+                        cluster,
+                        partition,
+                        rules,
+                        rule_timeout,
+                        deadline,
+                        tracing.tracer.enabled,
+                        costs.snapshot() if costs is not None else None,
+                        expensive_first,
+                        rule_workers,
+                    )
+                )
+                for future in [i for i in pending if i.done()]:
+                    pending.discard(future)
+                    yield _partition_results(future, costs)
+            for future in as_completed(list(pending)):
+                pending.discard(future)
+                yield _partition_results(future, costs)
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,201 @@
+import csv
+import queue
+import threading
+import time
+
+from . import tracing
+
+# Rule results queued per exporter before the scan waits for it.
+QUEUE_SIZE = 1000
+
+CSV_FIELDS = [
+    "Type",
+    "Pillar",
+    "Section",
+    "Message",
+    "Status",
+    "Resources",
+    "Resource Type",
+    "Namespace",
+    "Resolution",
+]
+
+_DONE = object()
+_ABORT = object()
+
+
+def csv_row(rule):
+    resources = rule.result.resources
+    if rule.result.incomplete:
+        resources = [rule.result.reason]
+    return {
+        "Type": rule._type,
+        "Pillar": rule.pillar,
+        "Section": rule.section,
+        "Message": rule.message,
+        "Status": (
+            "Incomplete" if rule.result.incomplete else rule.result.status
+        ),
+        "Resources": ", ".join(resources) if resources else "",
+        "Resource Type": rule.result.resource_type,
+        "Namespace": rule.result.namespace,
+        "Resolution": rule.url,
+    }
+
+
+class CSVSink:
+    """
+    Writes one CSV row per rule result as it is done.
+
+    Args:
+        path (str): File to write
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=CSV_FIELDS)
+        self.writer.writeheader()
+
+    def write(self, rule):
+        self.writer.writerow(csv_row(rule))
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class StoreSink:
+    """
+    Records a run in a `store.Store` as its results are done.
+
+    Args:
+        store (Store): Findings history
+        cluster (str): Cluster name
+        started_at (float): Unix time the scan started at
+    """
+
+    def __init__(self, store, cluster, started_at):
+        self.store = store
+        self.run = store.start(cluster, started_at)
+
+    def write(self, rule):
+        self.store.add(self.run, rule)
+
+    def close(self):
+        self.store.finish(self.run, time.time())
+
+    def abort(self):
+        self.store.abort(self.run)
+
+
+class SecurityHubSink:
+    """
+    Syncs results to Security Hub as they are done, see
+    `security_hub.SecurityHubSync`.
+
+    Attributes:
+        counts (dict): Output of `SecurityHubSync.finish`, once closed
+    """
+
+    def __init__(self, sync, region, context, cluster):
+        self.sync = sync
+        self.counts = None
+        sync.begin(region, context, cluster)
+
+    def write(self, rule):
+        self.sync.write(rule)
+
+    def close(self):
+        self.counts = self.sync.finish()
+
+
+class Pipeline:
+    """
+    Hands rule results to exporters running in their own threads while
+    the scan goes on.
+
+    Every exporter, anything with `write(rule)` and `close()`, reads a
+    bounded queue. The scan blocks in `put` when an exporter falls
+    `maxsize` results behind, so memory stays bounded whatever the
+    exporter's latency. An exporter that raises stops receiving results,
+    the error is returned by `close`. When the scan did not complete,
+    exporters that have an `abort()` are aborted instead of closed.
+
+    Args:
+        sinks (dict): name -> exporter
+        maxsize (int): Results queued per exporter
+    """
+
+    def __init__(self, sinks, maxsize=QUEUE_SIZE):
+        self.sinks = sinks
+        self.errors = {}
+        self.closed = False
+        self._queues = {}
+        self._threads = []
+        for name, sink in sinks.items():
+            self._queues[name] = queue.Queue(maxsize)
+            thread = threading.Thread(
+                target=self._consume,
+                args=(name, sink, self._queues[name]),
+                name=f"export-{name}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _consume(self, name, sink, results):
+        with tracing.span(name, "export"):
+            while True:
+                rule = results.get()
+                if rule is _DONE or rule is _ABORT:
+                    break
+                # Keep draining after a failure so that the scan is not
+                # blocked on a full queue.
+                if name in self.errors:
+                    continue
+                try:
+                    sink.write(rule)
+                except Exception as exc:
+                    self.errors[name] = exc
+            try:
+                if rule is _ABORT and hasattr(sink, "abort"):
+                    sink.abort()
+                else:
+                    sink.close()
+            except Exception as exc:
+                self.errors.setdefault(name, exc)
+
+    def put(self, rule):
+        for results in self._queues.values():
+            results.put(rule)
+
+    def close(self, complete=True):
+        """
+        Wait for the exporters to write every queued result and close.
+
+        Args:
+            complete (bool): False when the scan failed or was stopped,
+                its results are partial
+
+        Returns:
+            dict: name -> exception of the exporters that failed
+
+        """
+        if not self.closed:
+            self.closed = True
+            for results in self._queues.values():
+                results.put(_DONE if complete else _ABORT)
+            for thread in self._threads:
+                thread.join()
+        return self.errors
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        self.close(complete=exc_type is None)
@@ -0,0 +1,98 @@
+from contextlib import contextmanager
+import threading
+
+from . import accounting, tracing
+
+FIELDS = [
+    "calls",
+    "wall_seconds",
+    "cpu_seconds",
+    "kubernetes_calls",
+    "aws_calls",
+    "bytes_received",
+    "objects_deserialized",
+]
+
+
+class Profile:
+    """
+    Usage aggregated per step of a scan.
+
+    Steps are rule keys (see `costs.rule_key`), collection steps named
+    `collect.<type>.<resource>` and, when raw responses are decoded apart
+    from their collection, `deserialize.<type>.<resource>`. A step run
+    for several namespaces is summed, `calls` counts the runs.
+    """
+
+    def __init__(self):
+        self.steps = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, usage):
+        with self._lock:
+            step = self.steps.setdefault(name, dict.fromkeys(FIELDS, 0))
+            step["calls"] += 1
+            for field in FIELDS[1:]:
+                step[field] += getattr(usage, field)
+
+    def merge(self, steps):
+        with self._lock:
+            for name, other in steps.items():
+                step = self.steps.setdefault(name, dict.fromkeys(FIELDS, 0))
+                for field in FIELDS:
+                    step[field] += other[field]
+
+    def drain(self):
+        """
+        Return the recorded steps and start over, used to ship the
+        profile of a worker process back to the parent.
+        """
+        with self._lock:
+            steps, self.steps = self.steps, {}
+        return steps
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                name: dict(step)
+                for name, step in sorted(
+                    self.steps.items(),
+                    key=lambda i: i[1]["wall_seconds"],
+                    reverse=True,
+                )
+            }
+
+
+profile = Profile()
+
+
+@contextmanager
+def step(name, coroutine=False, **attributes):
+    """
+    Track the enclosed work, add it to the profile under `name` and trace
+    it as a span whose category is the first part of `name`.
+
+    Args:
+        name (str): Step name
+        coroutine (bool): The work is a coroutine sharing its thread with
+            others, its CPU time can't be measured
+        attributes: Extra key/values attached to the span
+
+    """
+    category = name.split(".", 1)[0]
+    with tracing.span(name, category, coroutine, **attributes):
+        try:
+            with accounting.track(cpu=not coroutine) as usage:
+                yield usage
+        finally:
+            # Steps that raise are recorded too, they are the ones worth
+            # looking at.
+            profile.record(name, usage)
+
+
+def collect_step(_type, name):
+    return f"collect.{_type}.{name}"
+
+
+def deserialize_step(_type, name):
+    return f"deserialize.{_type}.{name}"
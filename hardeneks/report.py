@@ -0,0 +1,347 @@
+from collections import Counter
+from html import escape
+
+from rich import box
+from rich.console import Console
+from rich.rule import Rule as Heading
+from rich.segment import Segment, Segments
+from rich.table import Table
+from rich.terminal_theme import DEFAULT_TERMINAL_THEME
+
+# Rows of the report rendered at a time. Memory use of the renderer
+# depends on it, not on the number of results.
+CHUNK = 200
+
+# Rules and namespaces of the summary.
+TOP = 10
+
+# Column -> share of the width, fixed so that the tables of successive
+# chunks line up.
+COLUMNS = [
+    ("Section", 2),
+    ("Namespace", 2),
+    ("Rule", 4),
+    ("Resource", 3),
+    ("Resource Type", 2),
+    ("Resolution", 1),
+]
+
+_HTML_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<style>
+body {{
+    color: {foreground};
+    background-color: {background};
+}}
+</style>
+</head>
+<body>
+<code>
+<pre style="font-family:Menlo,'DejaVu Sans Mono',consolas,'Courier New',monospace">"""
+
+_HTML_FOOTER = """</pre>
+</code>
+</body>
+</html>
+"""
+
+
+class Report:
+    """
+    Prints a report on the terminal and writes it to text and HTML files
+    as it is printed, without recording the console.
+
+    Everything printed is laid out once, the same segments are then
+    written to every output.
+
+    Args:
+        console (Console): Terminal console, None to only write files
+        text (str): Path of the text export
+        html (str): Path of the HTML export
+        width (int): Width of the exports, the console's by default
+    """
+
+    def __init__(self, console=None, text=None, html=None, width=None):
+        if width is None:
+            width = console.width if console is not None else 80
+        self.console = console
+        self.width = width
+        if console is not None and console.width == width:
+            self._renderer = console
+        else:
+            self._renderer = Console(
+                width=width,
+                color_system="truecolor",
+                force_terminal=True,
+                force_jupyter=False,
+            )
+        self._text = None
+        self._html = None
+        if text:
+            self._text = open(text, "w", encoding="utf-8")
+        if html:
+            self._html = open(html, "w", encoding="utf-8")
+            self._html.write(
+                _HTML_HEADER.format(
+                    foreground=DEFAULT_TERMINAL_THEME.foreground_color.hex,
+                    background=DEFAULT_TERMINAL_THEME.background_color.hex,
+                )
+            )
+
+    def _render(self, objects):
+        renderer = self._renderer
+        options = renderer.options.update_width(self.width)
+        segments = []
+        for renderable in objects or ("",):
+            if isinstance(renderable, str):
+                renderable = renderer.render_str(renderable)
+            segments.extend(renderer.render(renderable, options))
+        return [
+            segment
+            for line in Segment.split_and_crop_lines(
+                segments, self.width, pad=False
+            )
+            for segment in line
+        ]
+
+    def _write_html(self, segments):
+        chunks = []
+        for text, style, _ in Segment.filter_control(
+            Segment.simplify(segments)
+        ):
+            text = escape(text)
+            if style:
+                rule = style.get_html_style(DEFAULT_TERMINAL_THEME)
+                if style.link:
+                    text = f'<a href="{style.link}">{text}</a>'
+                if rule:
+                    text = f'<span style="{rule}">{text}</span>'
+            chunks.append(text)
+        self._html.write("".join(chunks))
+
+    def print(self, *objects):
+        segments = self._render(objects)
+        if self.console is not None:
+            self.console.print(Segments(segments), end="")
+        if self._text is not None:
+            self._text.write(
+                "".join(i.text for i in segments if not i.control)
+            )
+        if self._html is not None:
+            self._write_html(segments)
+
+    def close(self):
+        if self._html is not None:
+            self._html.write(_HTML_FOOTER)
+            self._html.close()
+            self._html = None
+        if self._text is not None:
+            self._text.close()
+            self._text = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _table(header):
+    table = Table(
+        box=box.SQUARE,
+        show_edge=False,
+        show_header=header,
+        expand=True,
+    )
+    for name, ratio in COLUMNS:
+        table.add_column(name, ratio=ratio)
+    return table
+
+
+def _rows(rule):
+    color = "red"
+    namespace = "Cluster Wide"
+    resources = rule.result.resources
+    if rule.result.status:
+        color = "green"
+    if rule.result.incomplete:
+        color = "yellow"
+        resources = [rule.result.reason]
+    if rule.result.namespace:
+        namespace = rule.result.namespace
+    for resource in resources:
+        yield (
+            rule.section,
+            namespace,
+            rule.message,
+            resource,
+            rule.result.resource_type,
+            f"[link={rule.url}]Link[/link]",
+        ), color
+
+
+def print_results(report, rules, chunk=CHUNK):
+    """
+    Print the results of a scan grouped by pillar, `chunk` rows at a
+    time.
+
+    Args:
+        report (Report): Where to print
+        rules (list): Rule results
+        chunk (int): Rows per printed table
+
+    Returns:
+        None
+
+    """
+    pillars = list(dict.fromkeys(i.pillar for i in rules))
+    for pillar in pillars:
+        report.print(Heading(f"[cyan][bold]{pillar} rules"))
+        table = _table(header=True)
+        for rule in rules:
+            if rule.pillar != pillar:
+                continue
+            for row, color in _rows(rule):
+                table.add_row(*row, style=color)
+                if table.row_count == chunk:
+                    report.print(table)
+                    table = _table(header=False)
+        if table.row_count or table.show_header:
+            report.print(table)
+        report.print()
+
+
+def _heat(count, highest):
+    if not count:
+        return "[dim]·"
+    if count * 3 > highest * 2:
+        return f"[bold white on red]{count}"
+    if count * 3 > highest:
+        return f"[red]{count}"
+    return f"[yellow]{count}"
+
+
+def print_summary(report, aggregates, top=TOP):
+    """
+    Print counts of a scan instead of one row per resource: checks by
+    outcome, failing resources per pillar and section, the `top` rules
+    and namespaces with the most failing resources and a heat-map of
+    the two.
+
+    Args:
+        report (Report): Where to print
+        aggregates (metrics.Aggregates): Counts of the scan's results
+        top (int): Rules and namespaces shown
+
+    Returns:
+        None
+
+    """
+    checks = aggregates.checks
+    report.print(Heading("[cyan][bold]Summary"))
+    report.print(
+        f"{sum(checks.values())} rule checks: "
+        f"[green]{checks['passed']} passed[/green], "
+        f"[red]{checks['failed']} failed[/red], "
+        f"[yellow]{checks['incomplete']} incomplete[/yellow]"
+    )
+    report.print()
+
+    failed = Counter(key[:2] for key in aggregates.failing)
+    table = Table(title="Failing resources by section", expand=True)
+    table.add_column("Pillar")
+    table.add_column("Section")
+    table.add_column("Failed checks", justify="right")
+    table.add_column("Resources", justify="right")
+    for key, count in sorted(aggregates.total("pillar", "section").items()):
+        table.add_row(*key, str(failed[key]), str(count))
+    report.print(table)
+
+    # Rules are numbered, the numbers head the columns of the heat-map.
+    by_rule = aggregates.total("rule", "pillar", "section")
+    rules = [key[:1] for key, _ in by_rule.most_common(top)]
+    table = Table(title=f"Top {len(rules)} rules", expand=True)
+    table.add_column("#", justify="right")
+    table.add_column("Rule")
+    table.add_column("Pillar")
+    table.add_column("Section")
+    table.add_column("Resources", justify="right")
+    for number, (key, count) in enumerate(by_rule.most_common(top), 1):
+        table.add_row(str(number), *key, str(count))
+    report.print(table)
+
+    by_namespace = aggregates.total("namespace")
+    # Cluster wide results have no namespace.
+    by_namespace.pop(("",), None)
+    namespaces = by_namespace.most_common(top)
+    cells = aggregates.total("namespace", "rule")
+    highest = max(
+        [
+            cells[namespace + rule]
+            for namespace, _ in namespaces
+            for rule in rules
+        ],
+        default=0,
+    )
+    table = Table(title=f"Top {len(namespaces)} namespaces", expand=True)
+    table.add_column("Namespace")
+    table.add_column("Resources", justify="right")
+    for number in range(len(rules)):
+        table.add_column(str(number + 1), justify="right")
+    for namespace, count in namespaces:
+        table.add_row(
+            *namespace,
+            str(count),
+            *[_heat(cells[namespace + rule], highest) for rule in rules],
+        )
+    report.print(table)
+    report.print()
+
+
+def print_changes(report, changes, chunk=CHUNK):
+    """
+    Print how the failures of a scan changed since a baseline, then the
+    resources that are no longer failing, `chunk` rows at a time. The
+    new failures are printed by the caller like a full report.
+
+    Args:
+        report (Report): Where to print
+        changes (baseline.Changes): Failures compared with the baseline
+        chunk (int): Rows per printed table
+
+    Returns:
+        None
+
+    """
+    report.print(Heading("[cyan][bold]Changes since the baseline"))
+    report.print(
+        f"[red]{changes.new_count} new[/red], "
+        f"[green]{len(changes.resolved)} resolved[/green], "
+        f"{changes.unchanged} unchanged failures"
+    )
+    if changes.unchecked:
+        report.print(
+            f"[yellow]{changes.unchecked} failures of the baseline "
+            "were not checked"
+        )
+    report.print()
+    for start in range(0, len(changes.resolved), chunk):
+        table = Table(
+            box=box.SQUARE,
+            show_edge=False,
+            show_header=not start,
+            expand=True,
+        )
+        for column in ["Resolved rule", "Namespace", "Resource"]:
+            table.add_column(column)
+        for rule, namespace, resource in changes.resolved[
+            start : start + chunk
+        ]:
+            table.add_row(
+                rule, namespace or "Cluster Wide", resource, style="green"
+            )
+        report.print(table)
+    if changes.resolved:
+        report.print()
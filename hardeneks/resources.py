@@ -1,5 +1,102 @@
 from kubernetes import client
 
+from . import accounting
+from .aws import AWSData
+from .profiling import collect_step, deserialize_step, step
+
+# attribute -> (api class, list method, response model)
+CLUSTER_RESOURCES = {
+    "cluster_roles": (
+        "RbacAuthorizationV1Api",
+        "list_cluster_role",
+        "V1ClusterRoleList",
+    ),
+    "cluster_role_bindings": (
+        "RbacAuthorizationV1Api",
+        "list_cluster_role_binding",
+        "V1ClusterRoleBindingList",
+    ),
+    "resource_quotas": (
+        "CoreV1Api",
+        "list_resource_quota_for_all_namespaces",
+        "V1ResourceQuotaList",
+    ),
+    "network_policies": (
+        "NetworkingV1Api",
+        "list_network_policy_for_all_namespaces",
+        "V1NetworkPolicyList",
+    ),
+    "storage_classes": (
+        "StorageV1Api",
+        "list_storage_class",
+        "V1StorageClassList",
+    ),
+    "persistent_volumes": (
+        "CoreV1Api",
+        "list_persistent_volume",
+        "V1PersistentVolumeList",
+    ),
+}
+
+NAMESPACED_RESOURCES = {
+    "roles": (
+        "RbacAuthorizationV1Api",
+        "list_namespaced_role",
+        "V1RoleList",
+    ),
+    "pods": ("CoreV1Api", "list_namespaced_pod", "V1PodList"),
+    "role_bindings": (
+        "RbacAuthorizationV1Api",
+        "list_namespaced_role_binding",
+        "V1RoleBindingList",
+    ),
+    "deployments": (
+        "AppsV1Api",
+        "list_namespaced_deployment",
+        "V1DeploymentList",
+    ),
+    "daemon_sets": (
+        "AppsV1Api",
+        "list_namespaced_daemon_set",
+        "V1DaemonSetList",
+    ),
+    "stateful_sets": (
+        "AppsV1Api",
+        "list_namespaced_stateful_set",
+        "V1StatefulSetList",
+    ),
+    "services": ("CoreV1Api", "list_namespaced_service", "V1ServiceList"),
+    "service_accounts": (
+        "CoreV1Api",
+        "list_namespaced_service_account",
+        "V1ServiceAccountList",
+    ),
+    "hpas": (
+        "AutoscalingV1Api",
+        "list_namespaced_horizontal_pod_autoscaler",
+        "V1HorizontalPodAutoscalerList",
+    ),
+}
+
+
+class _RawResponse:
+    # Minimal stand-in for a urllib3 response, enough for
+    # ApiClient.deserialize.
+    def __init__(self, data):
+        self.data = data
+
+
+def deserialize(raw, model):
+    response = client.ApiClient().deserialize(_RawResponse(raw), model)
+    accounting.record_objects(len(response.items))
+    return response
+
+
+def _list(api, method, *args):
+    response = getattr(getattr(client, api)(), method)(*args)
+    accounting.record_objects(len(response.items))
+    return response.items
+
 
 class Resources:
     def __init__(self, region, context, cluster, namespaces):
@@ -7,26 +104,45 @@ class Resources:
         self.context = context
         self.cluster = cluster
         self.namespaces = namespaces
+        self.aws = AWSData(region, cluster)
 
     def set_resources(self):
-        self.cluster_roles = (
-            client.RbacAuthorizationV1Api().list_cluster_role().items
-        )
-        self.cluster_role_bindings = (
-            client.RbacAuthorizationV1Api().list_cluster_role_binding().items
-        )
-        self.resource_quotas = (
-            client.CoreV1Api().list_resource_quota_for_all_namespaces().items
-        )
-        self.network_policies = (
-            client.NetworkingV1Api()
-            .list_network_policy_for_all_namespaces()
-            .items
-        )
-        self.storage_classes = client.StorageV1Api().list_storage_class().items
-        self.persistent_volumes = (
-            client.CoreV1Api().list_persistent_volume().items
-        )
+        for attr, (api, method, _) in CLUSTER_RESOURCES.items():
+            with step(collect_step("cluster_wide", attr)):
+                setattr(self, attr, _list(api, method))
+
+    def get_raw_resources(self):
+        """
+        Fetch the cluster wide LIST responses as undecoded JSON strings.
+
+        Returns:
+            dict: attribute name -> raw JSON response body
+
+        """
+        raw = {}
+        for attr, (api, method, _) in CLUSTER_RESOURCES.items():
+            with step(collect_step("cluster_wide", attr)):
+                response = getattr(getattr(client, api)(), method)(
+                    _preload_content=False
+                )
+                accounting.record_bytes(len(response.data))
+                raw[attr] = response.data.decode("utf-8")
+        return raw
+
+    def set_raw_resources(self, raw):
+        """
+        Populate resources from raw JSON LIST responses.
+
+        Args:
+            raw (dict): attribute name -> raw JSON response body
+
+        Returns:
+            None
+
+        """
+        for attr, (_, _, model) in CLUSTER_RESOURCES.items():
+            with step(deserialize_step("cluster_wide", attr)):
+                setattr(self, attr, deserialize(raw[attr], model).items)
 
 
 class NamespacedResources:
@@ -35,40 +151,49 @@ class NamespacedResources:
         self.region = region
         self.cluster = cluster
         self.context = context
+        self.aws = AWSData(region, cluster)
 
     def set_resources(self):
-        self.roles = (
-            client.RbacAuthorizationV1Api()
-            .list_namespaced_role(self.namespace)
-            .items
-        )
-        self.pods = (
-            client.CoreV1Api().list_namespaced_pod(self.namespace).items
-        )
-        self.role_bindings = (
-            client.RbacAuthorizationV1Api()
-            .list_namespaced_role_binding(self.namespace)
-            .items
-        )
-        self.deployments = (
-            client.AppsV1Api().list_namespaced_deployment(self.namespace).items
-        )
-        self.daemon_sets = (
-            client.AppsV1Api().list_namespaced_daemon_set(self.namespace).items
-        )
-        self.stateful_sets = (
-            client.AppsV1Api()
-            .list_namespaced_stateful_set(self.namespace)
-            .items
-        )
-        self.services = (
-            client.CoreV1Api().list_namespaced_service(self.namespace).items
-        )
-        self.service_accounts = (
-            client.CoreV1Api().list_namespaced_service_account(self.namespace).items
-        )
-        self.hpas = (
-            client.AutoscalingV1Api()
-            .list_namespaced_horizontal_pod_autoscaler(self.namespace)
-            .items
-        )
+        for attr, (api, method, _) in NAMESPACED_RESOURCES.items():
+            with step(
+                collect_step("namespace_based", attr), namespace=self.namespace
+            ):
+                setattr(self, attr, _list(api, method, self.namespace))
+
+    def get_raw_resources(self):
+        """
+        Fetch the namespace's LIST responses as undecoded JSON strings.
+
+        Returns:
+            dict: attribute name -> raw JSON response body
+
+        """
+        raw = {}
+        for attr, (api, method, _) in NAMESPACED_RESOURCES.items():
+            with step(
+                collect_step("namespace_based", attr), namespace=self.namespace
+            ):
+                response = getattr(getattr(client, api)(), method)(
+                    self.namespace, _preload_content=False
+                )
+                accounting.record_bytes(len(response.data))
+                raw[attr] = response.data.decode("utf-8")
+        return raw
+
+    def set_raw_resources(self, raw):
+        """
+        Populate resources from the output of `get_raw_resources`.
+
+        Args:
+            raw (dict): attribute name -> raw JSON response body
+
+        Returns:
+            None
+
+        """
+        for attr, (_, _, model) in NAMESPACED_RESOURCES.items():
+            with step(
+                deserialize_step("namespace_based", attr),
+                namespace=self.namespace,
+            ):
+                setattr(self, attr, deserialize(raw[attr], model).items)
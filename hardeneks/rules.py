@@ -5,12 +5,24 @@ from hardeneks import console
 
 class Result(object):
     def __init__(
-        self, status=True, resources=[""], resource_type=None, namespace=None
+        self,
+        status=True,
+        resources=[""],
+        resource_type=None,
+        namespace=None,
+        reason=None,
     ):
+        # status is None when the rule timed out or was skipped, `reason`
+        # then says which.
         self.status = status
         self.resources = resources
         self.resource_type = resource_type
         self.namespace = namespace
+        self.reason = reason
+
+    @property
+    def incomplete(self):
+        return self.status is None
 
 
 class Rule(ABC):
@@ -20,6 +32,8 @@ class Rule(ABC):
     _type = None
     pillar = None
     section = None
+    # One of harden.SEVERITIES.
+    severity = None
     console = console
 
     def __init__(self, result=Result()):
@@ -43,6 +57,10 @@ class Rule(ABC):
             raise NotImplementedError(
                 "Class needs to have class variable section"
             )
+        if not (hasattr(self, "severity") and self.severity):
+            raise NotImplementedError(
+                "Class needs to have class variable severity"
+            )
 
     @abstractmethod
     def check(self):
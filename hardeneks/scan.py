@@ -0,0 +1,178 @@
+from . import aio, memory, tracing
+from .aws import datasets_for
+from .harden import deadline_passed, harden
+from .parallel import harden_namespaces
+from .resources import NamespacedResources, Resources
+
+
+class Scan:
+    """
+    Collection and rule evaluation of one cluster.
+
+    Args:
+        region (str): AWS region of the cluster
+        context (str): K8s context
+        cluster (str): Cluster name
+        namespaces (list): Namespaces to harden
+        rules (dict): `rules` section of the hardeneks config
+        workers (int): Processes evaluating namespace based rules
+        rule_workers (int): Rules checked concurrently
+        async_collection (bool): Collect resources with asyncio
+        concurrency (int): Maximum in-flight requests of async collection
+        rule_timeout (float): Time budget of a rule, in seconds
+        deadline (float): time.monotonic() after which rules are skipped
+        costs (CostModel): Learned rule costs used for scheduling
+        expensive_first (bool): Order rules longest first, else cheapest
+        on_result (callable): Called with every rule result as it is done
+        stop (threading.Event): Once set, no further namespaces are
+            collected and no further rules are started
+    """
+
+    def __init__(
+        self,
+        region,
+        context,
+        cluster,
+        namespaces,
+        rules,
+        workers=1,
+        rule_workers=1,
+        async_collection=False,
+        concurrency=100,
+        rule_timeout=None,
+        deadline=None,
+        costs=None,
+        expensive_first=True,
+        on_result=None,
+        stop=None,
+    ):
+        self.region = region
+        self.context = context
+        self.cluster = cluster
+        self.namespaces = namespaces
+        self.rules = rules
+        self.workers = workers
+        self.rule_workers = rule_workers
+        self.async_collection = async_collection
+        self.concurrency = concurrency
+        self.rule_timeout = rule_timeout
+        self.deadline = deadline
+        self.costs = costs
+        self.expensive_first = expensive_first
+        self.on_result = on_result
+        self.stop = stop
+        self.results = []
+
+    def _stopped(self):
+        return self.stop is not None and self.stop.is_set()
+
+    def _harden(self, resources, _type):
+        results = harden(
+            resources,
+            self.rules,
+            _type,
+            rule_timeout=self.rule_timeout,
+            deadline=self.deadline,
+            workers=self.rule_workers,
+            costs=self.costs,
+            expensive_first=self.expensive_first,
+            on_result=self.on_result,
+            stop=self.stop,
+        )
+        self.results.extend(results)
+
+    def _checkpoint(self, done):
+        # Memory is sampled once per batch of namespaces.
+        if done % memory.BATCH and done != len(self.namespaces):
+            return
+        first = (done - 1) // memory.BATCH * memory.BATCH + 1
+        memory.checkpoint(f"namespaces {first}-{done}")
+
+    def run(self):
+        """
+        Collect resources and evaluate the configured rules.
+
+        Returns:
+            list: Rule results
+
+        """
+        with tracing.span("scan", "scan", cluster=self.cluster):
+            return self._run()
+
+    def _run(self):
+        namespaced_raw = None
+        resources = Resources(
+            self.region, self.context, self.cluster, self.namespaces
+        )
+        if self.async_collection:
+            cluster_raw, namespaced_raw = aio.collect_raw(
+                self.namespaces, self.concurrency
+            )
+            resources.set_raw_resources(cluster_raw)
+        else:
+            resources.set_resources()
+        memory.checkpoint("collect")
+
+        if "cluster_wide" in self.rules:
+            resources.aws.prefetch(datasets_for(self.rules["cluster_wide"]))
+            self._harden(resources, "cluster_wide")
+            memory.checkpoint("cluster_wide")
+
+        if "namespace_based" not in self.rules or self._stopped():
+            return self.results
+
+        if self.workers > 1:
+            partitions = harden_namespaces(
+                self.region,
+                self.context,
+                self.cluster,
+                self.namespaces,
+                self.rules,
+                self.workers,
+                raw=namespaced_raw,
+                rule_timeout=self.rule_timeout,
+                deadline=self.deadline,
+                costs=self.costs,
+                expensive_first=self.expensive_first,
+                rule_workers=self.rule_workers,
+                stop=self.stop,
+            )
+            try:
+                for index, partition_results in enumerate(partitions, 1):
+                    self.results.extend(partition_results)
+                    memory.checkpoint(f"namespace partition {index}")
+                    if self.on_result is not None:
+                        for rule in partition_results:
+                            self.on_result(rule)
+                    if self._stopped():
+                        break
+            finally:
+                partitions.close()
+        elif namespaced_raw is not None:
+            for done, resources in enumerate(
+                aio.namespaced_resources(
+                    self.region, self.context, self.cluster, namespaced_raw
+                ),
+                1,
+            ):
+                if self._stopped():
+                    break
+                with tracing.span(resources.namespace, "namespace"):
+                    self._harden(resources, "namespace_based")
+                self._checkpoint(done)
+        else:
+            for done, ns in enumerate(self.namespaces, 1):
+                if self._stopped():
+                    break
+                with tracing.span(ns, "namespace"):
+                    resources = NamespacedResources(
+                        self.region, self.context, self.cluster, ns
+                    )
+                    # Past the deadline, rules of the remaining namespaces
+                    # are only recorded as skipped.
+                    if not deadline_passed(self.deadline):
+                        resources.set_resources()
+                    self._harden(resources, "namespace_based")
+                self._checkpoint(done)
+
+        return self.results
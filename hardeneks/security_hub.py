@@ -0,0 +1,433 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import copy
+import datetime
+import hashlib
+import json
+import os
+import threading
+
+# Findings per BatchImportFindings call, the API maximum.
+BATCH = 100
+
+# BatchImportFindings calls in flight.
+CONCURRENCY = 4
+
+# Limits of a finding: resources, ProductFields values, title and
+# description.
+MAX_RESOURCES = 32
+MAX_FIELD = 2048
+MAX_TITLE = 256
+MAX_DESCRIPTION = 1024
+
+# Unchanged findings are imported again once they are this old, Security
+# Hub deletes findings that weren't updated for 90 days.
+REFRESH = datetime.timedelta(days=30)
+
+# Fields left out of the content hash, they change on every run.
+_VOLATILE = ("CreatedAt", "UpdatedAt")
+
+
+def _now(ago=datetime.timedelta()):
+    # ISO 8601 times of this format sort as strings.
+    return (datetime.datetime.now(datetime.timezone.utc) - ago).strftime(
+        "%Y-%m-%dT%H:%M:%SZ"
+    )
+
+
+def _finding_id(rule, cluster):
+    # Unique within an account: a rule fails once per namespace of a
+    # cluster.
+    return (
+        f"hardeneks/{cluster}/{rule._type}/{rule.pillar}/{rule.section}/"
+        f"{type(rule).__name__}/{rule.result.namespace or 'cluster-wide'}"
+    )
+
+
+def finding(rule, resource, region, account_id, context, now, cluster=None):
+    """
+    Security Hub finding of a failing resource.
+
+    The id is the one of `aggregated_finding` followed by a digest of
+    the resource, so that the same resource failing several rules, in
+    several namespaces or clusters gives distinct findings.
+
+    Args:
+        rule (Rule): Failing rule result
+        resource (str): One of its resources
+        region (str): AWS region of the cluster
+        account_id (str): AWS account of the cluster
+        context (str): K8s context, the id of the finding's resource
+        now (str): Time of the scan, ISO 8601
+        cluster (str): Cluster name, the context by default
+
+    Returns:
+        dict: AWS Security Finding Format
+
+    """
+    digest = hashlib.md5(resource.encode()).hexdigest()
+    name = type(rule).__name__
+    result = {
+        "SchemaVersion": "2018-10-08",
+        "Id": f"{_finding_id(rule, cluster or context)}/{digest}",
+        "ProductArn": f"arn:aws:securityhub:{region}:{account_id}:"
+        f"product/{account_id}/default",
+        "GeneratorId": f"hardeneks/{rule.pillar}/{rule.section}/{name}",
+        "AwsAccountId": account_id,
+        "Types": [
+            "Software and Configuration Checks/AWS Security Best Practices"
+        ],
+        "CreatedAt": now,
+        "UpdatedAt": now,
+        "Severity": {"Label": rule.severity},
+        "Title": rule.message,
+        "Description": f"HardenEKS check failed: {rule.message}",
+        "Resources": [
+            {
+                "Type": f"EKS {rule.result.resource_type}",
+                "Id": context,
+                "Partition": "aws",
+                "Region": region,
+            }
+        ],
+        "Compliance": {"Status": "FAILED"},
+        "RecordState": "ACTIVE",
+        "Workflow": {"Status": "NEW"},
+        "ProductFields": {
+            "Provider": "HardenEKS",
+            "Pillar": rule.pillar,
+            "Section": rule.section,
+        },
+    }
+    if rule.result.namespace:
+        result["ProductFields"]["Namespace"] = rule.result.namespace
+    if rule.url:
+        result["Remediation"] = {
+            "Recommendation": {
+                "Text": "For remediation steps, see the Amazon EKS Best "
+                "Practices documentation",
+                "Url": rule.url,
+            }
+        }
+    return result
+
+
+def _truncate(text, limit):
+    if len(text) <= limit:
+        return text
+    return text[: limit - 3] + "..."
+
+
+def aggregated_finding(rule, region, account_id, context, cluster, now):
+    """
+    Security Hub finding of all the failing resources of a rule result,
+    its rule and namespace.
+
+    The id is made of the cluster, rule and namespace so that it is the
+    same from one run to the next and unique within an account. The
+    first `MAX_RESOURCES` resources are listed in `Resources`, all of
+    them (up to `MAX_FIELD` characters) in `ProductFields`.
+
+    Args:
+        rule (Rule): Failing rule result
+        region (str): AWS region of the cluster
+        account_id (str): AWS account of the cluster
+        context (str): K8s context
+        cluster (str): Cluster name
+        now (str): Time of the scan, ISO 8601
+
+    Returns:
+        dict: AWS Security Finding Format
+
+    """
+    name = type(rule).__name__
+    namespace = rule.result.namespace or ""
+    resources = [i for i in rule.result.resources if i]
+    result = finding(
+        rule, "NoSpecificResource", region, account_id, context, now
+    )
+    result["Id"] = _finding_id(rule, cluster)
+    scope = f"namespace {namespace}" if namespace else "the cluster"
+    result["Title"] = _truncate(rule.message, MAX_TITLE)
+    result["Description"] = _truncate(
+        f"HardenEKS check failed: {rule.message} "
+        f"({len(resources)} resources in {scope} of {cluster})",
+        MAX_DESCRIPTION,
+    )
+    if resources:
+        result["Resources"] = [
+            {
+                "Type": f"EKS {rule.result.resource_type}",
+                "Id": (
+                    f"{context}/{namespace}/{resource}"
+                    if namespace
+                    else f"{context}/{resource}"
+                ),
+                "Partition": "aws",
+                "Region": region,
+            }
+            for resource in resources[:MAX_RESOURCES]
+        ]
+    result["ProductFields"].update(
+        {
+            "Cluster": cluster,
+            "Rule": name,
+            "ResourceCount": str(len(resources)),
+            "Resources": _truncate(", ".join(resources), MAX_FIELD),
+        }
+    )
+    return result
+
+
+def content_hash(finding):
+    content = {k: v for k, v in finding.items() if k not in _VOLATILE}
+    return hashlib.sha256(
+        json.dumps(content, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def _check(rule, account_id, cluster):
+    # Findings are only archived when the check that produced them ran
+    # again to completion, on the same cluster of the same account.
+    return f"{account_id}/{_finding_id(rule, cluster)}"
+
+
+class SecurityHubSync:
+    """
+    Keeps the findings of hardeneks in Security Hub in step with the
+    results of a scan.
+
+    Failing resources are imported as findings. With a state file, the
+    id and content hash of every imported finding are kept between
+    runs: only new or changed findings, and unchanged ones last imported
+    more than `refresh` ago, are imported again, and findings whose
+    check passed since are imported as ARCHIVED. Without a state
+    file the state only lives as long as the object, across the scans
+    of the daemon mode.
+
+    With `aggregate`, a finding is imported per rule and namespace
+    instead of per resource, see `aggregated_finding`.
+
+    `sync` handles a whole scan. `begin`, `write` and `finish` do the
+    same for results streamed as the scan goes, importing each batch as
+    soon as it is full.
+
+    Batches are sent `concurrency` at a time. Throttled calls are
+    retried with backoff by the client, see `throttle.install_boto3`.
+
+    Args:
+        client: boto3 Security Hub client
+        account_id (str): AWS account of the findings
+        state (str): Path of the state file, None to keep it in memory
+        concurrency (int): BatchImportFindings calls in flight
+        aggregate (bool): One finding per rule and namespace
+        refresh (timedelta): Age at which unchanged findings are imported
+            again, `REFRESH` by default
+    """
+
+    def __init__(
+        self,
+        client,
+        account_id,
+        state=None,
+        concurrency=None,
+        aggregate=False,
+        refresh=None,
+    ):
+        self.client = client
+        self.aggregate = aggregate
+        self.refresh = REFRESH if refresh is None else refresh
+        self.account_id = account_id
+        self.path = state
+        self.concurrency = concurrency or CONCURRENCY
+        self.state = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+        if state and os.path.exists(state):
+            with open(state, "r", encoding="utf-8") as f:
+                self.state = json.load(f).get("findings", {})
+
+    def _send(self, batch):
+        with self._lock:
+            self.calls += 1
+        try:
+            response = self.client.batch_import_findings(Findings=batch)
+        except Exception as exc:
+            return [(i["Id"], "Error", str(exc)) for i in batch]
+        return [
+            (i["Id"], i["ErrorCode"], i["ErrorMessage"])
+            for i in response["FailedFindings"]
+        ]
+
+    def _flush(self, pending):
+        # Calls are accounted to the caller's profiling step.
+        self._futures.append(
+            self._executor.submit(
+                contextvars.copy_context().run, self._send, pending
+            )
+        )
+
+    def _findings(self, rule):
+        if self.aggregate:
+            yield aggregated_finding(
+                rule,
+                self._region,
+                self.account_id,
+                self._context,
+                self._cluster,
+                self._now,
+            )
+            return
+        for resource in rule.result.resources or ["NoSpecificResource"]:
+            yield finding(
+                rule,
+                resource,
+                self._region,
+                self.account_id,
+                self._context,
+                self._now,
+                self._cluster,
+            )
+
+    def _fresh(self, known, digest):
+        # Imported with the same content, recently enough to be left
+        # alone.
+        return (
+            known is not None
+            and known["hash"] == digest
+            and known["finding"]["UpdatedAt"] > self._stale
+        )
+
+    def begin(self, region, context, cluster=None):
+        """
+        Start syncing the results of a scan, given to `write` as they
+        are done.
+
+        Args:
+            region (str): AWS region of the cluster
+            context (str): K8s context
+            cluster (str): Cluster name, the context by default
+
+        Returns:
+            None
+
+        """
+        self._region = region
+        self._context = context
+        self._cluster = cluster or context
+        self._now = _now()
+        self._stale = _now(self.refresh)
+        self._current = {}
+        self._checked = set()
+        self._unchanged = 0
+        self._pending = []
+        self._futures = []
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+    def write(self, rule):
+        """
+        Queue the findings of a rule result that are new or changed,
+        imported as soon as a batch is full.
+        """
+        if rule.result.incomplete:
+            return
+        check = _check(rule, self.account_id, self._cluster)
+        self._checked.add(check)
+        if rule.result.status is not False:
+            return
+        for new in self._findings(rule):
+            digest = content_hash(new)
+            known = self.state.get(new["Id"])
+            seen = self._current.get(new["Id"])
+            self._current[new["Id"]] = (new, check, digest)
+            if seen is not None and seen[2] == digest:
+                continue
+            if self._fresh(known, digest):
+                self._unchanged += 1
+                continue
+            if known is not None:
+                new["CreatedAt"] = known["finding"]["CreatedAt"]
+            self._pending.append(new)
+            if len(self._pending) == BATCH:
+                self._flush(self._pending)
+                self._pending = []
+
+    def finish(self):
+        """
+        Archive the findings of checks that now pass, wait for every
+        import and save the state.
+
+        Returns:
+            dict: Counts of imported, archived, unchanged and failed
+                findings
+
+        """
+        archived = []
+        for _id, known in self.state.items():
+            if _id in self._current or known["check"] not in self._checked:
+                continue
+            resolved = copy.deepcopy(known["finding"])
+            resolved["UpdatedAt"] = self._now
+            resolved["RecordState"] = "ARCHIVED"
+            resolved["Compliance"] = {"Status": "PASSED"}
+            archived.append(resolved)
+        pending = self._pending + archived
+        for i in range(0, len(pending), BATCH):
+            self._flush(pending[i : i + BATCH])
+
+        failed = []
+        for future in self._futures:
+            failed.extend(future.result())
+        self._executor.shutdown()
+
+        # Findings that failed to import are tried again next run.
+        failed_ids = {i[0] for i in failed}
+        imported = 0
+        for _id, (new, check, digest) in self._current.items():
+            known = self.state.get(_id)
+            if _id in failed_ids or self._fresh(known, digest):
+                continue
+            self.state[_id] = {"hash": digest, "check": check, "finding": new}
+            imported += 1
+        archived = [i for i in archived if i["Id"] not in failed_ids]
+        for resolved in archived:
+            del self.state[resolved["Id"]]
+        self.save()
+        return {
+            "imported": imported,
+            "archived": len(archived),
+            "unchanged": self._unchanged,
+            "failed": failed,
+        }
+
+    def sync(self, rules, region, context, cluster=None):
+        """
+        Import the findings of failing rule results and archive the
+        findings of checks that now pass.
+
+        Args:
+            rules (list): Rule results
+            region (str): AWS region of the cluster
+            context (str): K8s context
+            cluster (str): Cluster name, the context by default
+
+        Returns:
+            dict: Counts of imported, archived, unchanged and failed
+                findings
+
+        """
+        self.begin(region, context, cluster)
+        for rule in rules:
+            self.write(rule)
+        return self.finish()
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"findings": self.state}, f, ensure_ascii=False)
+        os.replace(temporary, self.path)
@@ -0,0 +1,333 @@
+import sqlite3
+
+from .findings import findings
+
+SCHEME = "sqlite:///"
+
+# Findings inserted per executemany.
+BATCH = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    cluster TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS runs_cluster ON runs (cluster, started_at);
+CREATE TABLE IF NOT EXISTS rules (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    pillar TEXT NOT NULL,
+    section TEXT NOT NULL,
+    name TEXT NOT NULL,
+    message TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    url TEXT NOT NULL,
+    UNIQUE (type, pillar, section, name)
+);
+CREATE TABLE IF NOT EXISTS findings (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    rule_id INTEGER NOT NULL REFERENCES rules (id),
+    namespace TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    resource_type TEXT,
+    status TEXT NOT NULL,
+    reason TEXT
+);
+CREATE INDEX IF NOT EXISTS findings_run ON findings (run_id, status);
+CREATE INDEX IF NOT EXISTS findings_key
+    ON findings (rule_id, namespace, resource, status);
+"""
+
+# Runs that were finished, latest first. A (rule, namespace) is checked
+# by a run that has a complete finding for it: runs limited to some
+# namespaces, and rules that did not complete, check nothing.
+ORDERED = """
+    SELECT id, started_at,
+        ROW_NUMBER() OVER (ORDER BY started_at DESC) - 1 AS age
+    FROM runs WHERE cluster = :cluster AND finished_at IS NOT NULL
+"""
+
+# Failing (rule, namespace, resource) of the latest run of a cluster that
+# were not failing in the run before it, for the (rule, namespace) both
+# runs checked.
+NEW_FAILURES = f"""
+WITH ordered AS ({ORDERED})
+SELECT rules.pillar, rules.section, rules.name, f.namespace, f.resource
+FROM findings f JOIN rules ON rules.id = f.rule_id
+WHERE f.run_id = (SELECT id FROM ordered WHERE age = 0)
+AND f.status = 'failed'
+AND EXISTS (
+    SELECT 1 FROM findings c
+    WHERE c.run_id = (SELECT id FROM ordered WHERE age = 1)
+    AND c.rule_id = f.rule_id AND c.namespace = f.namespace
+    AND c.status != 'incomplete'
+)
+AND NOT EXISTS (
+    SELECT 1 FROM findings p
+    WHERE p.run_id = (SELECT id FROM ordered WHERE age = 1)
+    AND p.rule_id = f.rule_id AND p.namespace = f.namespace
+    AND p.resource = f.resource AND p.status = 'failed'
+)
+ORDER BY rules.pillar, rules.section, rules.name, f.namespace, f.resource
+"""
+
+# A failure is remediated by the first run after the last one it failed
+# in that checked its (rule, namespace), it is open until then.
+REMEDIATION = f"""
+WITH ordered AS ({ORDERED}), spans AS (
+    SELECT f.rule_id, f.namespace, MIN(r.started_at) AS first,
+        MAX(r.started_at) AS last
+    FROM findings f JOIN ordered r ON r.id = f.run_id
+    WHERE f.status = 'failed'
+    GROUP BY f.rule_id, f.namespace, f.resource
+), fixed AS (
+    SELECT rule_id, first, (
+        SELECT MIN(r.started_at) FROM ordered r
+        WHERE r.started_at > spans.last
+        AND EXISTS (
+            SELECT 1 FROM findings c
+            WHERE c.run_id = r.id AND c.rule_id = spans.rule_id
+            AND c.namespace = spans.namespace AND c.status != 'incomplete'
+        )
+    ) AS at
+    FROM spans
+)
+SELECT rules.pillar, rules.section, rules.name,
+    COUNT(fixed.at), AVG(fixed.at - first), MAX(fixed.at - first),
+    SUM(fixed.at IS NULL)
+FROM fixed JOIN rules ON rules.id = fixed.rule_id
+GROUP BY fixed.rule_id
+ORDER BY AVG(fixed.at - first) DESC, SUM(fixed.at IS NULL) DESC
+"""
+
+# Failing resources per namespace in the latest run and `runs` runs
+# before it, for namespaces that got worse. Only the (rule, namespace)
+# both runs checked are counted.
+TRENDING = f"""
+WITH ordered AS ({ORDERED}), checks AS (
+    SELECT f.rule_id, f.namespace
+    FROM findings f JOIN ordered ON ordered.id = f.run_id
+    WHERE ordered.age IN (0, :runs) AND f.status != 'incomplete'
+    AND f.namespace != ''
+    GROUP BY f.rule_id, f.namespace
+    HAVING COUNT(DISTINCT ordered.age) = 2
+), counts AS (
+    SELECT ordered.age, f.namespace, COUNT(*) AS failing
+    FROM findings f JOIN ordered ON ordered.id = f.run_id
+    JOIN checks ON checks.rule_id = f.rule_id
+    AND checks.namespace = f.namespace
+    WHERE ordered.age IN (0, :runs) AND f.status = 'failed'
+    GROUP BY ordered.age, f.namespace
+)
+SELECT namespace,
+    SUM(CASE WHEN age = :runs THEN failing ELSE 0 END) AS before,
+    SUM(CASE WHEN age = 0 THEN failing ELSE 0 END) AS now
+FROM counts
+GROUP BY namespace
+HAVING now > before
+ORDER BY now - before DESC, namespace
+"""
+
+
+def path_of(url):
+    """
+    Path of the database of a `sqlite:///path` URL, `sqlite:////path`
+    for an absolute path.
+    """
+    if not url.startswith(SCHEME) or len(url) == len(SCHEME):
+        raise ValueError(f"{url} is not a sqlite:///path URL")
+    return url[len(SCHEME) :]
+
+
+class Store:
+    """
+    History of scans in a SQLite database: runs, rules and the findings
+    of every run, one row per (rule, namespace, resource).
+
+    Cluster wide findings and findings without a resource are stored
+    with an empty namespace or resource, so that they compare equal
+    across runs.
+
+    Args:
+        url (str): sqlite:///path of the database, created if missing
+    """
+
+    def __init__(self, url):
+        # Written by the exporter thread of `pipeline.StoreSink`.
+        self.connection = sqlite3.connect(
+            path_of(url), check_same_thread=False
+        )
+        self.connection.executescript(SCHEMA)
+        self._rules = {}
+        self._pending = []
+
+    def _rule_id(self, rule):
+        key = (rule._type, rule.pillar, rule.section, type(rule).__name__)
+        if key not in self._rules:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO rules (type, pillar, section, name, "
+                "message, severity, url) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                key + (rule.message, rule.severity, rule.url),
+            )
+            (self._rules[key],) = self.connection.execute(
+                "SELECT id FROM rules WHERE type = ? AND pillar = ? "
+                "AND section = ? AND name = ?",
+                key,
+            ).fetchone()
+        return self._rules[key]
+
+    def start(self, cluster, started_at):
+        """
+        Record the start of a run.
+
+        Args:
+            cluster (str): Cluster name
+            started_at (float): Unix time the scan started at
+
+        Returns:
+            int: Id of the run
+
+        """
+        cursor = self.connection.execute(
+            "INSERT INTO runs (cluster, started_at) VALUES (?, ?)",
+            (cluster, started_at),
+        )
+        return cursor.lastrowid
+
+    def add(self, run, rule):
+        """
+        Queue the findings of a rule result, inserted by batches of
+        `BATCH`.
+        """
+        rule_id = self._rule_id(rule)
+        for finding in findings(rule, None):
+            self._pending.append(
+                (
+                    run,
+                    rule_id,
+                    finding["namespace"] or "",
+                    finding["resource"] or "",
+                    finding["resource_type"],
+                    finding["status"],
+                    finding.get("reason"),
+                )
+            )
+        if len(self._pending) >= BATCH:
+            self._flush()
+
+    def _flush(self):
+        self.connection.executemany(
+            "INSERT INTO findings (run_id, rule_id, namespace, resource, "
+            "resource_type, status, reason) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._pending,
+        )
+        self._pending = []
+
+    def finish(self, run, finished_at):
+        """
+        Insert the remaining findings of a run and commit it.
+        """
+        self._flush()
+        self.connection.execute(
+            "UPDATE runs SET finished_at = ? WHERE id = ?",
+            (finished_at, run),
+        )
+        self.connection.commit()
+
+    def abort(self, run):
+        """
+        Drop a run that did not complete, with the findings inserted so
+        far, so that it is not compared with complete runs.
+        """
+        self._pending = []
+        self.connection.rollback()
+        # Rules first seen by the run are rolled back with it.
+        self._rules = {}
+
+    def save(self, rules, cluster, started_at, finished_at):
+        """
+        Record a run and the findings of its rule results.
+
+        Returns:
+            int: Id of the run
+
+        """
+        run = self.start(cluster, started_at)
+        for rule in rules:
+            self.add(run, rule)
+        self.finish(run, finished_at)
+        return run
+
+    def latest_cluster(self):
+        row = self.connection.execute(
+            "SELECT cluster FROM runs ORDER BY started_at DESC LIMIT 1"
+        ).fetchone()
+        return row[0] if row else None
+
+    def runs(self, cluster, limit=20):
+        """
+        Latest runs of a cluster with their failing resources.
+
+        Returns:
+            list: (id, started_at, finished_at, failing) tuples, latest
+                first
+
+        """
+        return self.connection.execute(
+            "SELECT runs.id, started_at, finished_at, "
+            "(SELECT COUNT(*) FROM findings "
+            "WHERE run_id = runs.id AND status = 'failed') "
+            "FROM runs WHERE cluster = ? "
+            "ORDER BY started_at DESC LIMIT ?",
+            (cluster, limit),
+        ).fetchall()
+
+    def new_failures(self, cluster):
+        """
+        Failures of the latest run of `cluster` that the run before it
+        did not have, where both runs checked the rule in the namespace.
+
+        Returns:
+            list: (pillar, section, rule, namespace, resource) tuples
+
+        """
+        return self.connection.execute(
+            NEW_FAILURES, {"cluster": cluster}
+        ).fetchall()
+
+    def remediation(self, cluster):
+        """
+        Time to remediate failures, per rule.
+
+        Returns:
+            list: (pillar, section, rule, remediated, mean seconds, max
+                seconds, still open) tuples, slowest first
+
+        """
+        return self.connection.execute(
+            REMEDIATION, {"cluster": cluster}
+        ).fetchall()
+
+    def trending(self, cluster, runs=1):
+        """
+        Namespaces with more failing resources in the latest run than
+        `runs` runs before.
+
+        Returns:
+            list: (namespace, before, now) tuples, largest increase first
+
+        """
+        return self.connection.execute(
+            TRENDING, {"cluster": cluster, "runs": runs}
+        ).fetchall()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,222 @@
+import functools
+import random
+import threading
+import time
+
+from kubernetes.client import rest
+from kubernetes.client.exceptions import ApiException
+
+from . import accounting
+
+# Error codes AWS uses to signal throttling.
+AWS_THROTTLING_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestThrottledException",
+    "TooManyRequestsException",
+    "ProvisionedThroughputExceededException",
+    "RequestLimitExceeded",
+    "RequestThrottled",
+    "SlowDown",
+    "EC2ThrottledException",
+}
+
+MAX_ATTEMPTS = 6
+BASE_DELAY = 0.5
+MAX_DELAY = 30.0
+
+# Timeout in seconds applied to every Kubernetes and AWS request.
+request_timeout = None
+
+
+class RateLimiter:
+    """
+    Token bucket whose rate adapts with AIMD.
+
+    Every success raises the rate by `increase` requests per second up to
+    `max_rate`, every throttle halves it down to `min_rate`.
+    """
+
+    def __init__(self, rate, burst, min_rate=1.0, max_rate=None):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate * 4
+        self.increase = 0.1
+        self.throttles = 0
+        self.backoff = 0.0
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token and return how long the caller has to wait for it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._last) * self.rate
+            )
+            self._last = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, delay):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.throttles += 1
+            self.backoff += delay
+
+    def configure(self, rate):
+        with self._lock:
+            self.rate = rate
+            self.burst = rate * 2
+            self.max_rate = rate * 4
+            self._tokens = min(self._tokens, self.burst)
+
+
+kubernetes_limiter = RateLimiter(rate=50.0, burst=100)
+aws_limiter = RateLimiter(rate=20.0, burst=40)
+
+
+def backoff(attempt, retry_after=None):
+    """
+    Delay before the next attempt, with full jitter.
+
+    A server supplied `Retry-After` is honoured and only jittered upwards.
+    """
+    if retry_after is not None:
+        return retry_after + random.uniform(0, BASE_DELAY)
+    return random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2**attempt))
+
+
+def retry_after(exc):
+    """
+    Return the delay requested by a throttled Kubernetes response.
+
+    Returns:
+        float: seconds from `Retry-After` (0 when absent), or None when
+            `exc` is not a throttle
+
+    """
+    if not isinstance(exc, ApiException) or exc.status != 429:
+        return None
+    try:
+        return float((exc.headers or {}).get("Retry-After", 0))
+    except ValueError:
+        return 0.0
+
+
+def _throttled_request(request):
+    @functools.wraps(request)
+    def wrapper(*args, **kwargs):
+        attempt = 0
+        if kwargs.get("_request_timeout") is None:
+            kwargs["_request_timeout"] = request_timeout
+        while True:
+            kubernetes_limiter.acquire()
+            accounting.record_kubernetes_call()
+            try:
+                response = request(*args, **kwargs)
+            except ApiException as exc:
+                hint = retry_after(exc)
+                attempt += 1
+                if hint is None or attempt >= MAX_ATTEMPTS:
+                    raise
+                delay = backoff(attempt, hint or None)
+                kubernetes_limiter.on_throttle(delay)
+                time.sleep(delay)
+                continue
+            kubernetes_limiter.on_success()
+            # Streamed responses are accounted for by whoever reads them.
+            if kwargs.get("_preload_content", True):
+                accounting.record_bytes(len(getattr(response, "data", b"")))
+            return response
+
+    wrapper.throttled = True
+    return wrapper
+
+
+def install_kubernetes(timeout=None):
+    """
+    Route every request of the Kubernetes client through the limiter.
+
+    Args:
+        timeout (float): Default timeout of every request, in seconds
+
+    Returns:
+        None
+
+    """
+    global request_timeout
+    request_timeout = timeout
+    if not getattr(rest.RESTClientObject.request, "throttled", False):
+        rest.RESTClientObject.request = _throttled_request(
+            rest.RESTClientObject.request
+        )
+
+
+def _before_send(**kwargs):
+    aws_limiter.acquire()
+    accounting.record_aws_call()
+
+
+def _needs_retry(response=None, attempts=None, **kwargs):
+    if response is None:
+        return None
+    code = response[1].get("Error", {}).get("Code")
+    if code not in AWS_THROTTLING_CODES or attempts >= MAX_ATTEMPTS:
+        return None
+    delay = backoff(attempts)
+    aws_limiter.on_throttle(delay)
+    return delay
+
+
+def _after_call(http_response=None, **kwargs):
+    aws_limiter.on_success()
+    if http_response is not None:
+        accounting.record_bytes(len(http_response.content or b""))
+
+
+def install_boto3(client):
+    """
+    Attach the limiter and throttling retries to a boto3 client.
+
+    Our retry handler is registered first so throttles are retried with
+    our backoff and accounted for, other errors keep botocore's policy.
+    """
+    events = client.meta.events
+    events.register_first("before-send", _before_send)
+    events.register_first("needs-retry", _needs_retry)
+    events.register("after-call", _after_call)
+    return client
+
+
+def summary():
+    """
+    Throttling counters of the run.
+
+    Returns:
+        dict: path -> (throttle count, total backoff in seconds)
+
+    """
+    return {
+        "Kubernetes API": (
+            kubernetes_limiter.throttles,
+            kubernetes_limiter.backoff,
+        ),
+        "AWS API": (aws_limiter.throttles, aws_limiter.backoff),
+    }
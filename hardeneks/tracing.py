@@ -0,0 +1,195 @@
+from contextlib import contextmanager
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+
+FORMATS = ["chrome", "otlp"]
+
+_parent = contextvars.ContextVar("hardeneks_span", default=None)
+
+
+class Tracer:
+    """
+    Timeline of a scan, exported as a file Perfetto (ui.perfetto.dev) or
+    chrome://tracing open without any backend.
+
+    Spans are kept in memory while the scan runs. Nothing is recorded
+    unless `enabled` is set.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self._lock = threading.Lock()
+        # perf_counter_ns is monotonic and shared by the processes of the
+        # host, the offset converts it to unix time for OTLP.
+        self._offset = time.time_ns() - time.perf_counter_ns()
+
+    @contextmanager
+    def span(self, name, category, coroutine=False, **attributes):
+        """
+        Record the enclosed work as a span.
+
+        Args:
+            name (str): Span name
+            category (str): Kind of work, such as `collect` or `export`
+            coroutine (bool): The work shares its thread with other
+                coroutines, so it's drawn on a track of its own
+            attributes: Extra key/values attached to the span
+
+        """
+        if not self.enabled:
+            yield
+            return
+        span_id = secrets.token_hex(8)
+        token = _parent.set(span_id)
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            _parent.reset(token)
+            span = {
+                "name": name,
+                "category": category,
+                "start": start,
+                "end": end,
+                "pid": os.getpid(),
+                "tid": threading.get_native_id(),
+                "id": span_id,
+                "parent": _parent.get(),
+                "coroutine": coroutine,
+                "attributes": attributes,
+            }
+            with self._lock:
+                self.spans.append(span)
+
+    def drain(self):
+        """
+        Return the recorded spans and start over, used to ship the spans
+        of a worker process back to the parent.
+        """
+        with self._lock:
+            spans, self.spans = self.spans, []
+        return spans
+
+    def merge(self, spans):
+        with self._lock:
+            self.spans.extend(spans)
+
+    def chrome(self):
+        """
+        Spans as Chrome trace events.
+
+        Returns:
+            dict: Trace in the JSON object format
+        """
+        events = []
+        for span in self.spans:
+            event = {
+                "name": span["name"],
+                "cat": span["category"],
+                "ts": span["start"] / 1000,
+                "pid": span["pid"],
+                "tid": span["tid"],
+                "args": span["attributes"],
+            }
+            if span["coroutine"]:
+                # Overlapping spans of one thread don't nest, async
+                # events are laid out on tracks of their own.
+                events.append(
+                    dict(event, ph="b", id=span["id"], scope=span["category"])
+                )
+                events.append(
+                    {
+                        "name": span["name"],
+                        "cat": span["category"],
+                        "ph": "e",
+                        "ts": span["end"] / 1000,
+                        "pid": span["pid"],
+                        "tid": span["tid"],
+                        "id": span["id"],
+                        "scope": span["category"],
+                    }
+                )
+            else:
+                events.append(
+                    dict(
+                        event, ph="X", dur=(span["end"] - span["start"]) / 1000
+                    )
+                )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def otlp(self):
+        """
+        Spans in the OTLP/JSON encoding of an ExportTraceServiceRequest.
+
+        Returns:
+            dict: Trace with a single resource and scope
+        """
+        trace_id = secrets.token_hex(16)
+        spans = []
+        for span in self.spans:
+            attributes = dict(span["attributes"])
+            attributes.update(
+                {
+                    "hardeneks.category": span["category"],
+                    "process.pid": span["pid"],
+                    "thread.id": span["tid"],
+                }
+            )
+            otlp_span = {
+                "traceId": trace_id,
+                "spanId": span["id"],
+                "name": span["name"],
+                "kind": 1,
+                "startTimeUnixNano": str(span["start"] + self._offset),
+                "endTimeUnixNano": str(span["end"] + self._offset),
+                "attributes": [
+                    _otlp_attribute(key, value)
+                    for key, value in attributes.items()
+                ],
+            }
+            if span["parent"]:
+                otlp_span["parentSpanId"] = span["parent"]
+            spans.append(otlp_span)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            _otlp_attribute("service.name", "hardeneks")
+                        ]
+                    },
+                    "scopeSpans": [
+                        {"scope": {"name": "hardeneks"}, "spans": spans}
+                    ],
+                }
+            ]
+        }
+
+    def save(self, path, _format="chrome"):
+        with self._lock:
+            trace = getattr(self, _format)()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f, ensure_ascii=False)
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+tracer = Tracer()
+
+
+def span(name, category, coroutine=False, **attributes):
+    return tracer.span(name, category, coroutine, **attributes)
@@ -3,7 +3,18 @@ import os
 from kubernetes import client
 import pytest
 
-from hardeneks.resources import Resources, NamespacedResources
+from hardeneks.namespace_based.security.iam import (
+    disable_service_account_token_mounts,
+)
+from hardeneks.namespace_based.security.pod_security import (
+    disallow_container_socket_mount,
+)
+from hardeneks.resources import (
+    NAMESPACED_RESOURCES,
+    NamespacedResources,
+    Resources,
+)
+from hardeneks.rules import Result
 
 
 class Response:
@@ -110,3 +121,50 @@ def namespaced_resources(request):
                 setattr(resources, resource_name, [])
 
     return resources
+
+
+def get_raw_namespaced_resources(test_name):
+    data_directory = os.path.join(
+        os.path.dirname(__file__), "data", test_name, "cluster"
+    )
+    files = {"hpas": "horizontal_pod_autoscaler_api_response.json"}
+    raw = {}
+    for attr in NAMESPACED_RESOURCES:
+        _file = files.get(attr, f"{attr}_api_response.json")
+        with open(os.path.join(data_directory, _file)) as f:
+            raw[attr] = f.read()
+    return raw
+
+
+def rule_result(
+    namespace,
+    resources=None,
+    rule=disable_service_account_token_mounts,
+    **kwargs,
+):
+    """
+    Result of `rule` in `namespace`, failing on `resources` if any and
+    passing otherwise.
+    """
+    return rule(
+        Result(
+            status=not resources,
+            resources=resources or [""],
+            namespace=namespace,
+            **kwargs,
+        )
+    )
+
+
+def timed_out(namespace, rule=disallow_container_socket_mount):
+    return rule(Result(status=None, namespace=namespace, reason="timed out"))
+
+
+@pytest.fixture
+def results():
+    # A failing, a passing and an incomplete rule result.
+    return [
+        rule_result("bad", ["a", "b"]),
+        rule_result("good"),
+        timed_out("slow"),
+    ]
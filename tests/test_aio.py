@@ -0,0 +1,83 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+
+import kubernetes
+import pytest
+
+pytest.importorskip("kubernetes_asyncio")
+
+from hardeneks import aio  # noqa: E402
+from hardeneks.resources import Resources  # noqa: E402
+from .conftest import get_raw_namespaced_resources  # noqa: E402
+
+RAW = get_raw_namespaced_resources("disable_service_account_token_mounts")
+PATHS = {
+    "/api/v1/namespaces/{ns}/pods": "pods",
+    "/api/v1/namespaces/{ns}/services": "services",
+    "/api/v1/namespaces/{ns}/serviceaccounts": "service_accounts",
+    "/apis/apps/v1/namespaces/{ns}/deployments": "deployments",
+    "/apis/apps/v1/namespaces/{ns}/daemonsets": "daemon_sets",
+    "/apis/apps/v1/namespaces/{ns}/statefulsets": "stateful_sets",
+    "/apis/rbac.authorization.k8s.io/v1/namespaces/{ns}/roles": "roles",
+    "/apis/rbac.authorization.k8s.io/v1/namespaces/{ns}/rolebindings": (
+        "role_bindings"
+    ),
+    "/apis/autoscaling/v1/namespaces/{ns}/horizontalpodautoscalers": "hpas",
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        parts = path.split("/")
+        body = json.dumps({"items": []})
+        if "namespaces" in parts:
+            ns = parts[parts.index("namespaces") + 1]
+            template = path.replace(f"/namespaces/{ns}/", "/namespaces/{ns}/")
+            if ns == "missing" or template not in PATHS:
+                self.send_error(404)
+                return
+            body = RAW[PATHS[template]]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    default = kubernetes.client.Configuration.get_default_copy()
+    configuration = kubernetes.client.Configuration()
+    configuration.host = f"http://127.0.0.1:{server.server_port}"
+    kubernetes.client.Configuration.set_default(configuration)
+    yield server
+    kubernetes.client.Configuration.set_default(default)
+    server.shutdown()
+
+
+def test_collect_raw(api_server):
+    cluster_raw, namespaced_raw = aio.collect_raw(["good", "bad"], 4)
+
+    resources = Resources("region", "context", "cluster", ["good", "bad"])
+    resources.set_raw_resources(cluster_raw)
+    assert resources.cluster_roles == []
+
+    namespaced = list(
+        aio.namespaced_resources(
+            "region", "context", "cluster", namespaced_raw
+        )
+    )
+    assert [i.namespace for i in namespaced] == ["good", "bad"]
+    assert namespaced[0].service_accounts
+
+
+def test_collect_raw_error(api_server):
+    with pytest.raises(kubernetes.client.exceptions.ApiException):
+        aio.collect_raw(["missing"], 4, cluster_wide=False)
@@ -0,0 +1,62 @@
+from unittest.mock import patch
+
+import pytest
+
+from hardeneks.aws import AWSData, datasets_for
+
+
+@patch("boto3.client")
+def test_prefetch_serves_from_memory(mocked_client):
+    mocked_client.return_value.describe_cluster.return_value = {
+        "cluster": {"version": "1.30"}
+    }
+    aws = AWSData("some_region", "some_cluster")
+
+    aws.prefetch(["cluster"])
+    assert aws.get("cluster") == {"version": "1.30"}
+    assert aws.get("cluster") == {"version": "1.30"}
+
+    mocked_client.return_value.describe_cluster.assert_called_once_with(
+        name="some_cluster"
+    )
+
+
+@patch("boto3.client")
+def test_get_without_prefetch_is_live(mocked_client):
+    eks = mocked_client.return_value
+    eks.describe_cluster.return_value = {"cluster": {"version": "1.29"}}
+    aws = AWSData("some_region", "some_cluster")
+
+    assert aws.get("cluster")["version"] == "1.29"
+    eks.describe_cluster.return_value = {"cluster": {"version": "1.30"}}
+    assert aws.get("cluster")["version"] == "1.30"
+
+
+@patch("boto3.client")
+def test_prefetch_errors_surface_on_get(mocked_client):
+    mocked_client.return_value.describe_cluster.side_effect = ValueError(
+        "boom"
+    )
+    aws = AWSData("some_region", "some_cluster")
+
+    aws.prefetch(["cluster", "flow_logs"])
+
+    with pytest.raises(ValueError):
+        aws.get("cluster")
+    with pytest.raises(ValueError):
+        aws.get("flow_logs")
+
+
+def test_datasets_for():
+    rules = {
+        "security": {
+            "iam": [
+                "check_endpoint_public_access",
+                "check_access_to_instance_profile",
+            ],
+            "infrastructure_security": ["deploy_workers_onto_private_subnets"],
+            "network_security": ["check_vpc_flow_logs"],
+        }
+    }
+
+    assert datasets_for(rules) == ["cluster", "instances", "flow_logs"]
@@ -0,0 +1,73 @@
+from hardeneks import baseline, findings
+from hardeneks.namespace_based.security.iam import (
+    disable_service_account_token_mounts,
+)
+from hardeneks.report import Report, print_changes
+
+from .conftest import rule_result, timed_out
+
+
+def _save(path, rules, cluster="cluster"):
+    with findings.NDJSONWriter(str(path), cluster) as writer:
+        for rule in rules:
+            writer.write(rule)
+
+
+def test_load(tmp_path):
+    path = tmp_path / "previous.ndjson"
+    _save(path, [rule_result("a", ["p1", "p2"]), rule_result("b", [])])
+
+    assert baseline.load(str(path)) == {
+        ("cluster", "disable_service_account_token_mounts", "a", "p1"),
+        ("cluster", "disable_service_account_token_mounts", "a", "p2"),
+    }
+
+
+def test_diff(tmp_path):
+    path = tmp_path / "previous.ndjson"
+    _save(
+        path,
+        [
+            rule_result("a", ["p1", "p2"]),
+            rule_result("b", ["p3"]),
+            rule_result("gone", ["p4"]),
+        ],
+    )
+    _save(tmp_path / "other.ndjson", [rule_result("a", ["p9"])], "other")
+    index = baseline.load(str(path)) | baseline.load(
+        str(tmp_path / "other.ndjson")
+    )
+    results = [
+        rule_result("a", ["p2", "p5"]),
+        rule_result("b", []),
+        timed_out("a"),
+    ]
+
+    changes = baseline.diff(index, results, "cluster")
+
+    assert [(i.result.namespace, i.result.resources) for i in changes.new] == [
+        ("a", ["p5"])
+    ]
+    assert changes.new_count == 1
+    assert changes.resolved == [
+        ("disable_service_account_token_mounts", "a", "p1"),
+        ("disable_service_account_token_mounts", "b", "p3"),
+    ]
+    assert changes.unchanged == 1
+    # Namespace gone was not scanned this time.
+    assert changes.unchecked == 1
+    # The scan's results are left untouched.
+    assert results[0].result.resources == ["p2", "p5"]
+
+
+def test_print_changes(tmp_path):
+    index = {("cluster", "disable_service_account_token_mounts", "a", "p1")}
+    changes = baseline.diff(index, [rule_result("a", ["p2"])], "cluster")
+    text = tmp_path / "changes.txt"
+
+    with Report(text=str(text), width=200) as output:
+        print_changes(output, changes)
+
+    written = text.read_text()
+    assert "1 new, 1 resolved, 0 unchanged failures" in written
+    assert "p1" in written
@@ -0,0 +1,177 @@
+import json
+import os
+
+from typer.testing import CliRunner
+
+from hardeneks import app
+from hardeneks.bench import suite
+from hardeneks.bench.regression import best_of, compare
+from hardeneks.bench.synthetic import SyntheticCluster, load, response_file
+from hardeneks.resources import NAMESPACED_RESOURCES, deserialize
+from hardeneks.store import Store
+
+
+def _rule_count(rules, _type):
+    return sum(
+        len(section)
+        for pillar in rules[_type].values()
+        for section in pillar.values()
+    )
+
+
+def test_pod_counts():
+    synthetic = SyntheticCluster(namespaces=10, pods=1000)
+
+    assert sum(synthetic.pod_counts) == 1000
+    assert synthetic.pod_counts[0] > synthetic.pod_counts[-1]
+
+
+def test_deterministic():
+    first = SyntheticCluster(namespaces=3, pods=30, seed=1)
+    second = SyntheticCluster(namespaces=3, pods=30, seed=1)
+
+    assert first.raw_namespace(2) == second.raw_namespace(2)
+    assert first.raw_cluster() == second.raw_cluster()
+
+
+def test_write_and_load(tmp_path):
+    synthetic = SyntheticCluster(namespaces=3, pods=30)
+    path = synthetic.write(tmp_path)
+
+    assert os.path.exists(
+        os.path.join(path, "horizontal_pod_autoscaler_api_response.json")
+    )
+    with open(os.path.join(path, response_file("pods"))) as f:
+        pods = deserialize(f.read(), "V1PodList").items
+    assert len(pods) == 30
+
+    cluster_raw, namespaced_raw = load(tmp_path)
+    assert list(namespaced_raw) == synthetic.namespaces
+    assert json.loads(cluster_raw["namespaces"])["items"]
+    for index, namespace in enumerate(synthetic.namespaces):
+        raw = namespaced_raw[namespace]
+        assert set(raw) == set(NAMESPACED_RESOURCES)
+        assert (
+            len(deserialize(raw["pods"], "V1PodList").items)
+            == synthetic.pod_counts[index]
+        )
+
+
+def test_run(tmp_path):
+    synthetic = SyntheticCluster(namespaces=3, pods=30)
+    rules = suite.offline_rules(suite._load_config()["rules"])
+
+    results = suite.run(synthetic, str(tmp_path), rules=rules)
+
+    assert results["rule_checks"] == _rule_count(
+        rules, "cluster_wide"
+    ) + 3 * _rule_count(rules, "namespace_based")
+    assert results["failed_checks"] > 0
+    for phase in [
+        "generate",
+        "collection",
+        "deserialization",
+        "harden",
+        "report",
+    ] + [f"export_{i}" for i in suite.EXPORTERS if i not in ("txt", "html")]:
+        assert results["phases"][phase]["seconds"] >= 0
+    for exporter in ["txt", "html", "openmetrics"]:
+        assert os.path.exists(tmp_path / f"report.{exporter}")
+    assert os.path.exists(tmp_path / "findings.html")
+    with Store(f"sqlite:///{tmp_path / 'history.db'}") as store:
+        assert len(store.runs("bench")) == 1
+    json.dumps(results)
+
+
+def _results(seconds, api_calls=0, peak=1000):
+    return {
+        "small": {
+            "seed": 0,
+            "peak_rss_kib": peak,
+            "phases": {
+                "harden": {
+                    "seconds": seconds,
+                    "cpu_seconds": seconds,
+                    "api_calls": api_calls,
+                    "peak_rss_kib": peak,
+                },
+            },
+        }
+    }
+
+
+def test_compare():
+    baseline = _results(1.0, api_calls=10)
+
+    assert not any(i.regression for i in compare(baseline, _results(1.2, 10)))
+    regressions = [
+        (i.phase, i.metric)
+        for i in compare(baseline, _results(1.5, 11, peak=2000))
+        if i.regression
+    ]
+    assert regressions == [
+        ("harden", "seconds"),
+        ("harden", "api_calls"),
+        ("", "peak_rss_kib"),
+    ]
+    assert not any(
+        i.regression
+        for i in compare(baseline, _results(1.5, 10), {"seconds": 0.6})
+    )
+
+
+def test_compare_ignores_noise():
+    deltas = compare(_results(0.001), _results(0.01))
+    assert not any(i.regression for i in deltas)
+
+    # Tens of milliseconds are not a regression, however short the phase.
+    deltas = compare(_results(0.08), _results(0.16))
+    assert not any(i.regression for i in deltas)
+
+    deltas = compare(_results(0.05), _results(0.5))
+    assert [i.metric for i in deltas if i.regression] == ["seconds"]
+
+
+def test_best_of():
+    merged = best_of([_results(2.0, peak=900), _results(1.0, peak=1000)])
+
+    assert merged["small"]["phases"]["harden"]["seconds"] == 1.0
+    assert merged["small"]["peak_rss_kib"] == 900
+
+
+def test_compare_command(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    current = tmp_path / "current.json"
+    suite.save(_results(1.0), baseline)
+    suite.save(_results(2.0), current)
+    runner = CliRunner()
+
+    result = runner.invoke(
+        app, ["bench", "compare", str(baseline), "--results", str(baseline)]
+    )
+    assert result.exit_code == 0
+    result = runner.invoke(
+        app, ["bench", "compare", str(baseline), "--results", str(current)]
+    )
+    assert result.exit_code == 1
+    assert "REGRESSION" in result.stdout
+
+
+def test_compare_replays_options(tmp_path, monkeypatch):
+    options = {"server": {"latency": 0.0, "throttle_rate": 0.0}}
+    reference = _results(1.0, api_calls=10)
+    reference["small"]["options"] = options
+    baseline = tmp_path / "baseline.json"
+    suite.save(reference, baseline)
+    calls = []
+
+    def run_scenarios(scenarios, seed=0, directory=None, **kwargs):
+        calls.append(kwargs)
+        return _results(1.0, api_calls=10)
+
+    monkeypatch.setattr(suite, "run_scenarios", run_scenarios)
+    result = CliRunner().invoke(app, ["bench", "compare", str(baseline)])
+
+    assert result.exit_code == 0
+    # Best of 3 by default.
+    assert calls == [options] * 3
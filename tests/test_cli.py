@@ -6,6 +6,7 @@ import pytest
 
 
 from hardeneks import (
+    _columnar_callback,
     _config_callback,
     _get_cluster_name,
     _get_current_context,
@@ -38,6 +39,14 @@ def test_config_callback_bad_yaml(tmp_path):
         _config_callback(config)
 
 
+def test_columnar_callback_without_pyarrow():
+    assert _columnar_callback(None) is None
+    with patch("hardeneks.columnar.pyarrow", None):
+        assert _columnar_callback(None) is None
+        with pytest.raises(exceptions.BadParameter, match="hardeneks"):
+            _columnar_callback("findings.parquet")
+
+
 @patch("kubernetes.config.list_kube_config_contexts")
 def test_get_current_context_None(config):
     config.return_value = ({}, {"name": "some-context"})
@@ -0,0 +1,46 @@
+import pytest
+
+from hardeneks import _export_csv, columnar
+
+pyarrow = pytest.importorskip("pyarrow")
+
+
+def test_table(results):
+    table = columnar.table(results, "cluster")
+
+    assert table.schema == columnar.schema()
+    assert table.num_rows == 4
+    assert table.column("resource").to_pylist() == ["a", "b", None, None]
+    assert table.column("status").to_pylist() == [
+        "failed",
+        "failed",
+        "passed",
+        "incomplete",
+    ]
+    assert pyarrow.types.is_dictionary(table.schema.field("rule").type)
+
+
+@pytest.mark.parametrize("_format", ["parquet", "arrow"])
+def test_write(tmp_path, _format, results):
+    path = str(tmp_path / f"findings.{_format}")
+    table = columnar.table(results, "cluster")
+
+    columnar.write(table, path, _format)
+
+    if _format == "parquet":
+        from pyarrow import parquet
+
+        written = parquet.read_table(path)
+    else:
+        written = pyarrow.ipc.open_file(path).read_all()
+    assert written.to_pylist() == table.to_pylist()
+    assert pyarrow.types.is_dictionary(written.schema.field("rule").type)
+
+
+def test_empty(tmp_path):
+    table = columnar.table([], "cluster")
+    columnar.write(table, str(tmp_path / "empty.parquet"))
+    _export_csv([], str(tmp_path / "empty.csv"))
+
+    assert table.num_rows == 0
+    assert (tmp_path / "empty.csv").read_text().startswith("Type,Pillar")
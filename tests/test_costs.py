@@ -0,0 +1,127 @@
+from unittest.mock import patch
+
+import pytest
+
+from hardeneks import accounting
+from hardeneks.costs import CostModel, rule_key
+from hardeneks.harden import harden
+from hardeneks.namespace_based.security.pod_security import (
+    disallow_container_socket_mount,
+    disallow_host_path_or_make_it_read_only,
+)
+
+CONFIG = {
+    "namespace_based": {
+        "security": {
+            "pod_security": [
+                "disallow_container_socket_mount",
+                "disallow_host_path_or_make_it_read_only",
+            ]
+        }
+    }
+}
+SOCKET = rule_key(
+    "namespace_based",
+    "security",
+    "pod_security",
+    "disallow_container_socket_mount",
+)
+HOST_PATH = rule_key(
+    "namespace_based",
+    "security",
+    "pod_security",
+    "disallow_host_path_or_make_it_read_only",
+)
+
+
+def test_record_and_reload(tmp_path):
+    path = tmp_path / "costs.json"
+    costs = CostModel(str(path))
+    costs.record("a", 1.0, 10)
+    costs.record("a", 2.0, 0)
+    costs.save()
+
+    reloaded = CostModel(str(path))
+    assert reloaded.rules["a"]["runs"] == 2
+    assert reloaded.rules["a"]["seconds"] == pytest.approx(1.3)
+    assert reloaded.rules["a"]["api_calls"] == pytest.approx(7.0)
+
+
+def test_order(tmp_path):
+    costs = CostModel(str(tmp_path / "costs.json"))
+    costs.record("cheap", 0.1, 0)
+    costs.record("expensive", 5.0, 100)
+
+    assert costs.order(["cheap", "new", "expensive"]) == [
+        "new",
+        "expensive",
+        "cheap",
+    ]
+    assert costs.order(["new", "expensive", "cheap"], False) == [
+        "cheap",
+        "expensive",
+        "new",
+    ]
+
+
+@pytest.mark.parametrize(
+    "namespaced_resources",
+    [("disallow_container_socket_mount", ["pods"])],
+    indirect=["namespaced_resources"],
+)
+def test_harden_schedules_expensive_rules_first(
+    namespaced_resources, tmp_path
+):
+    costs = CostModel(str(tmp_path / "costs.json"))
+    costs.record(SOCKET, 0.1, 0)
+    costs.record(HOST_PATH, 2.0, 0)
+    started = []
+
+    def recording_check(self, resources):
+        started.append(type(self).__name__)
+
+    with patch.object(
+        disallow_container_socket_mount, "check", recording_check
+    ), patch.object(
+        disallow_host_path_or_make_it_read_only, "check", recording_check
+    ):
+        results = harden(
+            namespaced_resources, CONFIG, "namespace_based", costs=costs
+        )
+
+    assert started == [
+        "disallow_host_path_or_make_it_read_only",
+        "disallow_container_socket_mount",
+    ]
+    # Results keep the config order.
+    assert [type(i).__name__ for i in results] == list(reversed(started))
+    assert costs.rules[SOCKET]["runs"] == 2
+    assert costs.rules[HOST_PATH]["runs"] == 2
+
+
+@pytest.mark.parametrize(
+    "namespaced_resources",
+    [("disallow_container_socket_mount", ["pods"])],
+    indirect=["namespaced_resources"],
+)
+def test_harden_with_workers(namespaced_resources):
+    results = harden(
+        namespaced_resources, CONFIG, "namespace_based", workers=2
+    )
+
+    assert [type(i).__name__ for i in results] == CONFIG["namespace_based"][
+        "security"
+    ]["pod_security"]
+    assert results[0].result.status is False
+
+
+def test_track_attributes_calls():
+    with accounting.track() as usage:
+        accounting.record_kubernetes_call()
+        accounting.record_aws_call()
+        accounting.record_aws_call()
+    accounting.record_aws_call()
+
+    assert usage.kubernetes_calls == 1
+    assert usage.aws_calls == 2
+    assert usage.api_calls == 3
@@ -0,0 +1,92 @@
+import boto3
+import pytest
+
+import hardeneks
+from hardeneks.aws import AWSData
+from hardeneks.bench import suite
+from hardeneks.bench.fake_aws import FakeAWS
+from hardeneks.bench.synthetic import SyntheticCluster
+from hardeneks.namespace_based.security.iam import (
+    disable_service_account_token_mounts,
+)
+from hardeneks.rules import Result
+
+
+def test_datasets():
+    with FakeAWS(instances=1500, repositories=1200, policies=5) as fake:
+        aws = AWSData("us-east-1", "bench")
+        reservations = aws.get("instances")
+        repositories = aws.get("repositories")
+        cluster = aws.get("cluster")
+        actions = aws.get("role_actions", fake.autoscaler_role)
+
+    assert len(reservations) == 1500
+    assert {i["Instances"][0]["Tags"][0]["Value"] for i in reservations} == {
+        "bench"
+    }
+    assert "MetadataOptions" in reservations[0]["Instances"][0]
+    assert len(repositories) == 1200
+    assert cluster["resourcesVpcConfig"]["endpointPublicAccess"] is True
+    assert "ec2:*" in actions
+    assert "autoscaling:DescribeAutoScalingGroups" in actions
+    assert fake.calls["ec2.DescribeInstances"] == 2
+    assert fake.calls["iam.GetPolicyVersion"] == 5
+
+
+def test_throttling_is_retried():
+    with FakeAWS(repositories=10, throttle_rate=0.5, seed=1) as fake:
+        repositories = AWSData("us-east-1", "bench").get("repositories")
+
+    assert len(repositories) == 10
+    assert fake.throttled > 0
+    assert fake.calls["ecr.DescribeRepositories"] == fake.throttled + 1
+
+
+def test_unknown_operation():
+    with FakeAWS(instances=0, repositories=0):
+        with pytest.raises(NotImplementedError):
+            boto3.client("s3").list_buckets()
+
+
+def test_uninstall():
+    session = boto3.DEFAULT_SESSION
+    with FakeAWS(instances=0, repositories=0):
+        assert boto3.DEFAULT_SESSION is not session
+    assert boto3.DEFAULT_SESSION is session
+
+
+def test_export_security_hub():
+    results = [
+        disable_service_account_token_mounts(
+            Result(status=False, resources=["a", "b"], namespace="bad")
+        ),
+        disable_service_account_token_mounts(
+            Result(status=True, namespace="good")
+        ),
+    ]
+    with FakeAWS(instances=0, repositories=0) as fake:
+        hardeneks._export_security_hub(results, "us-east-1", "bench")
+
+    assert len(fake.findings) == 2
+    assert {
+        i["ProductFields"]["Namespace"] for i in fake.findings.values()
+    } == {"bad"}
+
+
+def test_run_aws(tmp_path):
+    synthetic = SyntheticCluster(namespaces=2, pods=10)
+
+    results = suite.run(
+        synthetic,
+        str(tmp_path),
+        exporters=(),
+        aws={"instances": 100, "repositories": 100, "policies": 3},
+    )
+
+    for phase in ["aws_prefetch", "aws_iam", "export_security_hub"]:
+        assert results["phases"][phase]["api_calls"] > 0
+    assert results["aws"]["security_hub_findings"] > 0
+    offline = suite.run(synthetic, str(tmp_path), exporters=())
+    assert results["rule_checks"] == offline["rule_checks"] + len(
+        suite.AWS_CLUSTER_WIDE
+    )
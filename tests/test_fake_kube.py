@@ -0,0 +1,128 @@
+import json
+import urllib.error
+import urllib.request
+
+import kubernetes
+import pytest
+
+from hardeneks import throttle
+from hardeneks.bench import suite
+from hardeneks.bench.fake_kube import FakeKubeServer, ItemStore
+from hardeneks.bench.synthetic import SyntheticCluster
+
+
+@pytest.fixture
+def synthetic():
+    return SyntheticCluster(namespaces=3, pods=30)
+
+
+@pytest.fixture
+def default_configuration():
+    configuration = kubernetes.client.Configuration.get_default_copy()
+    yield
+    kubernetes.client.Configuration.set_default(configuration)
+
+
+def _get(url):
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+
+def test_list_and_get(synthetic):
+    ns = synthetic.namespaces[0]
+    with FakeKubeServer(ItemStore.from_synthetic(synthetic)) as server:
+        pods = _get(f"{server.url}/api/v1/namespaces/{ns}/pods")
+        assert pods["kind"] == "PodList"
+        assert len(pods["items"]) == synthetic.pod_counts[0]
+
+        everywhere = _get(f"{server.url}/api/v1/pods")
+        assert len(everywhere["items"]) == 30
+
+        name = pods["items"][0]["metadata"]["name"]
+        pod = _get(f"{server.url}/api/v1/namespaces/{ns}/pods/{name}")
+        assert pod["metadata"]["name"] == name
+
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            _get(f"{server.url}/api/v1/namespaces/{ns}/pods/missing")
+        assert exc.value.code == 404
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            _get(f"{server.url}/api/v1/secrets")
+        assert exc.value.code == 404
+
+
+def test_pagination(synthetic):
+    with FakeKubeServer(ItemStore.from_synthetic(synthetic)) as server:
+        names = []
+        url = f"{server.url}/api/v1/pods?limit=7"
+        while True:
+            page = _get(url)
+            assert len(page["items"]) <= 7
+            names.extend(i["metadata"]["name"] for i in page["items"])
+            token = page["metadata"].get("continue")
+            if not token:
+                break
+            url = f"{server.url}/api/v1/pods?limit=7&continue={token}"
+
+    assert len(names) == 30
+
+
+def test_throttle(synthetic):
+    server = FakeKubeServer(
+        ItemStore.from_synthetic(synthetic), throttle_rate=1, retry_after=3
+    )
+    with server:
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            _get(f"{server.url}/api/v1/pods")
+
+    assert exc.value.code == 429
+    assert exc.value.headers["Retry-After"] == "3"
+    assert server.requests == server.throttled == 1
+
+
+def test_watch(synthetic):
+    ns = synthetic.namespaces[0]
+    store = ItemStore.from_synthetic(synthetic)
+    with FakeKubeServer(store, watch_timeout=0.1) as server:
+        with urllib.request.urlopen(
+            f"{server.url}/api/v1/namespaces/{ns}/pods?watch=true"
+        ) as response:
+            events = [json.loads(line) for line in response]
+
+    assert len(events) == synthetic.pod_counts[0]
+    assert {i["type"] for i in events} == {"ADDED"}
+
+
+def test_kubernetes_client(synthetic, tmp_path):
+    store = ItemStore.from_synthetic(synthetic)
+    throttle.install_kubernetes()
+    with FakeKubeServer(
+        store, throttle_rate=0.5, retry_after=0, seed=1
+    ) as server:
+        api_client = kubernetes.config.new_client_from_config(
+            config_file=server.write_kubeconfig(str(tmp_path / "kubeconfig"))
+        )
+        v1 = kubernetes.client.CoreV1Api(api_client)
+        namespaces = v1.list_namespace().items
+        pods = v1.list_namespaced_pod(synthetic.namespaces[0]).items
+
+    assert [i.metadata.name for i in namespaces] == synthetic.namespaces
+    assert len(pods) == synthetic.pod_counts[0]
+    assert server.throttled > 0
+
+
+def test_run_server(synthetic, tmp_path, default_configuration):
+    results = suite.run(
+        synthetic,
+        str(tmp_path),
+        exporters=(),
+        server={"throttle_rate": 0.1, "retry_after": 0},
+    )
+    offline = suite.run(synthetic, str(tmp_path / "offline"), exporters=())
+
+    assert results["rule_checks"] == offline["rule_checks"]
+    assert results["failed_checks"] == offline["failed_checks"]
+    assert results["phases"]["collection"]["api_calls"] > 0
+    assert (
+        results["api_server"]["requests"]
+        >= results["phases"]["collection"]["api_calls"]
+    )
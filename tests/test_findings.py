@@ -0,0 +1,43 @@
+import json
+
+from hardeneks.findings import NDJSONWriter, findings
+from .conftest import rule_result, timed_out
+
+
+def test_findings():
+    failed = rule_result("bad", ["a", "b"])
+    passed = rule_result("good")
+    incomplete = timed_out("slow")
+
+    assert [i["resource"] for i in findings(failed, "c")] == ["a", "b"]
+    assert {i["status"] for i in findings(failed, "c")} == {"failed"}
+    assert [(i["status"], i["resource"]) for i in findings(passed, "c")] == [
+        ("passed", None)
+    ]
+    (finding,) = findings(incomplete, "c")
+    assert finding["status"] == "incomplete"
+    assert finding["reason"] == "timed out"
+    assert finding["rule"] == "disallow_container_socket_mount"
+
+
+def test_ndjson_writer(tmp_path):
+    path = tmp_path / "findings.ndjson"
+    with NDJSONWriter(str(path), "cluster") as writer:
+        # Same rule in two namespaces, both are kept.
+        for namespace in ["one", "two"]:
+            writer.write(rule_result(namespace, ["a"]))
+            # Written as soon as the rule is.
+            assert len(path.read_text().splitlines()) == writer.count
+
+    lines = [json.loads(i) for i in path.read_text().splitlines()]
+    assert [i["namespace"] for i in lines] == ["one", "two"]
+    assert {i["cluster"] for i in lines} == {"cluster"}
+    assert lines[0]["scanned_at"] == lines[1]["scanned_at"]
+
+
+def test_ndjson_stdout(capsys):
+    writer = NDJSONWriter("-", "cluster")
+    writer.write(rule_result("good"))
+    writer.close()
+
+    assert json.loads(capsys.readouterr().out)["status"] == "passed"
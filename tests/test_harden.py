@@ -0,0 +1,98 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from hardeneks import _export_csv, _export_json
+from hardeneks.harden import harden
+from hardeneks.namespace_based.security.pod_security import (
+    disallow_container_socket_mount,
+)
+
+CONFIG = {
+    "namespace_based": {
+        "security": {"pod_security": ["disallow_container_socket_mount"]}
+    }
+}
+
+
+def _slow_check(self, resources):
+    time.sleep(1)
+
+
+@pytest.mark.parametrize(
+    "namespaced_resources",
+    [("disallow_container_socket_mount", ["pods"])],
+    indirect=["namespaced_resources"],
+)
+def test_harden_without_budget(namespaced_resources):
+    results = harden(namespaced_resources, CONFIG, "namespace_based")
+
+    assert results[0].result.status is False
+    assert not results[0].result.incomplete
+
+
+@pytest.mark.parametrize(
+    "namespaced_resources",
+    [("disallow_container_socket_mount", ["pods"])],
+    indirect=["namespaced_resources"],
+)
+def test_harden_with_budget(namespaced_resources):
+    results = harden(
+        namespaced_resources, CONFIG, "namespace_based", rule_timeout=5
+    )
+
+    assert results[0].result.status is False
+
+
+@pytest.mark.parametrize(
+    "namespaced_resources",
+    [("disallow_container_socket_mount", ["pods"])],
+    indirect=["namespaced_resources"],
+)
+@patch.object(disallow_container_socket_mount, "check", _slow_check)
+def test_harden_rule_timeout(namespaced_resources):
+    results = harden(
+        namespaced_resources, CONFIG, "namespace_based", rule_timeout=0.1
+    )
+
+    assert results[0].result.incomplete
+    assert results[0].result.reason.startswith("timed out")
+    assert results[0].result.namespace == "some_namespace"
+
+
+@pytest.mark.parametrize(
+    "namespaced_resources",
+    [("disallow_container_socket_mount", ["pods"])],
+    indirect=["namespaced_resources"],
+)
+def test_harden_deadline_passed(namespaced_resources):
+    results = harden(
+        namespaced_resources,
+        CONFIG,
+        "namespace_based",
+        deadline=time.monotonic() - 1,
+    )
+
+    assert results[0].result.incomplete
+    assert results[0].result.reason == "skipped, scan deadline reached"
+
+
+@pytest.mark.parametrize(
+    "namespaced_resources",
+    [("disallow_container_socket_mount", ["pods"])],
+    indirect=["namespaced_resources"],
+)
+def test_exporters_mark_incomplete(namespaced_resources, tmp_path):
+    results = harden(
+        namespaced_resources,
+        CONFIG,
+        "namespace_based",
+        deadline=time.monotonic() - 1,
+    )
+
+    _export_csv(results, tmp_path / "report.csv")
+    _export_json(results, tmp_path / "report.json")
+
+    assert ',Incomplete,"skipped' in (tmp_path / "report.csv").read_text()
+    assert '"reason": "skipped' in (tmp_path / "report.json").read_text()
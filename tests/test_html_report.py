@@ -0,0 +1,53 @@
+import json
+
+from hardeneks import html_report
+from .conftest import rule_result
+
+
+def test_data(results):
+    results.insert(1, rule_result("worse", ["c"]))
+    data = html_report.data(results, "cluster", scanned_at="now")
+    columns = data["findings"]
+
+    assert columns["resource"] == ["a", "b", "c", "", "timed out"]
+    assert [data["statuses"][i] for i in columns["status"]] == [
+        "failed",
+        "failed",
+        "failed",
+        "passed",
+        "incomplete",
+    ]
+    assert [data["namespaces"][i] for i in columns["namespace"]] == [
+        "bad",
+        "bad",
+        "worse",
+        "good",
+        "slow",
+    ]
+    # A rule is stored once, however many findings it has.
+    assert len(data["rules"]) == 2
+    assert data["rules"][columns["rule"][0]][3] == (
+        "disable_service_account_token_mounts"
+    )
+    aggregates = data["aggregates"]
+    assert aggregates["checks"] == {"failed": 2, "passed": 1, "incomplete": 1}
+    assert aggregates["pillar"] == [["security", 3]]
+    assert aggregates["section"] == [["security", "iam", 3]]
+    assert aggregates["namespace"] == [["bad", 2], ["worse", 1]]
+
+
+def test_write(tmp_path, results):
+    path = tmp_path / "report.html"
+    results[0].result.resources = ["</script><script>alert(1)</script>"]
+
+    html_report.write(str(path), results, "cluster")
+
+    page = path.read_text(encoding="utf-8")
+    assert page.count("</script>") == 2
+    # No external assets.
+    assert "<link" not in page and " src=" not in page
+    start = page.index('type="application/json">') + 24
+    data = json.loads(page[start : page.index("</script>")])
+    assert data["findings"]["resource"][0] == (
+        "</script><script>alert(1)</script>"
+    )
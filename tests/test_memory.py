@@ -0,0 +1,61 @@
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from hardeneks import memory
+from hardeneks.memory import MemoryTracker
+from hardeneks.resources import NamespacedResources
+from hardeneks.scan import Scan
+from .test_scan import NAMESPACES, RULES, _set_resources
+
+
+@pytest.fixture
+def tracker():
+    tracker = MemoryTracker()
+    tracker.start(top=3)
+    yield tracker
+    tracker.stop()
+
+
+def test_checkpoint(tracker):
+    kept = [bytearray(1024) for _ in range(1000)]
+    tracker.checkpoint("allocate")
+    tracker.checkpoint("idle")
+
+    allocate = tracker.phases["allocate"]
+    assert allocate["traced_kib"] >= 1000
+    assert allocate["traced_peak_kib"] >= allocate["traced_kib"]
+    assert allocate["peak_rss_kib"] > 0
+    assert len(allocate["top"]) <= 3
+    assert "test_memory.py:" in allocate["top"][0]["site"]
+    assert allocate["top"][0]["size_kib"] >= 1000
+    assert tracker.phases["idle"]["top"][:1] != allocate["top"][:1]
+    assert len(kept) == 1000
+
+
+def test_disabled():
+    tracker = MemoryTracker()
+    tracker.checkpoint("collect")
+
+    assert tracker.drain() == {}
+
+
+@patch("hardeneks.scan.Resources")
+@patch.object(NamespacedResources, "set_resources", _set_resources)
+@patch.object(memory, "BATCH", 2)
+def test_scan_phases(resources, tracker):
+    with patch.object(memory, "tracker", tracker):
+        Scan("region", "context", "cluster", NAMESPACES, RULES).run()
+
+    assert list(tracker.drain()) == [
+        "collect",
+        "namespaces 1-2",
+        "namespaces 3-3",
+    ]
+
+
+def test_peak_rss_kib_without_resource(monkeypatch):
+    monkeypatch.setitem(sys.modules, "resource", None)
+
+    assert memory.peak_rss_kib() == 0
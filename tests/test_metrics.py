@@ -0,0 +1,130 @@
+from urllib.request import urlopen
+from unittest.mock import patch
+
+from typer.testing import CliRunner
+
+from hardeneks import app
+from hardeneks.metrics import (
+    Aggregates,
+    MetricsServer,
+    openmetrics,
+    write_textfile,
+)
+
+PROFILE = {
+    "collect.namespace_based.pods": {
+        "calls": 1,
+        "wall_seconds": 0.5,
+        "cpu_seconds": 0.1,
+        "kubernetes_calls": 1,
+        "aws_calls": 0,
+        "bytes_received": 10,
+        "objects_deserialized": 2,
+    },
+    "namespace_based.security.iam.disable_service_account_token_mounts": {
+        "calls": 2,
+        "wall_seconds": 0.25,
+        "cpu_seconds": 0.1,
+        "kubernetes_calls": 0,
+        "aws_calls": 3,
+        "bytes_received": 0,
+        "objects_deserialized": 0,
+    },
+}
+
+THROTTLES = {"Kubernetes API": (2, 1.5), "AWS API": (0, 0.0)}
+
+
+def test_aggregates(results):
+    aggregates = Aggregates(results)
+
+    assert aggregates.checks == {"failed": 1, "passed": 1, "incomplete": 1}
+    assert aggregates.failing == {
+        ("security", "iam", "disable_service_account_token_mounts", "bad"): 2
+    }
+    assert aggregates.total("namespace") == {("bad",): 2}
+    assert aggregates.total("section", "pillar") == {("iam", "security"): 2}
+
+
+def test_openmetrics(results):
+    text = openmetrics(
+        Aggregates(results), 'my"cluster', 4.2, PROFILE, THROTTLES, 1.0
+    )
+    lines = text.splitlines()
+
+    assert lines[-1] == "# EOF"
+    assert (
+        'hardeneks_failing_resources{cluster="my\\"cluster",'
+        'pillar="security",section="iam",'
+        'rule="disable_service_account_token_mounts",namespace="bad"} 2'
+    ) in lines
+    assert 'hardeneks_scan_duration_seconds{cluster="my\\"cluster"} 4.200' in (
+        lines
+    )
+    assert (
+        'hardeneks_phase_duration_seconds{cluster="my\\"cluster",'
+        'phase="rules"} 0.250'
+    ) in lines
+    assert 'hardeneks_api_calls{cluster="my\\"cluster",api="aws"} 3' in lines
+    assert (
+        "hardeneks_throttled_requests_total"
+        '{cluster="my\\"cluster",api="Kubernetes API"} 2'
+    ) in lines
+    assert "# TYPE hardeneks_throttled_requests counter" in lines
+
+
+def test_write_textfile(tmp_path):
+    path = tmp_path / "hardeneks.prom"
+    write_textfile(path, "# EOF\n")
+
+    assert path.read_text() == "# EOF\n"
+    assert [i.name for i in tmp_path.iterdir()] == ["hardeneks.prom"]
+
+
+def test_metrics_server():
+    server = MetricsServer(0, "127.0.0.1")
+    try:
+        server.update("hardeneks_api_calls 1\n# EOF\n")
+        with urlopen(f"http://127.0.0.1:{server.port}/metrics") as response:
+            body = response.read().decode()
+            content_type = response.headers["Content-Type"]
+    finally:
+        server.close()
+
+    assert body == "hardeneks_api_calls 1\n# EOF\n"
+    assert content_type.startswith("application/openmetrics-text")
+
+
+@patch("hardeneks.Scan.run")
+@patch("hardeneks.kubernetes.config.load_kube_config")
+def test_export_openmetrics(load_kube_config, run, tmp_path, results):
+    run.return_value = results
+    path = tmp_path / "hardeneks.prom"
+
+    result = CliRunner().invoke(
+        app,
+        [
+            "--region",
+            "us-east-1",
+            "--context",
+            "context",
+            "--cluster",
+            "cluster",
+            "--namespace",
+            "bad",
+            "--export-openmetrics",
+            str(path),
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert 'hardeneks_rule_checks{cluster="cluster",status="failed"} 1' in (
+        path.read_text()
+    )
+
+
+def test_metrics_port_requires_interval():
+    result = CliRunner().invoke(app, ["--metrics-port", "9100"])
+
+    assert result.exit_code == 2
+    assert "--metrics-port requires --interval" in result.output
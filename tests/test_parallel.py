@@ -0,0 +1,141 @@
+from unittest.mock import patch
+
+from hardeneks import profiling
+from hardeneks.costs import CostModel
+from hardeneks.parallel import (
+    _harden_partition,
+    _partition_size,
+    harden_namespaces,
+)
+from hardeneks.resources import NamespacedResources
+from .conftest import get_raw_namespaced_resources
+
+RULES = {
+    "namespace_based": {
+        "security": {
+            "iam": ["disable_service_account_token_mounts"],
+            "pod_security": ["disallow_container_socket_mount"],
+        }
+    }
+}
+
+
+def test_set_raw_resources():
+    raw = get_raw_namespaced_resources("disable_service_account_token_mounts")
+    resources = NamespacedResources("region", "context", "cluster", "bad")
+    resources.set_raw_resources(raw)
+
+    names = [i.metadata.name for i in resources.service_accounts]
+    assert names
+    assert resources.service_accounts[0].metadata.namespace
+
+
+def test_harden_partition():
+    raw = get_raw_namespaced_resources("disable_service_account_token_mounts")
+    partition = [("good_namespace", raw), ("bad_namespace", raw)]
+    profiling.profile.drain()
+
+    results, profile, spans, observed = _harden_partition(
+        "region", "context", "cluster", partition, RULES
+    )
+
+    assert len(results) == 4
+    assert profile["deserialize.namespace_based.pods"]["calls"] == 2
+    assert {i.result.namespace for i in results} == {
+        "good_namespace",
+        "bad_namespace",
+    }
+    assert observed == []
+
+
+def test_harden_partition_costs():
+    raw = get_raw_namespaced_resources("disable_service_account_token_mounts")
+    costs = {
+        "namespace_based.security.iam.disable_service_account_token_mounts": {
+            "runs": 1,
+            "seconds": 1.0,
+            "api_calls": 0,
+        }
+    }
+
+    results, _, _, observed = _harden_partition(
+        "region",
+        "context",
+        "cluster",
+        [("ns", raw)],
+        RULES,
+        costs=costs,
+        rule_workers=2,
+    )
+
+    assert len(results) == 2
+    assert sorted(i[0] for i in observed) == sorted(costs) + [
+        "namespace_based.security.pod_security."
+        "disallow_container_socket_mount"
+    ]
+    # The snapshot is not updated by the worker.
+    assert costs[sorted(costs)[0]]["runs"] == 1
+
+
+def test_partition_size():
+    assert _partition_size(["a"], 4) == 1
+    assert _partition_size([str(i) for i in range(100)], 4) == 7
+
+
+@patch.object(NamespacedResources, "get_raw_resources")
+def test_harden_namespaces(get_raw_resources):
+    raw = get_raw_namespaced_resources("disable_service_account_token_mounts")
+    get_raw_resources.return_value = raw
+    namespaces = ["good_namespace", "bad_namespace", "blank_namespace"]
+
+    results = []
+    for partition_results in harden_namespaces(
+        "region", "context", "cluster", namespaces, RULES, 2
+    ):
+        results.extend(partition_results)
+
+    assert len(results) == 6
+    assert sorted(i.result.namespace for i in results) == sorted(
+        namespaces * 2
+    )
+
+
+@patch.object(NamespacedResources, "get_raw_resources")
+def test_harden_namespaces_costs(get_raw_resources, tmp_path):
+    get_raw_resources.return_value = get_raw_namespaced_resources(
+        "disable_service_account_token_mounts"
+    )
+    costs = CostModel(str(tmp_path / "costs.json"))
+
+    for _ in harden_namespaces(
+        "region", "context", "cluster", ["a", "b", "c"], RULES, 2, costs=costs
+    ):
+        pass
+
+    # Observations of the workers are merged into the parent's model.
+    assert {key: i["runs"] for key, i in costs.rules.items()} == {
+        "namespace_based.security.iam."
+        "disable_service_account_token_mounts": 3,
+        "namespace_based.security.pod_security."
+        "disallow_container_socket_mount": 3,
+    }
+
+
+@patch.object(NamespacedResources, "get_raw_resources")
+def test_harden_namespaces_profile(get_raw_resources):
+    get_raw_resources.return_value = get_raw_namespaced_resources(
+        "disable_service_account_token_mounts"
+    )
+    profiling.profile.drain()
+    with profiling.step("collect.cluster_wide.cluster_roles"):
+        pass
+
+    for _ in harden_namespaces(
+        "region", "context", "cluster", ["a", "b", "c"], RULES, 2
+    ):
+        pass
+
+    steps = profiling.profile.drain()
+    # Workers don't send back the steps recorded before they started.
+    assert steps["collect.cluster_wide.cluster_roles"]["calls"] == 1
+    assert steps["deserialize.namespace_based.pods"]["calls"] == 3
@@ -0,0 +1,104 @@
+import csv
+import threading
+
+from hardeneks.pipeline import CSVSink, Pipeline, StoreSink
+from hardeneks.store import Store
+
+from .conftest import rule_result
+
+
+def _results(count):
+    return [rule_result(f"ns-{i}", ["a"]) for i in range(count)]
+
+
+class Gated:
+    def __init__(self):
+        self.open = threading.Event()
+        self.written = []
+        self.closed = False
+
+    def write(self, rule):
+        self.open.wait()
+        self.written.append(rule)
+
+    def close(self):
+        self.closed = True
+
+
+class Broken:
+    def write(self, rule):
+        raise RuntimeError("broken")
+
+    def close(self):
+        pass
+
+
+def test_backpressure():
+    sink = Gated()
+    exports = Pipeline({"gated": sink}, maxsize=2)
+    results = _results(5)
+    done = threading.Event()
+
+    def produce():
+        for rule in results:
+            exports.put(rule)
+        done.set()
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    # One result held by the sink, two queued, the producer waits.
+    assert not done.wait(0.2)
+    sink.open.set()
+    producer.join()
+    exports.close()
+
+    assert sink.written == results
+    assert sink.closed
+
+
+def test_failing_sink_does_not_block(tmp_path):
+    path = tmp_path / "report.csv"
+    exports = Pipeline(
+        {"broken": Broken(), "csv": CSVSink(str(path))}, maxsize=1
+    )
+    for rule in _results(10):
+        exports.put(rule)
+    errors = exports.close()
+
+    assert list(errors) == ["broken"]
+    with open(path) as f:
+        assert len(list(csv.DictReader(f))) == 10
+
+
+def test_store_sink(tmp_path):
+    url = f"sqlite:///{tmp_path / 'history.db'}"
+    store = Store(url)
+    with Pipeline({"store": StoreSink(store, "cluster", 1.0)}) as exports:
+        for rule in _results(3):
+            exports.put(rule)
+
+    ((run, started, finished, failing),) = store.runs("cluster")
+    assert (started, failing) == (1.0, 3)
+    assert finished is not None
+
+
+def test_abort(tmp_path):
+    url = f"sqlite:///{tmp_path / 'history.db'}"
+    store = Store(url)
+    with Pipeline({"store": StoreSink(store, "cluster", 1.0)}) as exports:
+        for rule in _results(3):
+            exports.put(rule)
+    sink = Gated()
+    sink.open.set()
+    exports = Pipeline({"store": StoreSink(store, "cluster", 2.0), "g": sink})
+    for rule in _results(2):
+        exports.put(rule)
+    exports.close(complete=False)
+
+    # The partial run is dropped, sinks without abort are closed.
+    assert [i[1] for i in store.runs("cluster")] == [1.0]
+    assert sink.closed
+    with Pipeline({"store": StoreSink(store, "cluster", 3.0)}) as exports:
+        for rule in _results(1):
+            exports.put(rule)
+    assert [i[3] for i in store.runs("cluster")] == [1, 3]
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from hardeneks import _export_json, accounting, profiling
+from hardeneks.harden import harden
+from hardeneks.resources import NamespacedResources
+from .conftest import get_raw_namespaced_resources
+
+CONFIG = {
+    "namespace_based": {
+        "security": {"pod_security": ["disallow_container_socket_mount"]}
+    }
+}
+
+RULE = "namespace_based.security.pod_security.disallow_container_socket_mount"
+
+
+@pytest.fixture
+def profile():
+    profiling.profile.drain()
+    yield profiling.profile
+    profiling.profile.drain()
+
+
+def test_track():
+    with accounting.track() as usage:
+        accounting.record_kubernetes_call()
+        accounting.record_aws_call()
+        accounting.record_bytes(10)
+        accounting.record_objects(2)
+        sum(range(10000))
+
+    assert usage.api_calls == 2
+    assert usage.bytes_received == 10
+    assert usage.objects_deserialized == 2
+    assert usage.wall_seconds > 0
+    assert usage.cpu_seconds >= 0
+
+    accounting.record_bytes(10)
+    assert usage.bytes_received == 10
+
+
+def test_profile_merge(profile):
+    with profiling.step("slow"):
+        accounting.record_bytes(5)
+    with profiling.step("slow"):
+        accounting.record_bytes(5)
+    steps = profile.drain()
+
+    assert steps["slow"]["calls"] == 2
+    assert steps["slow"]["bytes_received"] == 10
+    assert profile.to_dict() == {}
+
+    profile.merge(steps)
+    profile.merge(steps)
+    assert profile.to_dict()["slow"]["calls"] == 4
+
+
+def test_profile_failed_step(profile):
+    with pytest.raises(ValueError):
+        with profiling.step("broken"):
+            accounting.record_kubernetes_call()
+            raise ValueError("boom")
+
+    step = profile.drain()["broken"]
+    assert step["calls"] == 1
+    assert step["kubernetes_calls"] == 1
+    assert step["wall_seconds"] > 0
+
+
+def test_profile_rules_and_collection(profile, tmp_path):
+    resources = NamespacedResources("region", "context", "cluster", "ns")
+    resources.set_raw_resources(
+        get_raw_namespaced_resources("disable_service_account_token_mounts")
+    )
+    results = harden(resources, CONFIG, "namespace_based")
+    steps = profile.to_dict()
+
+    assert steps[RULE]["calls"] == 1
+    assert steps["deserialize.namespace_based.pods"]["objects_deserialized"]
+
+    _export_json(results, tmp_path / "report.json", steps)
+    with open(tmp_path / "report.json") as f:
+        report = json.load(f)
+    assert report["profile"][RULE]["calls"] == 1
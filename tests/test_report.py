@@ -0,0 +1,97 @@
+import io
+
+from rich.console import Console
+from rich.text import Text
+
+from hardeneks import report
+from hardeneks.metrics import Aggregates
+from hardeneks.namespace_based.security.pod_security import (
+    disallow_container_socket_mount,
+)
+
+from .conftest import rule_result
+
+
+def test_print_results_in_chunks(tmp_path):
+    console = Console(file=open(tmp_path / "out", "w"), width=200)
+    resources = [f"pod-{i}" for i in range(25)]
+    tables = []
+    output = report.Report(console)
+    output.print = lambda *objects, **kwargs: tables.extend(objects)
+
+    report.print_results(
+        output, [rule_result("bad", resources), rule_result("good")], chunk=10
+    )
+
+    rows = [i.row_count for i in tables if hasattr(i, "row_count")]
+    assert rows == [10, 10, 6]
+    assert not console.record
+
+
+def test_exports(tmp_path):
+    text = tmp_path / "report.txt"
+    html = tmp_path / "report.html"
+    resources = [f"pod-{i}" for i in range(25)]
+
+    with report.Report(text=str(text), html=str(html), width=200) as output:
+        report.print_results(
+            output,
+            [rule_result("bad", resources), rule_result("good")],
+            chunk=10,
+        )
+
+    written = text.read_text()
+    assert "security rules" in written
+    assert all(i in written for i in resources)
+    assert "\x1b[" not in written
+    page = html.read_text()
+    assert page.startswith("<!DOCTYPE html>")
+    assert page.rstrip().endswith("</html>")
+    assert page.count("<pre") == 1
+    assert all(i in page for i in resources)
+
+
+class Counted:
+    def __init__(self):
+        self.renders = 0
+
+    def __rich_console__(self, console, options):
+        self.renders += 1
+        yield Text("counted", style="bold red")
+
+
+def test_rendered_once(tmp_path):
+    terminal = io.StringIO()
+    console = Console(file=terminal, width=80, force_terminal=True)
+    renderable = Counted()
+
+    with report.Report(
+        console, str(tmp_path / "r.txt"), str(tmp_path / "r.html")
+    ) as output:
+        output.print(renderable)
+
+    assert renderable.renders == 1
+    assert "counted" in terminal.getvalue()
+    assert "\x1b[1;31m" in terminal.getvalue()
+    assert (tmp_path / "r.txt").read_text() == "counted\n"
+    assert "font-weight: bold" in (tmp_path / "r.html").read_text()
+
+
+def test_print_summary(tmp_path):
+    text = tmp_path / "summary.txt"
+    results = [rule_result("bad", ["a", "b", "c"]), rule_result("good")] + [
+        rule_result(f"ns-{i}", [f"pod-{i}"], disallow_container_socket_mount)
+        for i in range(5)
+    ]
+
+    with report.Report(text=str(text), width=200) as output:
+        report.print_summary(output, Aggregates(results), top=2)
+
+    written = text.read_text()
+    assert "7 rule checks: 1 passed, 6 failed, 0 incomplete" in written
+    rows = [i.split("│")[1:-1] for i in written.splitlines() if "│" in i]
+    rows = [[cell.strip() for cell in row] for row in rows]
+    assert rows[-4][:2] == ["1", "disallow_container_socket_mount"]
+    assert rows[-3][:2] == ["2", "disable_service_account_token_mounts"]
+    # Namespaces, their failing resources and the heat-map of both rules.
+    assert rows[-2:] == [["bad", "3", "·", "3"], ["ns-0", "1", "1", "·"]]
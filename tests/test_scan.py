@@ -0,0 +1,136 @@
+from importlib import import_module
+import threading
+from unittest.mock import patch
+
+from pkg_resources import resource_filename
+from typer.testing import CliRunner
+import yaml
+
+from hardeneks import _fails_at, app
+from hardeneks.harden import SEVERITIES
+from hardeneks.resources import NamespacedResources
+from hardeneks.rules import Result
+from hardeneks.scan import Scan
+from hardeneks.namespace_based.security.iam import (
+    disable_service_account_token_mounts,
+)
+from hardeneks.namespace_based.security.pod_security import (
+    disallow_container_socket_mount,
+)
+from .conftest import get_raw_namespaced_resources, rule_result, timed_out
+
+RULES = {
+    "namespace_based": {
+        "security": {
+            "iam": ["disable_service_account_token_mounts"],
+            "pod_security": ["disallow_container_socket_mount"],
+        }
+    }
+}
+
+NAMESPACES = ["good_namespace", "bad_namespace", "blank_namespace"]
+
+
+def _set_resources(self):
+    self.set_raw_resources(
+        get_raw_namespaced_resources("disable_service_account_token_mounts")
+    )
+
+
+@patch("hardeneks.scan.Resources")
+@patch.object(NamespacedResources, "set_resources", _set_resources)
+def test_scan(resources):
+    results = Scan("region", "context", "cluster", NAMESPACES, RULES).run()
+
+    assert len(results) == 6
+    resources.return_value.set_resources.assert_called_once()
+
+
+@patch("hardeneks.scan.Resources")
+@patch.object(NamespacedResources, "set_resources", _set_resources)
+def test_scan_stop(resources):
+    stop = threading.Event()
+    seen = []
+
+    def on_result(rule):
+        seen.append(rule)
+        stop.set()
+
+    results = Scan(
+        "region",
+        "context",
+        "cluster",
+        NAMESPACES,
+        RULES,
+        on_result=on_result,
+        stop=stop,
+    ).run()
+
+    assert stop.is_set()
+    assert results == seen
+    assert len(results) == 1
+    assert results[0].result.namespace == "good_namespace"
+
+
+def test_fails_at():
+    medium = disable_service_account_token_mounts(Result(status=False))
+    critical = disallow_container_socket_mount(Result(status=False))
+
+    assert [_fails_at(i, "LOW") for i in (medium, critical)] == [True, True]
+    assert [_fails_at(i, "HIGH") for i in (medium, critical)] == [False, True]
+    assert _fails_at(critical, "CRITICAL")
+
+    # A check that didn't complete fails too, at its severity.
+    medium = timed_out("slow", disable_service_account_token_mounts)
+    assert _fails_at(medium, "LOW")
+    assert not _fails_at(medium, "HIGH")
+
+
+@patch("hardeneks.console.print")
+@patch("hardeneks.Scan.run", autospec=True)
+@patch("hardeneks.kubernetes.config.load_kube_config")
+def test_fail_fast_incomplete(load_kube_config, run, print_):
+    def scan(self):
+        results = [rule_result("good"), timed_out("slow")]
+        for rule in results:
+            self.on_result(rule)
+        return results
+
+    run.side_effect = scan
+
+    result = CliRunner().invoke(
+        app,
+        [
+            "--region",
+            "us-east-1",
+            "--context",
+            "context",
+            "--cluster",
+            "cluster",
+            "--namespace",
+            "good",
+            "--fail-fast",
+            "--fail-severity",
+            "HIGH",
+        ],
+    )
+
+    assert result.exit_code == 1, result.output
+    (message,) = print_.call_args.args
+    assert message.startswith("[bold red]CRITICAL check incomplete")
+    assert message.endswith("(slow, timed out)")
+
+
+def test_severities():
+    with open(resource_filename("hardeneks", "config.yaml")) as f:
+        rules = yaml.safe_load(f)["rules"]
+    severities = set()
+    for _type, pillars in rules.items():
+        for pillar, sections in pillars.items():
+            for section, names in sections.items():
+                module = import_module(f"hardeneks.{_type}.{pillar}.{section}")
+                for name in names:
+                    severities.add(getattr(module, name).severity)
+
+    assert severities <= set(SEVERITIES)
+    assert len(severities) > 1
@@ -0,0 +1,208 @@
+import datetime
+import json
+
+import boto3
+import pytest
+
+from hardeneks import throttle
+from hardeneks.bench.fake_aws import FakeAWS
+from hardeneks.namespace_based.security.iam import (
+    disable_run_as_root_user,
+    disable_service_account_token_mounts,
+)
+from hardeneks.security_hub import SecurityHubSync
+
+from .conftest import rule_result, timed_out
+
+IMPORTS = "securityhub.BatchImportFindings"
+
+
+def _sync(state):
+    client = throttle.install_boto3(
+        boto3.client("securityhub", region_name="us-east-1")
+    )
+    return SecurityHubSync(client, "123456789012", str(state))
+
+
+@pytest.fixture
+def fake():
+    with FakeAWS(instances=0, repositories=0) as fake:
+        yield fake
+
+
+def test_incremental(fake, tmp_path):
+    state = tmp_path / "state.json"
+    resources = [f"pod-{i}" for i in range(250)]
+
+    counts = _sync(state).sync(
+        [rule_result("ns", resources)], "us-east-1", "ctx"
+    )
+    assert counts["imported"] == 250
+    assert fake.calls[IMPORTS] == 3
+    assert len(json.loads(state.read_text())["findings"]) == 250
+
+    counts = _sync(state).sync(
+        [rule_result("ns", resources)], "us-east-1", "ctx"
+    )
+    assert counts == {
+        "imported": 0,
+        "archived": 0,
+        "unchanged": 250,
+        "failed": [],
+    }
+    assert fake.calls[IMPORTS] == 3
+
+
+def test_changed(fake, tmp_path):
+    state = tmp_path / "state.json"
+    _sync(state).sync([rule_result("ns", ["a", "b"])], "us-east-1", "ctx")
+    (created,) = {i["CreatedAt"] for i in fake.findings.values()}
+    fake.findings.clear()
+
+    counts = _sync(state).sync(
+        [rule_result("ns", ["a", "b"], resource_type="Deployment")],
+        "us-east-1",
+        "ctx",
+    )
+
+    assert counts["imported"] == 2
+    assert {i["CreatedAt"] for i in fake.findings.values()} == {created}
+    assert {i["Resources"][0]["Type"] for i in fake.findings.values()} == {
+        "EKS Deployment"
+    }
+
+
+def test_archive(fake, tmp_path):
+    state = tmp_path / "state.json"
+    _sync(state).sync([rule_result("ns", ["a", "b"])], "us-east-1", "ctx")
+
+    # Not archived while the check doesn't complete.
+    incomplete = [timed_out("ns", disable_service_account_token_mounts)]
+    counts = _sync(state).sync(incomplete, "us-east-1", "ctx")
+    assert counts["archived"] == 0
+
+    counts = _sync(state).sync([rule_result("ns", ["a"])], "us-east-1", "ctx")
+    assert counts["archived"] == 1
+    assert counts["unchanged"] == 1
+    states = sorted(
+        (i["RecordState"], i["Compliance"]["Status"])
+        for i in fake.findings.values()
+    )
+    assert states == [("ACTIVE", "FAILED"), ("ARCHIVED", "PASSED")]
+    assert len(json.loads(state.read_text())["findings"]) == 1
+
+
+def test_distinct_ids(fake, tmp_path):
+    state = tmp_path / "state.json"
+    # Two rules of a section on one pod, and the same pod name in another
+    # namespace.
+    results = [
+        rule_result("ns1", ["web"]),
+        rule_result("ns1", ["web"], disable_run_as_root_user),
+        rule_result("ns2", ["web"]),
+    ]
+
+    counts = _sync(state).sync(results, "us-east-1", "ctx", "cluster")
+    assert counts["imported"] == 3
+    assert len(fake.findings) == 3
+    assert all(i.startswith("hardeneks/cluster/") for i in fake.findings)
+
+    counts = _sync(state).sync(results, "us-east-1", "ctx", "cluster")
+    assert (counts["imported"], counts["unchanged"]) == (0, 3)
+    assert fake.calls[IMPORTS] == 1
+
+
+def test_clusters_share_state(fake, tmp_path):
+    state = tmp_path / "state.json"
+    _sync(state).sync([rule_result("ns", ["a"])], "us-east-1", "ctx", "one")
+
+    # The check passing on another cluster doesn't resolve the finding.
+    counts = _sync(state).sync([rule_result("ns")], "us-east-1", "ctx", "two")
+    assert counts["archived"] == 0
+    (finding,) = fake.findings.values()
+    assert finding["RecordState"] == "ACTIVE"
+
+    counts = _sync(state).sync([rule_result("ns")], "us-east-1", "ctx", "one")
+    assert counts["archived"] == 1
+
+
+def test_refresh(fake, tmp_path):
+    state = tmp_path / "state.json"
+    _sync(state).sync([rule_result("ns", ["a", "b"])], "us-east-1", "ctx")
+    saved = json.loads(state.read_text())
+    old = sorted(saved["findings"])[0]
+    created = saved["findings"][old]["finding"]["CreatedAt"]
+    saved["findings"][old]["finding"]["UpdatedAt"] = "2020-01-01T00:00:00Z"
+    state.write_text(json.dumps(saved))
+    fake.findings.clear()
+
+    # Unchanged findings are imported again before Security Hub expires
+    # them.
+    counts = _sync(state).sync(
+        [rule_result("ns", ["a", "b"])], "us-east-1", "ctx"
+    )
+    assert (counts["imported"], counts["unchanged"]) == (1, 1)
+    assert list(fake.findings) == [old]
+    saved = json.loads(state.read_text())["findings"][old]["finding"]
+    assert saved["UpdatedAt"] > "2020-01-01T00:00:00Z"
+    assert fake.findings[old]["CreatedAt"] == created
+
+    client = throttle.install_boto3(
+        boto3.client("securityhub", region_name="us-east-1")
+    )
+    sync = SecurityHubSync(
+        client,
+        "123456789012",
+        str(state),
+        refresh=datetime.timedelta(days=-1),
+    )
+    counts = sync.sync([rule_result("ns", ["a", "b"])], "us-east-1", "ctx")
+    assert counts["imported"] == 2
+
+
+def test_throttled(tmp_path):
+    resources = [f"pod-{i}" for i in range(500)]
+    with FakeAWS(instances=0, repositories=0, throttle_rate=0.3, seed=1) as (
+        fake
+    ):
+        counts = _sync(tmp_path / "state.json").sync(
+            [rule_result("ns", resources)], "us-east-1", "ctx"
+        )
+
+    assert counts["imported"] == 500
+    assert len(fake.findings) == 500
+    assert fake.throttled > 0
+
+
+def test_aggregate(fake, tmp_path):
+    client = throttle.install_boto3(
+        boto3.client("securityhub", region_name="us-east-1")
+    )
+    sync = SecurityHubSync(
+        client, "123456789012", str(tmp_path / "state.json"), aggregate=True
+    )
+    resources = [f"pod-{i}" for i in range(40)]
+    results = [
+        rule_result(namespace, resources)
+        # Same pods in two namespaces don't collide.
+        for namespace in ["one", "two"]
+    ]
+
+    counts = sync.sync(results, "us-east-1", "ctx", "cluster")
+
+    assert counts["imported"] == 2
+    assert sorted(fake.findings) == [
+        "hardeneks/cluster/namespace_based/security/iam/"
+        f"disable_service_account_token_mounts/{namespace}"
+        for namespace in ["one", "two"]
+    ]
+    finding = fake.findings[sorted(fake.findings)[0]]
+    assert len(finding["Resources"]) == 32
+    assert finding["Resources"][0]["Id"] == "ctx/one/pod-0"
+    assert finding["ProductFields"]["ResourceCount"] == "40"
+    assert "pod-39" in finding["ProductFields"]["Resources"]
+
+    # One more failing pod updates the finding of its namespace only.
+    results[1].result.resources = resources + ["pod-40"]
+    counts = sync.sync(results, "us-east-1", "ctx", "cluster")
+    assert (counts["imported"], counts["unchanged"]) == (1, 1)
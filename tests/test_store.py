@@ -0,0 +1,151 @@
+import pytest
+from typer.testing import CliRunner
+
+from hardeneks import app
+from hardeneks.namespace_based.security.iam import (
+    disable_service_account_token_mounts,
+)
+from hardeneks.namespace_based.security.pod_security import (
+    disallow_container_socket_mount,
+)
+from hardeneks.store import Store, path_of
+
+from .conftest import rule_result, timed_out
+
+HOUR = 3600
+
+
+def _results(tokens, sockets):
+    return [rule_result(*i) for i in tokens.items()] + [
+        rule_result(*i, disallow_container_socket_mount)
+        for i in sockets.items()
+    ]
+
+
+@pytest.fixture
+def url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'history.db'}"
+    runs = [
+        ({"a": ["p1", "p2"], "b": []}, {"a": ["p1"]}),
+        ({"a": ["p2"], "b": ["p3"]}, {"a": ["p1"]}),
+        ({"a": [], "b": ["p3", "p4"]}, {"a": []}),
+    ]
+    with Store(url) as store:
+        for index, (tokens, sockets) in enumerate(runs):
+            store.save(
+                _results(tokens, sockets),
+                "cluster",
+                index * HOUR,
+                index * HOUR + 10,
+            )
+        store.save(_results({"a": ["p1"]}, {}), "other", 0, 1)
+    return url
+
+
+def test_path_of():
+    assert path_of("sqlite:///history.db") == "history.db"
+    assert path_of("sqlite:////var/history.db") == "/var/history.db"
+    with pytest.raises(ValueError):
+        path_of("postgres://host/db")
+
+
+def test_runs(url):
+    with Store(url) as store:
+        assert store.latest_cluster() == "cluster"
+        assert store.runs("cluster") == [
+            (3, 2 * HOUR, 2 * HOUR + 10, 2),
+            (2, HOUR, HOUR + 10, 3),
+            (1, 0, 10, 3),
+        ]
+
+
+def test_new_failures(url):
+    with Store(url) as store:
+        assert store.new_failures("cluster") == [
+            (
+                "security",
+                "iam",
+                "disable_service_account_token_mounts",
+                "b",
+                "p4",
+            )
+        ]
+        # A single run has nothing to compare with.
+        assert store.new_failures("other") == []
+
+
+def test_remediation(url):
+    with Store(url) as store:
+        rows = {i[2]: i[3:] for i in store.remediation("cluster")}
+
+    # p1 failed token mounts once and was fixed an hour later, p2 failed
+    # twice, p3 and p4 are still failing.
+    assert rows["disable_service_account_token_mounts"] == (
+        2,
+        1.5 * HOUR,
+        2 * HOUR,
+        2,
+    )
+    assert rows["disallow_container_socket_mount"] == (
+        1,
+        2 * HOUR,
+        2 * HOUR,
+        0,
+    )
+
+
+def test_trending(url):
+    with Store(url) as store:
+        assert store.trending("cluster") == [("b", 1, 2)]
+        assert store.trending("cluster", runs=2) == [("b", 0, 2)]
+
+
+def test_unchecked(tmp_path):
+    url = f"sqlite:///{tmp_path / 'history.db'}"
+    with Store(url) as store:
+        store.save(_results({"a": ["p1"], "b": ["p2"]}, {}), "c", 0, 1)
+        # --namespace b
+        store.save(_results({"b": ["p2"]}, {}), "c", HOUR, HOUR + 1)
+        # p1 was not checked, not remediated.
+        assert [i[3:] for i in store.remediation("c")] == [(0, None, None, 2)]
+
+        store.save(
+            _results({"a": ["p1"], "b": ["p2"]}, {}),
+            "c",
+            2 * HOUR,
+            2 * HOUR + 1,
+        )
+        # Nor new again, and `a` did not get worse.
+        assert store.new_failures("c") == []
+        assert store.trending("c") == []
+
+        results = _results({"b": []}, {})
+        results.append(timed_out("a", disable_service_account_token_mounts))
+        store.save(results, "c", 3 * HOUR, 3 * HOUR + 1)
+        # p2 was fixed, the incomplete check of p1 does not fix it.
+        assert [i[3:] for i in store.remediation("c")] == [
+            (1, 3 * HOUR, 3 * HOUR, 1)
+        ]
+
+        # A run that did not finish is not compared.
+        run = store.start("c", 4 * HOUR)
+        store.add(run, _results({"b": ["p3"]}, {})[0])
+        store._flush()
+        store.connection.commit()
+        assert store.new_failures("c") == []
+        assert store.trending("c") == []
+
+
+def test_history_command(url):
+    runner = CliRunner()
+    for command in ["runs", "new", "remediation", "trending"]:
+        result = runner.invoke(
+            app, ["history", command, "--store", url], terminal_width=200
+        )
+        assert result.exit_code == 0, result.output
+    assert (
+        "p4"
+        in runner.invoke(
+            app, ["history", "new", "--store", url], terminal_width=200
+        ).output
+    )
@@ -0,0 +1,99 @@
+from unittest.mock import MagicMock, patch
+
+from kubernetes.client.exceptions import ApiException
+import pytest
+
+from hardeneks import throttle
+from hardeneks.throttle import RateLimiter
+
+
+@pytest.fixture
+def limiter():
+    limiter = RateLimiter(rate=10.0, burst=2, min_rate=1.0, max_rate=20.0)
+    with patch.object(throttle, "kubernetes_limiter", limiter), patch.object(
+        throttle, "aws_limiter", limiter
+    ):
+        yield limiter
+
+
+def _throttled(retry_after=None):
+    exc = ApiException(status=429, reason="Too Many Requests")
+    exc.headers = {"Retry-After": retry_after} if retry_after else {}
+    return exc
+
+
+def test_reserve_waits_once_burst_is_spent():
+    limiter = RateLimiter(rate=10.0, burst=2)
+
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == pytest.approx(0.1, abs=0.01)
+
+
+def test_aimd(limiter):
+    limiter.on_throttle(1.5)
+    assert limiter.rate == 5.0
+    assert limiter.throttles == 1
+    assert limiter.backoff == 1.5
+
+    for _ in range(10):
+        limiter.on_success()
+    assert limiter.rate == pytest.approx(6.0)
+
+    for _ in range(10):
+        limiter.on_throttle(0)
+    assert limiter.rate == 1.0
+
+
+def test_backoff_honours_retry_after():
+    assert 3 <= throttle.backoff(1, 3) <= 3 + throttle.BASE_DELAY
+    assert 0 <= throttle.backoff(10) <= throttle.MAX_DELAY
+
+
+def test_retry_after():
+    assert throttle.retry_after(_throttled("2")) == 2.0
+    assert throttle.retry_after(_throttled()) == 0.0
+    assert throttle.retry_after(ApiException(status=404)) is None
+    assert throttle.retry_after(ValueError()) is None
+
+
+@patch("time.sleep")
+def test_throttled_request_retries(sleep, limiter):
+    request = MagicMock(side_effect=[_throttled("1"), _throttled(), "ok"])
+
+    assert throttle._throttled_request(request)() == "ok"
+    assert request.call_count == 3
+    assert limiter.throttles == 2
+
+
+@patch("time.sleep")
+def test_throttled_request_gives_up(sleep, limiter):
+    request = MagicMock(side_effect=_throttled())
+
+    with pytest.raises(ApiException):
+        throttle._throttled_request(request)()
+    assert request.call_count == throttle.MAX_ATTEMPTS
+
+
+def test_throttled_request_does_not_retry_errors(limiter):
+    request = MagicMock(side_effect=ApiException(status=403))
+
+    with pytest.raises(ApiException):
+        throttle._throttled_request(request)()
+    assert request.call_count == 1
+
+
+def test_needs_retry(limiter):
+    throttled = (None, {"Error": {"Code": "ThrottlingException"}})
+    denied = (None, {"Error": {"Code": "AccessDenied"}})
+
+    assert throttle._needs_retry(response=throttled, attempts=1) >= 0
+    assert throttle._needs_retry(response=denied, attempts=1) is None
+    assert (
+        throttle._needs_retry(
+            response=throttled, attempts=throttle.MAX_ATTEMPTS
+        )
+        is None
+    )
+    assert throttle._needs_retry(response=None, attempts=1) is None
+    assert limiter.throttles == 1
@@ -0,0 +1,115 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from hardeneks import profiling, tracing
+from hardeneks.parallel import _harden_partition, harden_namespaces
+from hardeneks.resources import NamespacedResources
+from hardeneks.tracing import Tracer
+from .conftest import get_raw_namespaced_resources
+
+RULES = {
+    "namespace_based": {
+        "security": {"pod_security": ["disallow_container_socket_mount"]}
+    }
+}
+
+
+@pytest.fixture
+def tracer():
+    tracing.tracer.enabled = True
+    tracing.tracer.drain()
+    yield tracing.tracer
+    tracing.tracer.enabled = False
+    tracing.tracer.drain()
+
+
+def test_disabled():
+    tracer = Tracer()
+    with tracer.span("scan", "scan"):
+        pass
+
+    assert tracer.spans == []
+
+
+def test_span_parent():
+    tracer = Tracer()
+    tracer.enabled = True
+    with tracer.span("scan", "scan"):
+        with tracer.span("ns", "namespace", namespace="ns"):
+            pass
+
+    inner, outer = tracer.spans
+    assert inner["parent"] == outer["id"]
+    assert outer["parent"] is None
+    assert inner["attributes"] == {"namespace": "ns"}
+
+
+def test_chrome(tmp_path):
+    tracer = Tracer()
+    tracer.enabled = True
+    with tracer.span("scan", "scan"):
+        with tracer.span("pods", "collect", coroutine=True):
+            pass
+    tracer.save(tmp_path / "trace.json")
+
+    with open(tmp_path / "trace.json") as f:
+        events = json.load(f)["traceEvents"]
+    assert [i["ph"] for i in events] == ["b", "e", "X"]
+    assert events[0]["id"] == events[1]["id"]
+    assert events[2]["dur"] >= 0
+
+
+def test_otlp():
+    tracer = Tracer()
+    tracer.enabled = True
+    with tracer.span("scan", "scan", cluster="cluster"):
+        with tracer.span("ns", "namespace"):
+            pass
+    spans = tracer.otlp()["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+    assert spans[0]["parentSpanId"] == spans[1]["spanId"]
+    assert "parentSpanId" not in spans[1]
+    assert len({i["traceId"] for i in spans}) == 1
+    assert int(spans[1]["endTimeUnixNano"]) >= int(
+        spans[1]["startTimeUnixNano"]
+    )
+    assert {"key": "cluster", "value": {"stringValue": "cluster"}} in spans[1][
+        "attributes"
+    ]
+
+
+def test_partition_spans(tracer):
+    raw = get_raw_namespaced_resources("disable_service_account_token_mounts")
+    profiling.profile.drain()
+
+    _, _, spans, _ = _harden_partition(
+        "region", "context", "cluster", [("ns", raw)], RULES, trace=True
+    )
+
+    categories = {i["category"] for i in spans}
+    assert categories == {"namespace", "deserialize", "namespace_based"}
+    namespace = [i for i in spans if i["category"] == "namespace"][0]
+    assert all(
+        i["parent"] == namespace["id"] for i in spans if i is not namespace
+    )
+
+
+@patch.object(NamespacedResources, "get_raw_resources")
+def test_worker_spans(get_raw_resources, tracer):
+    get_raw_resources.return_value = get_raw_namespaced_resources(
+        "disable_service_account_token_mounts"
+    )
+    with tracing.span("collect", "collect"):
+        pass
+
+    for _ in harden_namespaces(
+        "region", "context", "cluster", ["a", "b", "c"], RULES, 2
+    ):
+        pass
+
+    names = [i["name"] for i in tracer.spans]
+    # Workers don't send back the spans recorded before they started.
+    assert names.count("collect") == 1
+    assert sorted(i for i in names if i in ("a", "b", "c")) == ["a", "b", "c"]